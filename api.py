@@ -0,0 +1,201 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import Blueprint, Response, jsonify, request
+from booking import placeBooking, placeBatchBooking, placeCancellation
+from compression import MIN_COMPRESS_SIZE, compress, negotiateEncoding
+from pointsboard import ORDERS
+from reservations import ReservationError
+
+# Number of GET payloads kept in the response cache
+CACHE_SIZE = 256
+
+
+def clubJson(club):
+    return {'name': club['name'], 'points': club['points']}
+
+
+def competitionJson(competition, past):
+    return {'name': competition['name'], 'date': competition['date'],
+            'numberOfPlaces': competition['numberOfPlaces'], 'past': past}
+
+
+class PayloadError(Exception):
+    """
+    Malformed request body, answered with a 400 (details are added to the
+    JSON answer, e.g. the line at fault).
+    """
+
+    def __init__(self, message, **details):
+        super().__init__(message)
+        self.details = details
+
+
+# JSON object of the request ({} without a body); the named fields must be
+# strings when present
+def jsonPayload(*strings):
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return {}
+    if not isinstance(payload, dict):
+        raise PayloadError("The request body must be a JSON object")
+    for name in strings:
+        if name in payload and not isinstance(payload[name], str):
+            raise PayloadError(f"'{name}' must be a string")
+    return payload
+
+
+# Build the /api/v1 blueprint over the app's repository, clock and points board
+def createApi(getRepository, currentTime, pointsBoard, waitlist):
+    api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+    @api.errorhandler(PayloadError)
+    def badPayload(error):
+        return jsonify(error=str(error), **error.details), 400
+    # (path, encoding) -> (data version, body, encoding, etag), least recently used first
+    cache = OrderedDict()
+    cacheLock = threading.Lock()
+
+    # Serve a GET payload from the cache while the data version (plus any
+    # extra state the payload depends on) is unchanged
+    def cachedGet(build, extra=None):
+        data = getRepository()
+        version = (data.version, extra)
+        encoding = negotiateEncoding()
+        key = (request.full_path, encoding)
+        with cacheLock:
+            cached = cache.get(key)
+        if cached is None or cached[0] != version:
+            body = jsonify(build(data)).get_data()
+            if encoding and len(body) >= MIN_COMPRESS_SIZE:
+                body = compress(body, encoding)
+            else:
+                encoding = None
+            cached = (version, body, encoding, hashlib.md5(body).hexdigest())
+        with cacheLock:
+            cache[key] = cached
+            cache.move_to_end(key)
+            while len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+        _, body, encoding, etag = cached
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    @api.route('/clubs')
+    def clubs():
+        return cachedGet(lambda data: {'clubs': [clubJson(c) for c in data.list_clubs()]})
+
+    @api.route('/competitions')
+    def competitions():
+        now = currentTime()
+        includePast = request.args.get('show') != 'upcoming'
+
+        def build(data):
+            upcoming, past, total = data.competitions_page(now, include_past=includePast)
+            return {'competitions': [competitionJson(c, False) for c in upcoming]
+                    + [competitionJson(c, True) for c in past], 'total': total}
+        # The payload also changes whenever a competition becomes past
+        nbUpcoming = getRepository().competitions_page(now, 0, 0, include_past=False)[2]
+        return cachedGet(build, nbUpcoming)
+
+    @api.route('/pointsBoard')
+    def pointsBoardJson():
+        order = request.args.get('order', 'name')
+        if order not in ORDERS:
+            order = 'name'
+
+        def build(data):
+            pointsBoard.refresh(data)
+            return {'order': order, 'clubs': [clubJson(c) for c in pointsBoard.clubs(order)]}
+        return cachedGet(build)
+
+    # Book places with the same rules as purchasePlaces
+    @api.route('/bookings', methods=['POST'])
+    def createBooking():
+        payload = jsonPayload('club', 'competition')
+        data = getRepository()
+        club = data.club_by_name(payload.get('club'))
+        competition = data.competition_by_name(payload.get('competition'))
+        if club is None or competition is None:
+            return jsonify(error="Unknown club or competition"), 404
+        try:
+            places = placeBooking(data, club, competition, payload.get('places'), currentTime())
+        except ReservationError as error:
+            return jsonify(error=str(error)), 400
+        return jsonify(places=places, club=clubJson(club),
+                       competition=competitionJson(competition, False)), 201
+
+    # Book several competitions for one club, all or nothing, in one round trip
+    @api.route('/bookings/batch', methods=['POST'])
+    def createBatchBooking():
+        payload = jsonPayload('club')
+        data = getRepository()
+        club = data.club_by_name(payload.get('club'))
+        if club is None:
+            return jsonify(error="Unknown club or competition"), 404
+        lines = payload.get('bookings') or []
+        if not isinstance(lines, list):
+            raise PayloadError("'bookings' must be a list")
+        items = []
+        for index, line in enumerate(lines):
+            if not isinstance(line, dict) or not isinstance(line.get('competition'), str):
+                raise PayloadError("Each booking must be an object naming a competition", line=index)
+            competition = data.competition_by_name(line.get('competition'))
+            if competition is None:
+                return jsonify(error="Unknown club or competition", competition=line.get('competition')), 404
+            items.append((competition, line.get('places')))
+        try:
+            bookings = placeBatchBooking(data, club, items, currentTime())
+        except ReservationError as error:
+            return jsonify(error=str(error), competition=error.competition), 400
+        return jsonify(club=clubJson(club), bookings=[
+            dict(competitionJson(competition, False), places=places) for competition, places in bookings
+        ]), 201
+
+    # Cancel places of a club's booking (all of them without places) for a refund
+    @api.route('/bookings/cancel', methods=['POST'])
+    def cancelBooking():
+        payload = jsonPayload('club', 'competition')
+        data = getRepository()
+        club = data.club_by_name(payload.get('club'))
+        competition = data.competition_by_name(payload.get('competition'))
+        if club is None or competition is None:
+            return jsonify(error="Unknown club or competition"), 404
+        try:
+            places = placeCancellation(data, club, competition, payload.get('places'), currentTime())
+        except ReservationError as error:
+            return jsonify(error=str(error)), 400
+        return jsonify(places=places, club=clubJson(club), competition=competitionJson(competition, False))
+
+    # Places a club holds per competition and its booking history (negative
+    # places are cancellations)
+    @api.route('/clubs/<name>/bookings')
+    def clubBookings(name):
+        data = getRepository()
+        club = data.club_by_name(name)
+        if club is None:
+            return jsonify(error="Unknown club"), 404
+        return jsonify(club=clubJson(club), bookings=data.club_bookings(club), history=[
+            {'competition': competition, 'places': places} for competition, places in data.history(club)
+        ])
+
+    # Queue for places on a sold-out competition; 202 with the queue position
+    @api.route('/waitlist', methods=['POST'])
+    def joinWaitlist():
+        payload = jsonPayload('club', 'competition')
+        data = getRepository()
+        club = data.club_by_name(payload.get('club'))
+        competition = data.competition_by_name(payload.get('competition'))
+        if club is None or competition is None:
+            return jsonify(error="Unknown club or competition"), 404
+        try:
+            position = waitlist.join(club, competition, payload.get('places'), currentTime())
+        except ReservationError as error:
+            return jsonify(error=str(error)), 400
+        return jsonify(position=position, competition=competition['name']), 202
+
+    return api
@@ -0,0 +1,234 @@
+import asyncio
+import io
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from server import app, events, repository
+
+# Threads running the (synchronous) Flask routes in each worker process
+THREADS = int(os.environ.get('GUDLFT_ASGI_THREADS', '32'))
+# Threads of each worker process kept for the live-update streams (/events),
+# which hold one each for as long as they are open
+STREAM_THREADS = int(os.environ.get('GUDLFT_ASGI_STREAM_THREADS', '256'))
+# Seconds between checks that the client is still there while a message waits
+# for the event loop
+SEND_POLL = 0.5
+
+
+class ClientGone(Exception):
+    """
+    The connection of the response being sent is closed (or its task
+    cancelled by the server).
+    """
+
+
+# Build a PEP 3333 environ from an ASGI HTTP scope and the request body
+def buildEnviron(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        environ[name] = environ[name] + ',' + value if name in environ else value
+    # The body is fully buffered, so its length is known even for chunked uploads
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class WsgiToAsgi:
+    """
+    ASGI application serving a WSGI app from a thread pool.
+    The event loop only moves bytes; routes, locks and disk writes run in the
+    pool, and the response is streamed back chunk by chunk. A response stops
+    once its client is gone. The on_drain callbacks (ending the event streams,
+    which never end by themselves) run as soon as the server is told to stop,
+    before it waits for the open connections. Requests to stream_paths run in
+    a pool of their own, so that long-lived streams never starve the routes.
+    Request bodies are read in full before the app runs, so those over
+    max_body bytes are refused with a 413 as soon as they are announced or
+    reach it.
+    """
+
+    def __init__(self, wsgi_app, threads=THREADS, on_shutdown=(), on_drain=(), stream_paths=(),
+                 stream_threads=STREAM_THREADS, max_body=None):
+        self.wsgi_app = wsgi_app
+        self.max_body = max_body
+        self.on_shutdown = list(on_shutdown)
+        self.on_drain = list(on_drain)
+        self.stream_paths = frozenset(stream_paths)
+        self._drained = False
+        self._signal_handlers = {}
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='gudlft-asgi')
+        self.stream_executor = ThreadPoolExecutor(max_workers=stream_threads,
+                                                  thread_name_prefix='gudlft-asgi-stream')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            length = dict(scope.get('headers', [])).get(b'content-length', b'')
+            if self.max_body is not None and length.isdigit() and int(length) > self.max_body:
+                await self.tooLarge(send)
+                return
+            chunks = []
+            size = 0
+            more = True
+            while more:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                chunks.append(message.get('body', b''))
+                size += len(chunks[-1])
+                if self.max_body is not None and size > self.max_body:
+                    await self.tooLarge(send)
+                    return
+                more = message.get('more_body', False)
+            body = b''.join(chunks)
+            loop = asyncio.get_running_loop()
+            disconnected = threading.Event()
+
+            async def watchDisconnect():
+                while (await receive())['type'] != 'http.disconnect':
+                    pass
+                disconnected.set()
+
+            watcher = asyncio.create_task(watchDisconnect())
+            executor = self.stream_executor if scope['path'] in self.stream_paths else self.executor
+            try:
+                await loop.run_in_executor(executor, self.run, buildEnviron(scope, body), send, loop,
+                                           disconnected)
+            finally:
+                # Also reached when the server cancels the request: the pool
+                # thread must stop sending to a loop that no longer listens
+                disconnected.set()
+                watcher.cancel()
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    # Refuse a request body over max_body
+    @staticmethod
+    async def tooLarge(send):
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'text/plain; charset=utf-8'), (b'connection', b'close')]})
+        await send({'type': 'http.response.body', 'body': b"Request body too large.\n", 'more_body': False})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.hookSignals()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.drain()
+                self.unhookSignals()
+                # Off the loop: pool threads still sending need it to run
+                for executor in (self.stream_executor, self.executor):
+                    await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+                for callback in self.on_shutdown:
+                    callback()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Run the on_drain callbacks (once)
+    def drain(self):
+        if self._drained:
+            return
+        self._drained = True
+        for callback in self.on_drain:
+            callback()
+
+    # Drain as soon as the server gets SIGINT/SIGTERM, then let its own
+    # handler start the graceful shutdown
+    def hookSignals(self):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(signum)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                self.drain()
+                previous(signum, frame)
+            try:
+                signal.signal(signum, handler)
+            except ValueError:
+                # Signals can only be handled from the main thread
+                return
+            self._signal_handlers[signum] = previous
+
+    def unhookSignals(self):
+        for signum, previous in self._signal_handlers.items():
+            signal.signal(signum, previous)
+        self._signal_handlers = {}
+
+    # Run the WSGI app in a pool thread, handing each message to the loop
+    def run(self, environ, send, loop, disconnected):
+        def sendSync(message):
+            if disconnected.is_set():
+                raise ClientGone()
+            future = asyncio.run_coroutine_threadsafe(send(message), loop)
+            while True:
+                try:
+                    return future.result(SEND_POLL)
+                except FutureTimeout:
+                    if disconnected.is_set():
+                        future.cancel()
+                        raise ClientGone()
+
+        response = {}
+
+        def startResponse(status, headers, exc_info=None):
+            if exc_info and response.get('started'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin1'), value.encode('latin1'))
+                                   for name, value in headers]
+            return write
+
+        def write(chunk):
+            if not response.get('started'):
+                response['started'] = True
+                sendSync({'type': 'http.response.start', 'status': response['status'],
+                          'headers': response['headers']})
+            if chunk:
+                sendSync({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        result = self.wsgi_app(environ, startResponse)
+        try:
+            for chunk in result:
+                write(chunk)
+            write(b'')
+            sendSync({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        except ClientGone:
+            pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+# Entry point for ASGI servers: uvicorn asgi:application
+application = WsgiToAsgi(app, on_shutdown=[repository.close], on_drain=[events.close], stream_paths=['/events'],
+                         max_body=app.config['MAX_CONTENT_LENGTH'])
+# Each open event stream holds a thread of the stream pool
+events.max_streams = min(events.max_streams, STREAM_THREADS)
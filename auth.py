@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from flask_login import UserMixin
+
+
+class ClubUser(UserMixin):
+    """
+    The logged-in club; its id in the session is the club name.
+    """
+
+    def __init__(self, club):
+        self.club = club
+
+    def get_id(self):
+        return self.club['name']
+
+
+class ClubLoader:
+    """
+    Flask-Login user loader keeping the users resolved for recent sessions.
+    A cached club is reused until the repository's clubs change (its
+    clubs_generation moves on), or until club_changes() names it: on a
+    shared backend bookings of other processes change the points of a club
+    without moving the generation.
+    """
+
+    def __init__(self, getRepository, max_users=10000):
+        self.getRepository = getRepository
+        self.max_users = max_users
+        self.lock = threading.Lock()
+        self._users = OrderedDict()
+        # Repository the cache was filled from, and its club_changes() cursor
+        self._source = None
+        self._cursor = None
+
+    def __call__(self, name):
+        data = self.getRepository()
+        generation = data.clubs_generation
+        self._forget_changed(data)
+        with self.lock:
+            cached = self._users.get(name)
+            if cached is not None and cached[0] == generation:
+                self._users.move_to_end(name)
+                return cached[1]
+        club = data.club_by_name(name)
+        if club is None:
+            with self.lock:
+                self._users.pop(name, None)
+            return None
+        return self._cache(ClubUser(club), generation)
+
+    # Drop the users whose club was booked or refunded since the last call
+    def _forget_changed(self, data):
+        with self.lock:
+            cursor = self._cursor if self._source is data else None
+        cursor, names = data.club_changes(cursor)
+        with self.lock:
+            if self._source is not data or names is None:
+                self._users.clear()
+            else:
+                for name in names:
+                    self._users.pop(name, None)
+            self._source, self._cursor = data, cursor
+
+    # User for a club that just logged in, cached for its next requests
+    def remember(self, club):
+        return self._cache(ClubUser(club), self.getRepository().clubs_generation)
+
+    def _cache(self, user, generation):
+        with self.lock:
+            self._users[user.get_id()] = (generation, user)
+            self._users.move_to_end(user.get_id())
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return user
@@ -0,0 +1,103 @@
+from reservations import ReservationError
+
+# Most places a club can hold on one competition, over all its bookings
+MAX_PLACES_PER_CLUB = 12
+
+
+# Parse a requested number of places; raises ReservationError unless it is
+# a positive integer, given as an int or a string of digits
+def checkQuantity(places, competition=None):
+    # JSON clients could send 2.7 or true, which int() would take for 2 and 1
+    if isinstance(places, bool) or not isinstance(places, (int, str)):
+        raise ReservationError("Invalid quantity.", competition)
+
+    # Handle non-numeric input for places
+    try:
+        placesRequired = int(places)
+    except (TypeError, ValueError):
+        raise ReservationError("Invalid quantity.", competition)
+
+    # Check if quantity is negative or zero
+    if placesRequired <= 0:
+        raise ReservationError("Invalid quantity.", competition)
+    return placesRequired
+
+
+# Apply the booking rules and return the number of places as an int;
+# raises ReservationError with the message to show otherwise
+def checkBooking(data, club, competition, places, now):
+    # Double check if competition is in the past during purchase
+    if data.is_past(competition, now):
+        raise ReservationError("This competition is over.")
+
+    placesRequired = checkQuantity(places)
+
+    # Check if the competition has enough places
+    if placesRequired > competition['numberOfPlaces']:
+        raise ReservationError("Not enough places")
+
+    # Limit the club to 12 places per competition, counting its earlier bookings
+    if placesRequired + data.booked_places(club, competition) > MAX_PLACES_PER_CLUB:
+        raise ReservationError(f"You cannot book more than {MAX_PLACES_PER_CLUB} places")
+
+    # Check if the club has enough points
+    if placesRequired > club['points']:
+        raise ReservationError("Not enough points")
+
+    return placesRequired
+
+
+# Validate then atomically reserve the places; returns the places booked
+def placeBooking(data, club, competition, places, now):
+    placesRequired = checkBooking(data, club, competition, places, now)
+    # Deduct places and points in one atomic step; the checks above are re-done
+    # inside it since a concurrent booking may have consumed them meanwhile
+    data.reserve(club, competition, placesRequired, cap=MAX_PLACES_PER_CLUB)
+    return placesRequired
+
+
+# Cancel places of a club's booking (all of them by default), giving back
+# the places and refunding the points; returns the places cancelled
+def placeCancellation(data, club, competition, places, now):
+    if data.is_past(competition, now):
+        raise ReservationError("This competition is over.")
+    held = data.booked_places(club, competition)
+    if not held:
+        raise ReservationError("You have no booking to cancel.")
+    placesCancelled = held if places in (None, '') else checkQuantity(places)
+    if placesCancelled > held:
+        raise ReservationError(f"You only booked {held} places")
+    # The booking is checked again under the store's lock or transaction
+    data.cancel(club, competition, placesCancelled)
+    return placesCancelled
+
+
+# Validate a batch of (competition, places) for one club against the same
+# rules, then reserve all of it atomically and persist it once; places for
+# the same competition are added up before the 12-place cap is applied.
+# Returns the list of (competition, places) booked.
+def placeBatchBooking(data, club, items, now):
+    if not items:
+        raise ReservationError("Invalid quantity.")
+    merged = {}
+    for competition, places in items:
+        placesRequired = checkQuantity(places, competition['name'])
+        entry = merged.setdefault(competition['name'], [competition, 0])
+        entry[1] += placesRequired
+
+    bookings = []
+    total = 0
+    for competition, placesRequired in merged.values():
+        try:
+            checkBooking(data, club, competition, placesRequired, now)
+        except ReservationError as error:
+            raise ReservationError(str(error), competition['name'])
+        bookings.append((competition, placesRequired))
+        total += placesRequired
+
+    # Each line may fit the balance on its own but not all of them together
+    if total > club['points']:
+        raise ReservationError("Not enough points")
+
+    data.reserve_many(club, bookings, cap=MAX_PLACES_PER_CLUB)
+    return bookings
@@ -0,0 +1,173 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from flask import Response, abort, request
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+# Media types worth compressing (images and fonts are compressed already)
+COMPRESSIBLE = frozenset(('text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+                          'application/json', 'image/svg+xml'))
+# Fingerprinted asset URLs never change content: let clients keep them a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Compression levels for bodies compressed once and reused ('best') and for
+# bodies compressed per response ('fast')
+LEVELS = {'br': {'best': 11, 'fast': 5}, 'gzip': {'best': 9, 'fast': 6}}
+
+
+# Pick the best encoding the client accepts, if any
+def negotiateEncoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding, level='best'):
+    if encoding == 'br':
+        return brotli.compress(body, quality=LEVELS['br'][level])
+    return gzip.compress(body, compresslevel=LEVELS['gzip'][level])
+
+
+class CompressedCache:
+    """
+    Compressed bodies keyed by content hash and encoding, least recently
+    used first. A page that renders to the same bytes again (the login page,
+    a points board page) is compressed only once, whatever the route.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    # Return the body compressed with encoding, from the cache when possible
+    def compressed(self, body, encoding, level='fast'):
+        key = (hashlib.sha256(body).digest(), encoding)
+        with self.lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+        data = compress(body, encoding, level)
+        with self.lock:
+            self._entries[key] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class StaticAssets:
+    """
+    Files of the static folder served from memory under a content fingerprint.
+    url_for('static', ...) adds ?v=<hash> to the URL, and a request carrying
+    the current hash is served as immutable for a year; other requests must
+    revalidate their ETag. Each file is compressed once per encoding, and
+    read again when its size or mtime changes.
+    """
+
+    def __init__(self, folder, cache):
+        self.folder = folder
+        self.cache = cache
+        self.lock = threading.Lock()
+        # filename -> (stamp, body, digest, mimetype)
+        self._assets = {}
+
+    def _asset(self, filename):
+        path = safe_join(self.folder, filename) if filename else None
+        if path is None or not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        asset = self._assets.get(filename)
+        if asset is None or asset[0] != stamp:
+            with open(path, 'rb') as f:
+                body = f.read()
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            asset = (stamp, body, hashlib.sha256(body).hexdigest()[:16], mimetype)
+            with self.lock:
+                self._assets[filename] = asset
+        return asset
+
+    # Content hash of a static file, None if there is no such file
+    def fingerprint(self, filename):
+        asset = self._asset(filename)
+        return asset[2] if asset else None
+
+    # View replacing Flask's static route
+    def serve(self, filename):
+        asset = self._asset(filename)
+        if asset is None:
+            abort(404)
+        _, body, digest, mimetype = asset
+        encoding = negotiateEncoding() if mimetype in COMPRESSIBLE and len(body) >= MIN_COMPRESS_SIZE else None
+        if encoding:
+            body = self.cache.compressed(body, encoding, 'best')
+        response = Response(body, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        # Each encoding is a different representation
+        response.set_etag(f"{digest}-{encoding}" if encoding else digest)
+        if request.args.get('v') == digest:
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+# Serve the static folder through StaticAssets, fingerprint its URLs and
+# compress the app's responses for the clients accepting it. Everything is
+# switched off by app.config['COMPRESSION'] = False (e.g. behind a proxy
+# that compresses), except the fingerprinted static files.
+def installCompression(app, cache):
+    assets = StaticAssets(app.static_folder, cache)
+    app.extensions['assets'] = assets
+    app.view_functions['static'] = assets.serve
+
+    @app.url_defaults
+    def fingerprintStatic(endpoint, values):
+        if endpoint == 'static' and 'v' not in values:
+            digest = assets.fingerprint(values.get('filename'))
+            if digest:
+                values['v'] = digest
+
+    @app.after_request
+    def compressResponse(response):
+        if not app.config.get('COMPRESSION', True):
+            return response
+        # Streamed pages go out as they render; the API and static files
+        # encode their bodies themselves
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiateEncoding()
+        body = response.get_data()
+        if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+            return response
+        response.set_data(cache.compressed(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        # Same content in another encoding: only a weak validator still holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return assets
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from schedule import DATE_FORMAT
+
+
+# Generate n clubs with unique names and emails and random point balances
+def generateClubs(n, seed=0, min_points=0, max_points=30):
+    rng = random.Random(seed)
+    return [
+        {'name': f"Club {i:07d}", 'email': f"secretary{i}@club{i}.example",
+         'points': str(rng.randint(min_points, max_points))}
+        for i in range(n)
+    ]
+
+
+# Generate n competitions spread around `now`; past_ratio of them are over
+def generateCompetitions(n, seed=0, now=None, past_ratio=0.2, min_places=0, max_places=40):
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    competitions = []
+    for i in range(n):
+        offset = timedelta(days=rng.randint(1, 365), minutes=rng.randint(0, 1439))
+        date = now - offset if rng.random() < past_ratio else now + offset
+        competitions.append({'name': f"Competition {i:07d}", 'date': date.strftime(DATE_FORMAT),
+                             'numberOfPlaces': str(rng.randint(min_places, max_places))})
+    return competitions
+
+
+# Write clubs.json / competitions.json for a generated data set
+def writeDataset(out_dir, nb_clubs, nb_competitions, seed=0, past_ratio=0.2,
+                 min_points=0, max_points=30, min_places=0, max_places=40):
+    os.makedirs(out_dir, exist_ok=True)
+    clubs = generateClubs(nb_clubs, seed, min_points, max_points)
+    competitions = generateCompetitions(nb_competitions, seed, past_ratio=past_ratio,
+                                        min_places=min_places, max_places=max_places)
+    with open(os.path.join(out_dir, 'clubs.json'), 'w') as c:
+        json.dump({'clubs': clubs}, c)
+    with open(os.path.join(out_dir, 'competitions.json'), 'w') as comps:
+        json.dump({'competitions': competitions}, comps)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate clubs.json / competitions.json fixtures.")
+    parser.add_argument('--out-dir', default='locust/data')
+    parser.add_argument('--clubs', type=int, default=1000)
+    parser.add_argument('--competitions', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--past-ratio', type=float, default=0.2,
+                        help="Share of competitions dated in the past.")
+    parser.add_argument('--min-points', type=int, default=0)
+    parser.add_argument('--max-points', type=int, default=30)
+    parser.add_argument('--min-places', type=int, default=0)
+    parser.add_argument('--max-places', type=int, default=40)
+    args = parser.parse_args(argv)
+    writeDataset(args.out_dir, args.clubs, args.competitions, args.seed, args.past_ratio,
+                 args.min_points, args.max_points, args.min_places, args.max_places)
+    print(f"Wrote {args.clubs} clubs and {args.competitions} competitions to {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
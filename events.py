@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+from collections import deque
+from itertools import islice
+from flask import Response, request
+
+# Events kept for the clients reconnecting with a Last-Event-ID
+REPLAY_SIZE = 1024
+# Seconds between keep-alive comments on an idle stream (they also reveal
+# clients that went away)
+HEARTBEAT = 15
+# Milliseconds a browser waits before reconnecting a dropped stream
+RETRY_MS = 3000
+# Seconds a client refused by a full broker waits before reconnecting
+FULL_RETRY_AFTER = 30
+
+
+def formatEvent(event_id, event, data):
+    payload = json.dumps(data, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+class EventBroker:
+    """
+    Live updates sent to the browsers as Server-Sent Events.
+    Events go to one shared ring of recent messages, each encoded once;
+    every open stream follows the ring at its own pace and sleeps on a
+    condition in between. Events carry absolute values (places left, points
+    left), so replaying one twice is harmless, and a client that missed
+    events it can no longer replay is told its figures are stale. Every
+    worker publishes the bookings of all workers, so a client coming back
+    with the id of another worker simply follows this one from now.
+    """
+
+    def __init__(self, max_streams=1000, replay_size=REPLAY_SIZE, heartbeat=HEARTBEAT):
+        self.max_streams = max_streams
+        self.heartbeat = heartbeat
+        self.lock = threading.Lock()
+        self._published = threading.Condition(self.lock)
+        # Event ids are '<epoch>-<seq>': ids of another process (or of before
+        # a restart) are recognised as such, and not resumed
+        self.epoch = os.urandom(4).hex()
+        self._seq = 0
+        # (seq, encoded message), oldest first
+        self._recent = deque(maxlen=replay_size)
+        self._streams = 0
+        self._closed = False
+
+    # Id of the last event published, for pages to resume from
+    @property
+    def last_id(self):
+        return f"{self.epoch}-{self._seq}"
+
+    @property
+    def streams(self):
+        return self._streams
+
+    def publish(self, event, data):
+        with self.lock:
+            self._seq += 1
+            self._recent.append((self._seq, formatEvent(f"{self.epoch}-{self._seq}", event, data)))
+            self._published.notify_all()
+
+    # Repository change listener: bookings (or cancellations) of any worker
+    # changed these competitions' places and clubs' points; None when every
+    # figure shown may have changed
+    def on_changes(self, clubs, competitions):
+        if clubs is None:
+            self.publish('stale', {})
+            return
+        for competition in competitions:
+            self.publish('places', {'competition': competition['name'], 'places': int(competition['numberOfPlaces'])})
+        for club in clubs:
+            self.publish('points', {'club': club['name'], 'points': int(club['points'])})
+
+    # (sequence number to resume after, whether events were missed): ids of
+    # another worker or process start from now, ids of this one resume if
+    # their events are still in the ring
+    def _resume(self, last_id):
+        epoch, _, seq = (last_id or '').partition('-')
+        if epoch != self.epoch:
+            return self._seq, False
+        if not seq.isdigit() or int(seq) > self._seq:
+            return self._seq, True
+        seq = int(seq)
+        if seq < self._seq and (not self._recent or seq + 1 < self._recent[0][0]):
+            return self._seq, True
+        return seq, False
+
+    # Open a stream resuming after last_id; returns an iterator of encoded
+    # chunks, or None when max_streams streams are open already
+    def open(self, last_id=None):
+        with self.lock:
+            if self._closed or self._streams >= self.max_streams:
+                return None
+            position, stale = self._resume(last_id)
+        return self._stream(position, stale)
+
+    # Counted from its first chunk: a stream never iterated (e.g. the answer to
+    # a HEAD request) never holds a slot
+    def _stream(self, position, stale):
+        with self.lock:
+            self._streams += 1
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            if stale:
+                yield formatEvent(f"{self.epoch}-{position}", 'stale', {})
+            while True:
+                with self.lock:
+                    if self._seq == position and not self._closed:
+                        self._published.wait(self.heartbeat)
+                    if self._closed:
+                        return
+                    if self._seq == position:
+                        messages = None
+                    elif position + 1 < self._recent[0][0]:
+                        # Too slow to keep up: skip to now and say so
+                        position = self._seq
+                        messages = [formatEvent(self.last_id, 'stale', {})]
+                    else:
+                        start = position + 1 - self._recent[0][0]
+                        messages = [message for _, message in islice(self._recent, start, None)]
+                        position = self._seq
+                yield b''.join(messages) if messages else b': keep-alive\n\n'
+        finally:
+            with self.lock:
+                self._streams -= 1
+
+    # End every open stream (e.g. on shutdown) and refuse new ones
+    def close(self):
+        with self.lock:
+            self._closed = True
+            self._published.notify_all()
+
+
+# Publish the changes of the repository (made by any worker) on the broker,
+# serve them at /events and give the templates the id of the last event
+# (last_event_id), so that the script of a personal page resumes from what
+# the page shows
+def installEvents(app, repository, broker):
+    app.extensions['events'] = broker
+    repository.subscribe_changes(broker.on_changes)
+
+    @app.context_processor
+    def lastEventId():
+        return {'last_event_id': broker.last_id}
+
+    @app.route('/events')
+    def liveEvents():
+        stream = broker.open(request.headers.get('Last-Event-ID') or request.args.get('after'))
+        if stream is None:
+            # Browsers give up on an error status, but reconnect after the
+            # retry delay when a stream ends: end this one at once
+            stream = [f"retry: {FULL_RETRY_AFTER * 1000}\n\n".encode()]
+        response = Response(stream, mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Proxies must pass the events on as they come
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    return broker
@@ -0,0 +1,60 @@
+import threading
+from flask import get_template_attribute, url_for
+from markupsafe import Markup
+
+# Markers left by the row macro where the club-specific Book Places link,
+# or the waitlist form of a sold-out competition, goes
+BOOK_LINK = '<!--book-->'
+WAITLIST_FORM = '<!--waitlist-->'
+
+
+class CompetitionRows:
+    """
+    Rendered competition rows of the dashboard, shared by every club.
+    A row is rendered once and kept until its competition's date or number
+    of places changes; only the Book Places link (or the waitlist form) is
+    built per club.
+    """
+
+    def __init__(self, template='competition-row.html'):
+        self.template = template
+        self.lock = threading.Lock()
+        self._rows = {}
+
+    def row(self, competition, club, past=False):
+        key = (competition['name'], past)
+        state = (competition['date'], competition['numberOfPlaces'])
+        cached = self._rows.get(key)
+        if cached is None or cached[0] != state:
+            html = str(get_template_attribute(self.template, 'row')(competition, past))
+            head, marker, tail = html.partition(BOOK_LINK)
+            if not marker:
+                head, marker, tail = html.partition(WAITLIST_FORM)
+            cached = (state, Markup(head), Markup(tail), marker)
+            with self.lock:
+                self._rows[key] = cached
+        _, head, tail, marker = cached
+        if not marker or not club:
+            return head + tail
+        if marker == BOOK_LINK:
+            link = Markup('<a href="%s">Book Places</a>') % url_for(
+                'book', competition=competition['name'], club=club['name'])
+        else:
+            link = Markup(
+                '<form action="%s" method="post" style="display: inline">'
+                '<input type="hidden" name="club" value="%s">'
+                '<input type="hidden" name="competition" value="%s">'
+                '<input type="number" name="places" min="1" max="12" value="1">'
+                '<button type="submit">Join waitlist</button></form>'
+            ) % (url_for('joinWaitlist'), club['name'], competition['name'])
+        return head + link + tail
+
+    # Drop a competition's rows once a booking changed its places
+    def invalidate(self, competition):
+        with self.lock:
+            self._rows.pop((competition['name'], False), None)
+            self._rows.pop((competition['name'], True), None)
+
+    def clear(self):
+        with self.lock:
+            self._rows = {}
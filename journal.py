@@ -0,0 +1,395 @@
+import json
+import logging
+import os
+import threading
+import time
+from operator import attrgetter
+
+logger = logging.getLogger(__name__)
+
+
+# Write a JSON document next to its target and atomically swap it in
+def writeAtomic(path, document):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(document, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Run call(*args) in the calling thread: the default runner of the blocking
+# file work, which a server on greenlets hands to native threads instead
+def runInline(call, args=()):
+    return call(*args)
+
+
+# Values of one field of every record: one C-level pass over slotted
+# records, a plain loop over dicts
+def column(records, field):
+    try:
+        return list(map(attrgetter(field), records))
+    except AttributeError:
+        return [record[field] for record in records]
+
+
+# (competition name, places) pairs of a journal entry; batch entries list
+# several competitions for one club
+def entryBookings(entry):
+    return entry.get('bookings') or [[entry['competition'], entry['places']]]
+
+
+# (mtime_ns, size) of a file, to tell whether it changed
+def fileStamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class BookingJournal:
+    """
+    Append-only write-ahead journal of bookings.
+    Each booking is a single JSON line tagged with a sequence number.
+    The clubs and competitions snapshots (and the bookings ledger snapshot,
+    with a ledger_path) record the last sequence they include, so replaying
+    the journal tail on startup never applies a booking twice, even if the
+    process died in the middle of a compaction. Cancellations are journaled
+    as bookings of negative places.
+
+    With a flush_interval, lines are queued and a background writer appends
+    them with one write and one fsync per interval (or per batch_size lines).
+    In durable mode wait(seq) returns once a booking is on disk; in fast mode
+    it returns at once and a crash can lose the last interval of bookings.
+    Without a flush_interval every line is fsync'd before append returns.
+
+    A failed write leaves no partial line behind. Queued lines it loses are
+    passed to on_lost(seq, club_name, bookings), to take back the bookings
+    already applied in memory, and their durable waiters get the error; the
+    writer carries on with the next lines.
+
+    A compaction is skipped while `changed` reports snapshot files edited
+    since they were read, so that it never overwrites an operator's edit.
+    """
+
+    def __init__(self, path, clubs_path, competitions_path, source, compact_every=1000, lock=None,
+                 flush_interval=0, batch_size=256, durable=True, ledger_path=None, changed=None,
+                 on_lost=None):
+        self.path = path
+        self.clubs_path = clubs_path
+        self.competitions_path = competitions_path
+        self.ledger_path = ledger_path
+        # Returns (clubs, competitions), plus the ledger with a ledger_path
+        self.source = source
+        # Returns the snapshot files changed since they were read (not by a compaction)
+        self.changed = changed
+        # Called as on_lost(seq, club_name, [(competition name, places), ...])
+        self.on_lost = on_lost
+        # Runs the fsyncs and snapshot writes as run_blocking(call, args)
+        self.run_blocking = runInline
+        self.compact_every = compact_every
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.durable = durable
+        # Shared with the reservation store so snapshots never see half a booking
+        self.lock = lock or threading.RLock()
+        self.seq = 0
+        self._fd = None
+        self._since_compaction = 0
+        self._compacting = False
+        # Serializes writes to the journal file with its compaction
+        self._io_lock = threading.Lock()
+        # Held for a whole compaction; a hot reload holds it so that the
+        # journal entries it still has to read are not compacted away
+        self.compaction_lock = threading.Lock()
+        # (mtime_ns, size) of the snapshot files written by the last compaction
+        self.written = {}
+        # Guards the queued lines and the writer state
+        self._queue = threading.Condition()
+        self._pending = []
+        self._flushed_seq = 0
+        self._writer = None
+        self._stopping = False
+        # Set by flush() to write the queued lines without waiting for the interval
+        self._urgent = False
+        # {seq: error} of the lost lines whose durable waiter has not seen it yet
+        self._lost = {}
+        # Sequence numbers of the lost lines being handed to on_lost
+        self._undoing = ()
+        # Number of failed writes, for a compaction to tell it raced with one
+        self._failures = 0
+
+    # Complete entries of the journal file, and the offset where they end
+    def _read(self):
+        entries = []
+        good_offset = 0
+        if not os.path.exists(self.path):
+            return entries, good_offset
+        with open(self.path, 'rb') as f:
+            for line in f:
+                # A torn tail line (from a crash, or being written) is left out
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                good_offset += len(line)
+                entries.append(entry)
+        return entries, good_offset
+
+    # Apply one entry to the parts of a registry whose snapshot predates it
+    @staticmethod
+    def _apply(registry, entry, clubs_seq, competitions_seq, ledger_seq):
+        club = registry.club_by_name(entry['club'])
+        for competition_name, places in entryBookings(entry):
+            competition = registry.competition_by_name(competition_name)
+            if club is not None and entry['seq'] > clubs_seq:
+                club['points'] -= places
+            if competition is not None and entry['seq'] > competitions_seq:
+                competition['numberOfPlaces'] -= places
+            if entry['seq'] > ledger_seq:
+                registry.ledger.record(entry['club'], competition_name, places)
+
+    # Apply the bookings written after the snapshots were taken
+    def replay(self, registry, clubs_seq=0, competitions_seq=0, ledger_seq=0):
+        self.seq = self._flushed_seq = max(clubs_seq, competitions_seq, ledger_seq)
+        if not os.path.exists(self.path):
+            return 0
+        entries, good_offset = self._read()
+        for entry in entries:
+            self.seq = max(self.seq, entry['seq'])
+            self._apply(registry, entry, clubs_seq, competitions_seq, ledger_seq)
+        # Cut off a torn tail line left by a crash
+        if os.path.getsize(self.path) > good_offset:
+            os.truncate(self.path, good_offset)
+        self._since_compaction = len(entries)
+        self._flushed_seq = self.seq
+        if entries:
+            registry.touch()
+        return len(entries)
+
+    # Apply the entries after sequence `after` to a registry read from the
+    # snapshots while the journal is live (hot reload), without touching the
+    # journal itself; returns the last sequence applied
+    def catch_up(self, registry, clubs_seq=0, competitions_seq=0, ledger_seq=0, after=0):
+        last = after
+        for entry in self._read()[0]:
+            if entry['seq'] > after:
+                self._apply(registry, entry, clubs_seq, competitions_seq, ledger_seq)
+                last = max(last, entry['seq'])
+        return last
+
+    # Block until every line appended so far is written (or lost), whatever
+    # the ack mode
+    def flush(self):
+        self._wait_flushed(self.seq)
+
+    def _wait_flushed(self, seq):
+        with self._queue:
+            if self._flushed_seq < seq:
+                self._urgent = True
+                self._queue.notify_all()
+                self._queue.wait_for(lambda: self._flushed_seq >= seq)
+
+    # Record one booking; callers hold self.lock around the change
+    def append(self, club_name, competition_name, places):
+        return self.append_many(club_name, [(competition_name, places)])
+
+    # Record several bookings of one club as a single line; returns its sequence
+    # number, to be passed to wait() once self.lock is released
+    def append_many(self, club_name, bookings):
+        with self.lock:
+            self.seq += 1
+            if len(bookings) == 1:
+                entry = {'seq': self.seq, 'club': club_name,
+                         'competition': bookings[0][0], 'places': bookings[0][1]}
+            else:
+                entry = {'seq': self.seq, 'club': club_name,
+                         'bookings': [[name, places] for name, places in bookings]}
+            line = (json.dumps(entry) + '\n').encode()
+            if self.flush_interval:
+                with self._queue:
+                    self._pending.append((self.seq, line))
+                    if self._writer is None:
+                        self._writer = threading.Thread(target=self._run, daemon=True)
+                        self._writer.start()
+                    # Wake an idle writer for the first line, a waiting one for a full batch
+                    if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                        self._queue.notify_all()
+            else:
+                try:
+                    self._write(line)
+                except OSError:
+                    self._failures += 1
+                    raise
+                finally:
+                    self._flushed_seq = self.seq
+            self._since_compaction += 1
+            if self._since_compaction >= self.compact_every and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self.compact, daemon=True).start()
+            return self.seq
+
+    # Block until the line with this sequence number is on disk (durable mode);
+    # raises the write error if it was lost
+    def wait(self, seq):
+        if not self.durable:
+            return
+        with self._queue:
+            self._queue.wait_for(lambda: self._flushed_seq >= seq and seq not in self._undoing)
+            error = self._lost.pop(seq, None)
+        if error is not None:
+            raise error
+
+    # Background writer: one write and fsync per interval or full batch
+    def _run(self):
+        while True:
+            with self._queue:
+                self._queue.wait_for(lambda: self._pending or self._stopping)
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.batch_size and not self._stopping and not self._urgent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._queue.wait(remaining)
+                batch, self._pending = self._pending, []
+                self._urgent = False
+                stopping = self._stopping
+            if batch:
+                self._flush(batch)
+            if stopping and not batch:
+                return
+
+    # Write queued (seq, line) pairs, queued in sequence order under self.lock
+    def _flush(self, batch):
+        try:
+            self._write(b''.join(line for _, line in batch))
+        except OSError as error:
+            self._lose(batch, error)
+            return
+        with self._queue:
+            self._flushed_seq = batch[-1][0]
+            self._queue.notify_all()
+
+    # Hand the lines of a failed batch to on_lost, then fail their durable
+    # waiters. flush() returns at once: a reload waiting for it under the
+    # booking lock must not wait for on_lost, which takes that lock.
+    def _lose(self, batch, error):
+        logger.error("Journaling %d booking(s) failed: %s", len(batch), error)
+        with self._queue:
+            self._failures += 1
+            self._flushed_seq = batch[-1][0]
+            self._undoing = {seq for seq, _ in batch}
+            if self.durable:
+                self._lost.update((seq, error) for seq, _ in batch)
+            self._queue.notify_all()
+        try:
+            if self.on_lost is not None:
+                for seq, line in batch:
+                    entry = json.loads(line)
+                    self.on_lost(seq, entry['club'], entryBookings(entry))
+        finally:
+            with self._queue:
+                self._undoing = ()
+                self._queue.notify_all()
+
+    # Append data to the journal and fsync it; a failed write is cut off
+    # again, so that no partial line is left for the next one to follow
+    def _write(self, data):
+        with self._io_lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            start = os.lseek(self._fd, 0, os.SEEK_END)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self._fd, view):]
+                self.run_blocking(os.fsync, (self._fd,))
+            except OSError:
+                try:
+                    os.ftruncate(self._fd, start)
+                except OSError:
+                    pass
+                raise
+
+    # Write fresh snapshots and drop the journal entries they cover; returns
+    # False if it was skipped
+    def compact(self):
+        try:
+            with self.compaction_lock:
+                return self._compact()
+        finally:
+            self._compacting = False
+
+    def _compact(self):
+        # Bookings only change points, places and the ledger: only those are
+        # read under the booking lock, the records are copied after it
+        with self.lock:
+            clubs, competitions, *ledger = self.source()
+            seq = self.seq
+            failures = self._failures
+            clubs, competitions = list(clubs), list(competitions)
+            points = column(clubs, 'points')
+            places = column(competitions, 'numberOfPlaces')
+            ledger_copy = ledger[0].snapshot() if self.ledger_path and ledger else None
+            self._since_compaction = 0
+        # The figures include bookings still queued: if writing them fails
+        # they are taken back, and must not reach the snapshots
+        self._wait_flushed(seq)
+        if self._failures != failures:
+            logger.warning("Skipping the journal compaction: a journal write failed")
+            return False
+        # An edit not reloaded yet would be overwritten, and hidden from the
+        # watcher: leave the files alone until it is reloaded (the journal
+        # keeps every booking meanwhile) and retry after compact_every more
+        changed = self.changed() if self.changed else None
+        if changed:
+            logger.warning("Skipping the journal compaction: %s changed since read", ", ".join(sorted(changed)))
+            return False
+        clubs_copy = [dict(club, points=value) for club, value in zip(clubs, points)]
+        competitions_copy = [dict(competition, numberOfPlaces=value)
+                             for competition, value in zip(competitions, places)]
+        self.run_blocking(writeAtomic, (self.clubs_path, {'clubs': clubs_copy, 'journalSeq': seq}))
+        self.run_blocking(writeAtomic, (self.competitions_path,
+                                        {'competitions': competitions_copy, 'journalSeq': seq}))
+        if ledger_copy is not None:
+            self.run_blocking(writeAtomic, (self.ledger_path, dict(ledger_copy.to_json(), journalSeq=seq)))
+        self.written = {path: fileStamp(path) for path in (self.clubs_path, self.competitions_path)}
+        with self._io_lock:
+            self.run_blocking(self._truncate_through, (seq,))
+        return True
+
+    def _truncate_through(self, seq):
+        kept = []
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                kept = [line for line in f if json.loads(line)['seq'] > seq]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.writelines(kept)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._close_fd()
+
+    def _close_fd(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # Flush the queued lines, stop the writer and close the file
+    def close(self):
+        with self._queue:
+            self._stopping = True
+            self._queue.notify_all()
+            writer = self._writer
+        if writer is not None:
+            writer.join()
+        with self._queue:
+            # Lines queued while the writer was stopping
+            batch, self._pending = self._pending, []
+            self._writer = None
+            self._stopping = False
+        if batch:
+            self._flush(batch)
+        with self._io_lock:
+            self._close_fd()
@@ -0,0 +1,82 @@
+class BookingLedger:
+    """
+    Places held by each club on each competition, indexed by club and by
+    competition, plus each club's history of bookings (positive places) and
+    cancellations (negative places) in order.
+    Every operation is a few dict accesses, whatever the number of bookings.
+    """
+
+    def __init__(self):
+        # club name -> {competition name: places held}
+        self._by_club = {}
+        # competition name -> {club name: places held}
+        self._by_competition = {}
+        # club name -> [(competition name, places), ...]
+        self._history = {}
+
+    # Places a club currently holds on a competition
+    def booked(self, club_name, competition_name):
+        return self._by_club.get(club_name, {}).get(competition_name, 0)
+
+    # {competition name: places} held by a club
+    def club_bookings(self, club_name):
+        return dict(self._by_club.get(club_name, {}))
+
+    # {club name: places} held on a competition
+    def competition_bookings(self, competition_name):
+        return dict(self._by_competition.get(competition_name, {}))
+
+    def history(self, club_name):
+        return list(self._history.get(club_name, ()))
+
+    # Record a booking, or a cancellation with negative places
+    def record(self, club_name, competition_name, places):
+        self._hold(club_name, competition_name, self.booked(club_name, competition_name) + places)
+        self._history.setdefault(club_name, []).append((competition_name, places))
+
+    # Take back a record() whose booking was never saved: the holding and
+    # the club's last matching history line
+    def undo(self, club_name, competition_name, places):
+        self._hold(club_name, competition_name, self.booked(club_name, competition_name) - places)
+        lines = self._history.get(club_name, [])
+        for index in range(len(lines) - 1, -1, -1):
+            if lines[index] == (competition_name, places):
+                del lines[index]
+                break
+        if not lines:
+            self._history.pop(club_name, None)
+
+    def _hold(self, club_name, competition_name, held):
+        if held:
+            self._by_club.setdefault(club_name, {})[competition_name] = held
+            self._by_competition.setdefault(competition_name, {})[club_name] = held
+        else:
+            self._discard(self._by_club, club_name, competition_name)
+            self._discard(self._by_competition, competition_name, club_name)
+
+    @staticmethod
+    def _discard(index, key, inner_key):
+        inner = index.get(key)
+        if inner is not None:
+            inner.pop(inner_key, None)
+            if not inner:
+                del index[key]
+
+    # Copy of the histories only, cheap enough to take under the booking lock
+    # (the lines are tuples, only their lists are copied), for to_json()
+    def snapshot(self):
+        copy = BookingLedger()
+        copy._history = {club_name: list(lines) for club_name, lines in self._history.items()}
+        return copy
+
+    # Serializable form: the histories, from which the holdings are rebuilt
+    def to_json(self):
+        return {'history': {club_name: [list(line) for line in lines]
+                            for club_name, lines in self._history.items()}}
+
+    # Replace the content with a to_json() document
+    def restore(self, document):
+        self.__init__()
+        for club_name, lines in document.get('history', {}).items():
+            for competition_name, places in lines:
+                self.record(club_name, competition_name, places)
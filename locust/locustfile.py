@@ -1,9 +1,49 @@
 # locust/locustfile.py
-from locust import HttpUser, task, between
+import json
+import os
+import random
+from datetime import datetime
+from locust import HttpUser, task, between, events
+
+# Data set shared with the server under test (see datagen.py)
+DATA_DIR = os.environ.get('LOCUST_DATA_DIR', os.path.join(os.path.dirname(__file__), '..'))
+# Number of "hot" competitions and the share of bookings that target them
+HOT_COMPETITIONS = int(os.environ.get('LOCUST_HOT_COMPETITIONS', '5'))
+HOT_SHARE = float(os.environ.get('LOCUST_HOT_SHARE', '0.8'))
+# Zipf-like exponent for club activity: 0 is uniform, higher favours a few clubs
+CLUB_SKEW = float(os.environ.get('LOCUST_CLUB_SKEW', '1.0'))
+SUMMARY_FILE = os.environ.get('LOCUST_SUMMARY_FILE', 'locust_summary.json')
+
+# Flash messages telling why a booking was refused
+CONFLICTS = ("Not enough places", "Not enough points", "You cannot book more than 12 places",
+             "This competition is over.")
+
+
+def loadData():
+    with open(os.path.join(DATA_DIR, 'clubs.json')) as c:
+        clubs = json.load(c)['clubs']
+    with open(os.path.join(DATA_DIR, 'competitions.json')) as comps:
+        competitions = json.load(comps)['competitions']
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    upcoming = [comp for comp in competitions if comp['date'] >= now] or competitions
+    return clubs, upcoming
+
+
+CLUBS, UPCOMING = loadData()
+CLUB_WEIGHTS = [1 / (rank + 1) ** CLUB_SKEW for rank in range(len(CLUBS))]
+HOT = UPCOMING[:HOT_COMPETITIONS]
+# Booking outcomes per route: {'route': {'booked': n, 'conflict': n, 'shed': n}}
+OUTCOMES = {}
+
+
+def recordOutcome(route, outcome):
+    OUTCOMES.setdefault(route, {'booked': 0, 'conflict': 0, 'shed': 0})[outcome] += 1
+
 
 class GUDLFTTestUser(HttpUser):
     """
     Simulates a user navigating and booking on the GUDLFT application.
+    Clubs and competitions are drawn from the data set with a configurable skew.
     """
     # Setting the base host URL
     host = "http://127.0.0.1:5000"
@@ -13,11 +53,19 @@ class GUDLFTTestUser(HttpUser):
 
     def on_start(self):
         """
-        Action: Initializes valid data based on your specific JSON files.
+        Action: Picks the club this user acts for, favouring the most active clubs.
         """
-        self.club_email = "admin@irontemple.com"
-        self.club_name = "Iron Temple"
-        self.competition_name = "Fall Classic"
+        club = random.choices(CLUBS, weights=CLUB_WEIGHTS)[0]
+        self.club_email = club['email']
+        self.club_name = club['name']
+
+    def pick_competition(self):
+        """
+        Action: Picks a hot competition with probability HOT_SHARE, else any upcoming one.
+        """
+        if HOT and random.random() < HOT_SHARE:
+            return random.choice(HOT)['name']
+        return random.choice(UPCOMING)['name']
 
     @task(3)
     def view_index(self):
@@ -47,17 +95,32 @@ class GUDLFTTestUser(HttpUser):
         """
         User Stories: 3, 4, 5 - Booking Cycle
         Action: Sequential flow from booking page to purchase.
+        Refused bookings are counted as conflicts, and bookings shed with a
+        429 as shed, not as failures.
         """
+        competition_name = self.pick_competition()
+
         # Step 1: Access the booking page
-        book_url = f"/book/{self.competition_name}/{self.club_name}"
-        self.client.get(book_url)
+        book_url = f"/book/{competition_name}/{self.club_name}"
+        self.client.get(book_url, name="/book/[competition]/[club]")
 
         # Step 2: Submit a purchase
-        self.client.post("/purchasePlaces", data={
+        with self.client.post("/purchasePlaces", data={
             "club": self.club_name,
-            "competition": self.competition_name,
-            "places": 1
-        })
+            "competition": competition_name,
+            "places": random.randint(1, 3)
+        }, catch_response=True) as response:
+            if b"Great-booking complete!" in response.content:
+                recordOutcome("/purchasePlaces", 'booked')
+                response.success()
+            elif response.status_code == 429:
+                recordOutcome("/purchasePlaces", 'shed')
+                response.success()
+            elif any(message.encode() in response.content for message in CONFLICTS):
+                recordOutcome("/purchasePlaces", 'conflict')
+                response.success()
+            else:
+                response.failure("Unexpected booking response")
 
     @task(1)
     def logout(self):
@@ -65,4 +128,29 @@ class GUDLFTTestUser(HttpUser):
         User Story: 6 Session Closure
         Action: GET /logout
         """
-        self.client.get("/logout")
\ No newline at end of file
+        self.client.get("/logout")
+
+
+@events.test_stop.add_listener
+def write_summary(environment, **kwargs):
+    """
+    Action: Writes throughput, p95/p99 latency and booking-conflict and shed rates per route.
+    """
+    summary = {}
+    for entry in environment.stats.entries.values():
+        route = summary[f"{entry.method} {entry.name}"] = {
+            'requests': entry.num_requests,
+            'failures': entry.num_failures,
+            'rps': entry.total_rps,
+            'p95_ms': entry.get_response_time_percentile(0.95),
+            'p99_ms': entry.get_response_time_percentile(0.99),
+        }
+        outcomes = OUTCOMES.get(entry.name)
+        if entry.method == 'POST' and outcomes:
+            attempts = outcomes['booked'] + outcomes['conflict'] + outcomes['shed']
+            # Conflicts are counted among the bookings the server processed
+            processed = outcomes['booked'] + outcomes['conflict']
+            route.update(outcomes, conflict_rate=outcomes['conflict'] / processed if processed else 0.0,
+                         shed_rate=outcomes['shed'] / attempts)
+    with open(SUMMARY_FILE, 'w') as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
@@ -0,0 +1,25 @@
+#!/bin/bash
+
+# Usage: locust/run_profile.sh <profile> [clubs] [competitions]
+# Generates a data set, serves it and runs the headless Locust profile against it
+PROFILE=${1:-smoke}
+CLUBS=${2:-1000}
+COMPETITIONS=${3:-100}
+DATA_DIR=locust/data/$PROFILE
+
+# Generate the data set the server and the simulated users share
+python datagen.py --out-dir "$DATA_DIR" --clubs "$CLUBS" --competitions "$COMPETITIONS" \
+    --min-places 10 --max-places 40 || exit 1
+rm -f "$DATA_DIR/bookings.journal" "$DATA_DIR/bookings.ledger.json"
+
+# Launch the Flask application on the generated data. Every simulated user
+# comes from 127.0.0.1, so the per-client rate limits are turned off
+GUDLFT_DATA_DIR=$DATA_DIR GUDLFT_RATE_LIMITING=0 FLASK_APP=server.py flask run --port 5000 &
+SERVER_PID=$!
+trap 'kill $SERVER_PID' EXIT
+sleep 2
+
+# Run the profile; per-route summary goes to locust/results/<profile>_summary.json
+mkdir -p locust/results
+LOCUST_DATA_DIR=$DATA_DIR LOCUST_SUMMARY_FILE=locust/results/${PROFILE}_summary.json \
+    locust --config "locust/profiles/$PROFILE.conf"
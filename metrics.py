@@ -0,0 +1,159 @@
+import cProfile
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import Response, abort, current_app, g, request
+from flask.signals import before_render_template, template_rendered
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram; observing is a bisect and two additions.
+    """
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def formatLabels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+
+class Metrics:
+    """
+    In-process histograms and counters exposed in the Prometheus text format.
+    Series are keyed by metric name and sorted label pairs.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def render(self):
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f'# TYPE {name} counter')
+                lines.append(f'{name}{formatLabels(labels)} {value}')
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f'# TYPE {name} histogram')
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{formatLabels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{formatLabels(labels)} {histogram.sum}')
+                lines.append(f'{name}_count{formatLabels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def enabled():
+    return current_app.config.get('METRICS', False)
+
+
+# Time a phase of the current request (lookup, validation, persistence...)
+@contextmanager
+def phase(name):
+    if not enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current_app.extensions['metrics'].observe(
+            'gudlft_phase_seconds', time.perf_counter() - start,
+            route=request.endpoint or 'unknown', phase=name)
+
+
+# Install the request/render hooks and the /metrics endpoint on the app.
+# Everything is opt-in through app.config['METRICS']; requests slower than
+# app.config['PROFILE_THRESHOLD_MS'] (if set) get a cProfile dump written to
+# app.config['PROFILE_DIR'].
+def instrument(app, metrics):
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def startTimer():
+        if not enabled():
+            return
+        g.metricsStart = time.perf_counter()
+        if app.config.get('PROFILE_THRESHOLD_MS'):
+            g.profiler = cProfile.Profile()
+            try:
+                g.profiler.enable()
+            except ValueError:
+                # Another profiler is already active on this thread
+                g.profiler = None
+
+    @app.teardown_request
+    def stopTimer(exc):
+        start = g.pop('metricsStart', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        route = request.endpoint or 'unknown'
+        metrics.observe('gudlft_request_seconds', elapsed, route=route, method=request.method)
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            if elapsed * 1000 >= app.config['PROFILE_THRESHOLD_MS']:
+                directory = app.config.get('PROFILE_DIR', 'profiles')
+                os.makedirs(directory, exist_ok=True)
+                profiler.dump_stats(os.path.join(directory, f"{time.time():.6f}-{route}.prof"))
+                metrics.inc('gudlft_profiles_written_total', route=route)
+
+    def startRender(sender, template, context, **extra):
+        if enabled():
+            g.renderStart = time.perf_counter()
+
+    def stopRender(sender, template, context, **extra):
+        start = g.pop('renderStart', None)
+        if start is not None:
+            metrics.observe('gudlft_phase_seconds', time.perf_counter() - start,
+                            route=request.endpoint or 'unknown', phase='render')
+
+    before_render_template.connect(startRender, app, weak=False)
+    template_rendered.connect(stopRender, app, weak=False)
+
+    # Prometheus scrape endpoint (404 while metrics are disabled)
+    @app.route('/metrics')
+    def metricsEndpoint():
+        if not enabled():
+            abort(404)
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+ORDERS = ('name', 'points')
+# Rendered pages kept, the least recently served dropped first
+PAGE_CACHE_SIZE = 256
+
+
+class PointsBoard:
+    """
+    Sorted view of the clubs for the public points board.
+    Clubs are kept ordered by name and by points (highest first); a booking
+    only moves the club that changed instead of re-sorting everything.
+    Rendered pages are cached per view (order, page, size) with an ETag and
+    a Last-Modified date, up to max_pages of them, and dropped as soon as a
+    club moves.
+    """
+
+    def __init__(self, max_pages=PAGE_CACHE_SIZE):
+        self.max_pages = max_pages
+        self.lock = threading.RLock()
+        self.generation = None
+        # Position in the repository's club changes (see Repository.club_changes)
+        self.cursor = None
+        self.last_modified = datetime.now(timezone.utc)
+        self._by_name = []
+        self._by_points = []
+        self._points = {}
+        self._clubs = {}
+        self._pages = OrderedDict()
+
+    # Rebuild from load_clubs() only when the set of clubs changed
+    def sync(self, load_clubs, generation, force=False):
+        with self.lock:
+            if generation == self.generation and not force:
+                return
+            self._clubs = {}
+            self._points = {}
+            for club in load_clubs():
+                if club['name'] not in self._clubs:
+                    self._clubs[club['name']] = club
+                    self._points[club['name']] = int(club['points'])
+            self._by_name = sorted(self._clubs)
+            self._by_points = sorted((-points, name) for name, points in self._points.items())
+            self.generation = generation
+            self._changed()
+
+    # Catch up with a repository: rebuild when its set of clubs changed, else
+    # only move the clubs other processes booked for (this process's bookings
+    # arrive through update() already)
+    def refresh(self, data):
+        with self.lock:
+            cursor, names = data.club_changes(self.cursor)
+            generation = data.clubs_generation
+            if names is None or generation != self.generation:
+                self.sync(data.list_clubs, generation, force=True)
+            else:
+                for name in names:
+                    club = data.club_by_name(name)
+                    if club is not None:
+                        self.update(club)
+            self.cursor = cursor
+
+    # Move a single club after its points changed
+    def update(self, club):
+        with self.lock:
+            name = club['name']
+            if name not in self._points:
+                return
+            points = int(club['points'])
+            old_key = (-self._points[name], name)
+            del self._by_points[bisect_left(self._by_points, old_key)]
+            insort(self._by_points, (-points, name))
+            self._points[name] = points
+            self._clubs[name] = club
+            self._changed()
+
+    def _changed(self):
+        self._pages = OrderedDict()
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    # Clubs in the given order, optionally only the [start:stop] slice
+    def clubs(self, order='name', start=0, stop=None):
+        with self.lock:
+            if order == 'points':
+                return [self._clubs[name] for _, name in self._by_points[start:stop]]
+            return [self._clubs[name] for name in self._by_name[start:stop]]
+
+    def __len__(self):
+        return len(self._by_name)
+
+    # Return (html, etag, last_modified) for a view key, calling render() only
+    # if it is not cached
+    def page(self, key, render):
+        with self.lock:
+            cached = self._pages.get(key)
+            if cached is None:
+                html = render()
+                etag = hashlib.md5(html.encode()).hexdigest()
+                cached = self._pages[key] = (html, etag, self.last_modified)
+                if len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+            else:
+                self._pages.move_to_end(key)
+            return cached
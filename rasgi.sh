@@ -0,0 +1,35 @@
+#!/bin/bash
+
+# Check if virtual environment directory exists
+if [ -d "venv" ]; then
+    # Activate the virtual environment
+    source venv/bin/activate
+else
+    echo "Error: venv directory not found."
+    exit 1
+fi
+
+# Number of worker processes, address, and threads per worker for the routes
+WORKERS=${GUDLFT_WORKERS:-4}
+HOST=${GUDLFT_HOST:-127.0.0.1}
+PORT=${GUDLFT_PORT:-5000}
+export GUDLFT_ASGI_THREADS=${GUDLFT_ASGI_THREADS:-32}
+# Threads per worker for the open live-update streams (one each)
+export GUDLFT_ASGI_STREAM_THREADS=${GUDLFT_ASGI_STREAM_THREADS:-256}
+# Sessions must be shared by the worker processes
+if [ "$WORKERS" -gt 1 ]; then
+    export GUDLFT_SESSION_STORE=${GUDLFT_SESSION_STORE:-file}
+fi
+# Load the data files at startup rather than on the first request
+export GUDLFT_PRELOAD=${GUDLFT_PRELOAD:-1}
+
+# Workers do not share memory: several of them need the SQLite or Redis backend
+if [ "$WORKERS" -gt 1 ] && [ "${GUDLFT_STORAGE_BACKEND:-json}" = "json" ]; then
+    echo "Error: $WORKERS workers need GUDLFT_STORAGE_BACKEND=sqlite or redis (or set GUDLFT_WORKERS=1)."
+    exit 1
+fi
+
+# Launch the ASGI application
+# Open event streams never end by themselves: stop waiting for them after 5s
+exec uvicorn asgi:application --host "$HOST" --port "$PORT" --workers "$WORKERS" --lifespan on \
+    --timeout-graceful-shutdown 5
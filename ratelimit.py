@@ -0,0 +1,155 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, g, request
+from metrics import enabled
+
+# Limits applied when none are configured, per endpoint: token buckets per
+# client IP and per logged-in club as [refill rate per second, burst], and
+# the most requests in flight at once, counted together for the endpoints
+# naming the same gate (the endpoint itself by default)
+DEFAULT_LIMITS = {
+    'purchasePlaces': {'ip': [10, 20], 'club': [5, 10], 'concurrency': 64, 'gate': 'bookings'},
+    'api.createBooking': {'ip': [10, 20], 'club': [5, 10], 'concurrency': 64, 'gate': 'bookings'},
+    'api.createBatchBooking': {'ip': [10, 20], 'club': [5, 10], 'concurrency': 64, 'gate': 'bookings'},
+    'showSummary': {'ip': [5, 10]},
+}
+# Buckets kept per limiter; the least recently seen keys are dropped first
+MAX_KEYS = 10000
+# Seconds a client shed by a full concurrency gate is asked to wait
+GATE_RETRY_AFTER = 1
+
+
+class RateLimiter:
+    """
+    Token buckets per key (client IP, club): a key may spend burst requests
+    at once, and gets rate requests per second back. Refusals tell how long
+    until the next token, for the Retry-After header.
+    """
+
+    def __init__(self, rate, burst, max_keys=MAX_KEYS, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self.lock = threading.Lock()
+        # key -> [tokens, time of last refill], least recently seen first
+        self._buckets = OrderedDict()
+
+    # Spend a token of key; returns 0 if admitted, else the seconds to wait
+    def acquire(self, key):
+        now = self.clock()
+        with self.lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / self.rate
+
+
+class ConcurrencyGate:
+    """
+    Bounded number of requests in flight; a request finding it full is shed
+    at once instead of queueing behind the others.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def enter(self):
+        return self._slots.acquire(blocking=False)
+
+    def leave(self):
+        self._slots.release()
+
+
+class AdmissionControl:
+    """
+    Rate limiters and concurrency gates of the limited endpoints, built from
+    a {endpoint: {'ip': [rate, burst], 'club': [rate, burst], 'concurrency': n,
+    'gate': name}} mapping where every entry is optional. Endpoints naming the
+    same gate share it, sized by the first of them.
+    """
+
+    def __init__(self, limits=None):
+        self.configure(DEFAULT_LIMITS if limits is None else limits)
+
+    # Replace the limits (and forget every bucket)
+    def configure(self, limits):
+        self.rules = {}
+        gates = {}
+        for endpoint, rule in limits.items():
+            gate = None
+            if rule.get('concurrency'):
+                name = rule.get('gate', endpoint)
+                if name not in gates:
+                    gates[name] = ConcurrencyGate(rule['concurrency'])
+                gate = gates[name]
+            self.rules[endpoint] = (
+                RateLimiter(*rule['ip']) if rule.get('ip') else None,
+                RateLimiter(*rule['club']) if rule.get('club') else None,
+                gate,
+            )
+
+    # Admit a request to endpoint; returns (gate entered or None, None) when
+    # admitted, else (None, (reason, seconds to wait)). The caller leaves the
+    # gate once the request is done.
+    def admit(self, endpoint, ip, club):
+        rule = self.rules.get(endpoint)
+        if rule is None:
+            return None, None
+        ip_limiter, club_limiter, gate = rule
+        if ip_limiter is not None:
+            wait = ip_limiter.acquire(ip)
+            if wait:
+                return None, ('ip', wait)
+        if club_limiter is not None and club:
+            wait = club_limiter.acquire(club)
+            if wait:
+                return None, ('club', wait)
+        if gate is not None and not gate.enter():
+            return None, ('concurrency', GATE_RETRY_AFTER)
+        return gate, None
+
+
+# Check the limited endpoints before they run and shed refused requests with
+# a 429 and Retry-After; clubKey() names the logged-in club of a request
+# (None for anonymous clients, only limited per IP).
+# Refusals are counted in metrics by route and reason. Switched off by
+# app.config['RATE_LIMITING'] = False.
+def installAdmission(app, metrics, clubKey, limits=None):
+    admission = AdmissionControl(limits)
+    app.extensions['admission'] = admission
+
+    @app.before_request
+    def admitRequest():
+        if not app.config.get('RATE_LIMITING', True) or request.endpoint not in admission.rules:
+            return None
+        gate, refused = admission.admit(request.endpoint, request.remote_addr, clubKey())
+        if refused is None:
+            g.admissionGate = gate
+            return None
+        reason, wait = refused
+        if enabled():
+            metrics.inc('gudlft_rejected_requests_total', route=request.endpoint, reason=reason)
+        response = Response("Too many requests, please try again shortly.\n", status=429, mimetype='text/plain')
+        response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response
+
+    @app.teardown_request
+    def leaveGate(exc):
+        gate = g.pop('admissionGate', None)
+        if gate is not None:
+            gate.leave()
+
+    return admission
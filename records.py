@@ -0,0 +1,107 @@
+from operator import itemgetter
+
+
+class Record:
+    """
+    Fixed-field record stored in __slots__ instead of a per-record dict.
+    Fields can also be read and written with record['field'], so templates,
+    JSON persistence and code written for plain dicts work unchanged.
+    Numeric fields are converted to int once, when the record is built.
+    Fields of the data files unknown to the class are kept aside and
+    written back with the record, so that saving never drops them.
+    """
+
+    # Extra fields as a dict, unset for the usual records
+    __slots__ = ('_extra',)
+    # Fields stored as int
+    NUMERIC = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Reads every field of a dict in one C-level call
+        cls._read_fields = itemgetter(*cls.__slots__)
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls(*cls._read_fields(data))
+        if len(data) > len(cls.__slots__):
+            record._extra = {field: value for field, value in data.items() if field not in cls.__slots__}
+        return record
+
+    @property
+    def extra(self):
+        return getattr(self, '_extra', None) or {}
+
+    def __getitem__(self, field):
+        if field in self.__slots__:
+            return getattr(self, field)
+        return self.extra[field]
+
+    def __setitem__(self, field, value):
+        if field in self.__slots__:
+            setattr(self, field, value)
+        elif field in self.extra:
+            self._extra[field] = value
+        else:
+            raise KeyError(field)
+
+    def __contains__(self, field):
+        return field in self.__slots__ or field in self.extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.__slots__) + len(self.extra)
+
+    def get(self, field, default=None):
+        if field in self.__slots__:
+            return getattr(self, field)
+        return self.extra.get(field, default)
+
+    def keys(self):
+        extra = self.extra
+        return self.__slots__ + tuple(extra) if extra else self.__slots__
+
+    def to_dict(self):
+        return {field: self[field] for field in self.keys()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Club(Record):
+    """
+    A club: name, secretary email and points balance.
+    """
+
+    __slots__ = ('name', 'email', 'points')
+    NUMERIC = ('points',)
+
+    def __init__(self, name, email, points):
+        self.name = name
+        self.email = email
+        self.points = int(points)
+
+
+class Competition(Record):
+    """
+    A competition: name, date ("%Y-%m-%d %H:%M:%S") and places left.
+    """
+
+    __slots__ = ('name', 'date', 'numberOfPlaces')
+    NUMERIC = ('numberOfPlaces',)
+
+    def __init__(self, name, date, numberOfPlaces):
+        self.name = name
+        self.date = date
+        self.numberOfPlaces = int(numberOfPlaces)
+
+
+# Convert the numeric fields of plain dict records to int, in place;
+# records built from the classes above already hold ints
+def normalizeRecords(records, record_class):
+    for record in records:
+        if isinstance(record, dict):
+            for field in record_class.NUMERIC:
+                record[field] = int(record[field])
@@ -0,0 +1,100 @@
+from ledger import BookingLedger
+from records import Club, Competition, normalizeRecords
+from schedule import CompetitionSchedule
+
+
+# Map key -> record; the first record wins on duplicate keys, like the former list scans
+def indexBy(records, key):
+    return {record[key]: record for record in reversed(records)}
+
+
+class Registry:
+    """
+    In-memory registry of clubs and competitions.
+    Keeps dict indexes (email -> club, name -> club, name -> competition) over
+    the loaded lists so that route lookups are O(1) whatever the data size.
+    Indexed records are the very objects stored in the lists, so bookings
+    applied to a record are visible through both without re-indexing.
+    Numeric fields are stored as ints once, when the lists are taken in.
+    Competitions are also kept in a date-sorted schedule. Each index is
+    built on its first lookup, so loading a big data set costs nothing until
+    a route actually needs it. The bookings ledger belongs to the data sets:
+    it starts empty again whenever they are replaced.
+    """
+
+    def __init__(self, clubs=None, competitions=None):
+        self.clubs = None
+        self.competitions = None
+        self.version = 0
+        # Bumped only when the set of clubs changes, not on bookings
+        self.clubs_generation = 0
+        self._clubs_by_email = None
+        self._clubs_by_name = None
+        self._competitions_by_name = None
+        self._schedule = None
+        self.ledger = BookingLedger()
+        self.sync(clubs if clubs is not None else [],
+                  competitions if competitions is not None else [])
+
+    # Rebuild the indexes when the underlying lists are swapped out
+    def sync(self, clubs, competitions):
+        if clubs is not self.clubs or competitions is not self.competitions:
+            self.ledger = BookingLedger()
+        if clubs is not self.clubs:
+            normalizeRecords(clubs, Club)
+            self.clubs = clubs
+            self._clubs_by_email = None
+            self._clubs_by_name = None
+            self.clubs_generation += 1
+            self.version += 1
+        if competitions is not self.competitions:
+            normalizeRecords(competitions, Competition)
+            self.competitions = competitions
+            self._competitions_by_name = None
+            self._schedule = None
+            self.version += 1
+
+    @property
+    def schedule(self):
+        if self._schedule is None:
+            self._schedule = CompetitionSchedule(self.competitions)
+        return self._schedule
+
+    def club_by_email(self, email):
+        if self._clubs_by_email is None:
+            self._clubs_by_email = indexBy(self.clubs, 'email')
+        return self._clubs_by_email.get(email)
+
+    def club_by_name(self, name):
+        if self._clubs_by_name is None:
+            self._clubs_by_name = indexBy(self.clubs, 'name')
+        return self._clubs_by_name.get(name)
+
+    def competition_by_name(self, name):
+        if self._competitions_by_name is None:
+            self._competitions_by_name = indexBy(self.competitions, 'name')
+        return self._competitions_by_name.get(name)
+
+    # Register new records in both the lists and the built indexes
+    def add_club(self, club):
+        normalizeRecords([club], Club)
+        self.clubs.append(club)
+        if self._clubs_by_email is not None:
+            self._clubs_by_email.setdefault(club['email'], club)
+        if self._clubs_by_name is not None:
+            self._clubs_by_name.setdefault(club['name'], club)
+        self.clubs_generation += 1
+        self.touch()
+
+    def add_competition(self, competition):
+        normalizeRecords([competition], Competition)
+        self.competitions.append(competition)
+        if self._competitions_by_name is not None:
+            self._competitions_by_name.setdefault(competition['name'], competition)
+        if self._schedule is not None:
+            self._schedule.add(competition)
+        self.touch()
+
+    # Signal that a record changed (e.g. after a booking)
+    def touch(self):
+        self.version += 1
@@ -0,0 +1,1107 @@
+import gc
+import json
+import logging
+import marshal
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from itertools import starmap
+from records import Club, Competition
+from registry import Registry
+from journal import BookingJournal, fileStamp, runInline
+from reservations import MemoryReservationStore, ReservationError
+from schedule import DATE_FORMAT, parseDate
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+
+# JSON files from this size on get a binary (marshal) copy next to them
+SNAPSHOT_CACHE_MIN_SIZE = 1 << 20
+# Club invalidations remembered by a Redis worker for club_changes()
+CLUB_CHANGES_SIZE = 4096
+# Seconds between two reads of the SQLite booking history for subscribe_changes()
+CHANGES_POLL_INTERVAL = 0.5
+
+
+# Load a data snapshot and the last journal sequence it already includes,
+# as record_class instances if given (plain dicts otherwise).
+# Big files are read from their binary copy while it matches the JSON file
+# (same size and mtime, same Python version), which is several times faster
+# than parsing the JSON again.
+def loadSnapshot(path, key, record_class=None):
+    stat = os.stat(path)
+    cache_path = path + '.snapshot'
+    stamp = (sys.version_info[:2], stat.st_mtime_ns, stat.st_size,
+             record_class.__name__ if record_class else None)
+    cached = stat.st_size >= SNAPSHOT_CACHE_MIN_SIZE
+    if cached:
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_stamp, rows, seq, extras = marshal.loads(f.read())
+            if cached_stamp == stamp:
+                if not record_class:
+                    return rows, seq
+                records = list(starmap(record_class, rows))
+                for index, extra in extras.items():
+                    records[index]._extra = extra
+                return records, seq
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+    with open(path) as f:
+        data = json.load(f)
+    records, seq = data[key], data.get('journalSeq', 0)
+    if record_class:
+        records = list(map(record_class.from_dict, records))
+    if cached:
+        # Records are cached as plain field tuples, plus the extra fields of
+        # the records having some by position
+        rows = list(map(record_class._read_fields, records)) if record_class else records
+        extras = {index: record.extra for index, record in enumerate(records) if record.extra} \
+            if record_class else {}
+        try:
+            with open(cache_path + '.tmp', 'wb') as f:
+                marshal.dump((stamp, rows, seq, extras), f)
+            os.replace(cache_path + '.tmp', cache_path)
+        except (OSError, ValueError):
+            pass
+    return records, seq
+
+
+class Repository:
+    """
+    Base class of the storage backends.
+    Lets other components (caches, live updates) subscribe to bookings
+    instead of rescanning the data sets.
+    """
+
+    def __init__(self):
+        self.listeners = []
+        self.reload_listeners = []
+        self.change_listeners = []
+
+    # Register a callable run as listener(club, competition, places) after a booking
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, club, competition, places):
+        for listener in self.listeners:
+            listener(club, competition, places)
+
+    # Register a callable run with no arguments after the data was reloaded
+    def subscribe_reload(self, listener):
+        self.reload_listeners.append(listener)
+
+    def _notify_reload(self):
+        for listener in self.reload_listeners:
+            listener()
+
+    # Register a callable run as listener(clubs, competitions) with the records
+    # changed by the bookings of every process sharing the data, or with
+    # (None, None) when any record may have changed. Data private to this
+    # process only changes with its own bookings and reloads.
+    def subscribe_changes(self, listener):
+        self.subscribe(lambda club, competition, places: listener([club], [competition]))
+        self.subscribe_reload(lambda: listener(None, None))
+
+    def _notify_changes(self, clubs, competitions):
+        for listener in self.change_listeners:
+            listener(clubs, competitions)
+
+    # Load the data ahead of the first request (backends load lazily)
+    def preload(self):
+        pass
+
+    # Reload the data when its source changes, polling every interval seconds
+    # (backends over a shared database see every change already)
+    def watch(self, interval):
+        pass
+
+    # Hand the blocking file work (fsyncs, snapshot writes, parsing the data
+    # files) to run_blocking(call, args), e.g. the native threads of gevent
+    def offload(self, run_blocking):
+        pass
+
+    # Names of the clubs whose records were changed by other processes since
+    # cursor (None at first), with the cursor to pass next time; the names
+    # are None when they are no longer known (reread every club). Bookings of
+    # this process reach the listeners anyway.
+    def club_changes(self, cursor):
+        return cursor, []
+
+    # Flush pending writes on shutdown
+    def close(self):
+        pass
+
+
+class JsonRepository(Repository):
+    """
+    Storage backend over the clubs.json / competitions.json snapshots.
+    Records live in memory behind the registry indexes; bookings go through
+    the lock-protected reservation store, are recorded in the registry's
+    bookings ledger and persisted to the journal.
+    A repository opened with load() reads its files on first use only, and
+    reload() swaps in a registry read again from changed files.
+    """
+
+    def __init__(self, clubs, competitions, journal, lock=None):
+        super().__init__()
+        registry = Registry(clubs, competitions)
+        # The registry and the data sets it goes back to when sync() is given
+        # None, swapped together by a reload
+        self._state = (registry, (registry.clubs, registry.competitions))
+        self.journal = journal
+        self.store = MemoryReservationStore(lock)
+        self.paths = None
+        self._stamps = {}
+        self._loader = None
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self.run_blocking = runInline
+        # Journal sequence the data swapped in by the last reload includes
+        self._reloaded_seq = 0
+
+    # Open the snapshots; they are read, and the journal tail written after
+    # them replayed, the first time the data is needed. The ledger snapshot
+    # defaults to <journal name>.ledger.json next to the journal.
+    @classmethod
+    def load(cls, clubs_path, competitions_path, journal_path, lock=None, ledger_path=None,
+             **journal_options):
+        repository = cls(None, None, None, lock)
+        ledger_path = ledger_path or os.path.splitext(journal_path)[0] + '.ledger.json'
+        repository.paths = (clubs_path, competitions_path, ledger_path)
+        repository.journal = BookingJournal(
+            journal_path, clubs_path, competitions_path,
+            source=lambda: (repository.clubs, repository.competitions, repository.ledger),
+            lock=repository.store.lock, ledger_path=ledger_path, changed=repository.changed_files,
+            on_lost=repository._undo, **journal_options)
+        repository._loader = repository._load_files
+        return repository
+
+    # Read the snapshot files into a new registry; returns it with the journal
+    # sequences the snapshots include and the stamps of the files read
+    def _read_files(self):
+        clubs_path, competitions_path, ledger_path = self.paths
+        stamps = {path: fileStamp(path) for path in (clubs_path, competitions_path)}
+        # Records hold no reference cycles: skip collections while millions are created
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            competitions, competitions_seq = loadSnapshot(competitions_path, 'competitions', Competition)
+            clubs, clubs_seq = loadSnapshot(clubs_path, 'clubs', Club)
+            registry = Registry(clubs, competitions)
+        finally:
+            if collecting:
+                gc.enable()
+        ledger_seq = 0
+        if ledger_path and os.path.exists(ledger_path):
+            with open(ledger_path) as f:
+                document = json.load(f)
+            registry.ledger.restore(document)
+            ledger_seq = document.get('journalSeq', 0)
+        return registry, (clubs_seq, competitions_seq, ledger_seq), stamps
+
+    def _load_files(self):
+        registry, seqs, self._stamps = self.run_blocking(self._read_files)
+        self.journal.replay(registry, *seqs)
+        self._state = (registry, (registry.clubs, registry.competitions))
+
+    @property
+    def registry(self):
+        return self._current()[0]
+
+    def _current(self):
+        if self._loader is not None:
+            with self._load_lock:
+                if self._loader is not None:
+                    self._loader()
+                    self._loader = None
+        return self._state
+
+    def preload(self):
+        return self.registry
+
+    # {path: stamp} of the data files changed since they were read (by
+    # something else than a compaction)
+    def changed_files(self):
+        changed = {}
+        for path, stamp in self._stamps.items():
+            try:
+                current = fileStamp(path)
+            except OSError:
+                continue
+            if current != stamp and current != self.journal.written.get(path):
+                changed[path] = current
+        return changed
+
+    # Read the data files again and swap the new registry in at once. Every
+    # booking journaled since the files were written is applied on top, so
+    # bookings made in memory are kept. The files are parsed and most of the
+    # journal applied without holding the booking lock; only the entries
+    # written meanwhile are applied under it, just before the swap.
+    # Returns False if the files were not loaded yet (nothing to reload).
+    def reload(self):
+        if self._loader is not None:
+            return False
+        with self._reload_lock, self.journal.compaction_lock:
+            registry, seqs, stamps = self.run_blocking(self._read_files)
+            applied = self.journal.catch_up(registry, *seqs)
+            with self.store.lock:
+                self.journal.flush()
+                self.journal.catch_up(registry, *seqs, after=applied)
+                previous = self.registry
+                # Caches keyed on these must see a change
+                registry.version = previous.version + 1
+                registry.clubs_generation = previous.clubs_generation + 1
+                self._state = (registry, (registry.clubs, registry.competitions))
+                self._stamps = stamps
+                self._reloaded_seq = self.journal.seq
+        self._notify_reload()
+        return True
+
+    # Poll the data files every interval seconds, off the request path, and
+    # reload them when they change. A file that does not parse (e.g. still
+    # being written) is retried once it changes again.
+    def watch(self, interval):
+        if self._watcher is not None or not self.paths:
+            return
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+        self._watcher.start()
+
+    def _watch(self, interval):
+        failed = None
+        while True:
+            time.sleep(interval)
+            changed = self.changed_files() if self._loader is None else None
+            if not changed or changed == failed:
+                continue
+            try:
+                self.reload()
+                failed = None
+            except (OSError, ValueError, KeyError, TypeError):
+                logger.exception("Reloading the data files failed; keeping the current data")
+                failed = changed
+
+    def offload(self, run_blocking):
+        self.run_blocking = run_blocking
+        if self.journal is not None:
+            self.journal.run_blocking = run_blocking
+
+    @property
+    def clubs(self):
+        return self.registry.clubs
+
+    @property
+    def competitions(self):
+        return self.registry.competitions
+
+    @property
+    def version(self):
+        return self.registry.version
+
+    # Changes only when clubs are replaced or added, not on bookings
+    @property
+    def clubs_generation(self):
+        return self.registry.clubs_generation
+
+    @property
+    def ledger(self):
+        return self.registry.ledger
+
+    # Follow the data sets if they were replaced (e.g. by tests); None stands
+    # for the data sets the repository loaded itself
+    def sync(self, clubs=None, competitions=None):
+        registry, data_sets = self._current()
+        registry.sync(clubs if clubs is not None else data_sets[0],
+                      competitions if competitions is not None else data_sets[1])
+
+    def club_by_email(self, email):
+        return self.registry.club_by_email(email)
+
+    def club_by_name(self, name):
+        return self.registry.club_by_name(name)
+
+    def competition_by_name(self, name):
+        return self.registry.competition_by_name(name)
+
+    def list_clubs(self):
+        return self.registry.clubs
+
+    def list_competitions(self):
+        return self.registry.competitions
+
+    def is_past(self, competition, now):
+        return self.registry.schedule.is_past(competition, now)
+
+    # Return (upcoming, past, total) for one page of the date-sorted schedule
+    def competitions_page(self, now, offset=0, limit=None, include_past=True):
+        return self.registry.schedule.page(now, offset, limit, include_past)
+
+    # Places a club holds on a competition, from the ledger
+    def booked_places(self, club, competition):
+        return self.ledger.booked(club['name'], competition['name'])
+
+    # {competition name: places} held by a club
+    def club_bookings(self, club):
+        return self.ledger.club_bookings(club['name'])
+
+    # (competition name, places) bookings and cancellations of a club, oldest first
+    def history(self, club):
+        return self.ledger.history(club['name'])
+
+    # Atomically deduct places and points, journaling the booking; with a cap,
+    # the club may not hold more than cap places on the competition afterwards
+    def reserve(self, club, competition, places, cap=None):
+        self.reserve_many(club, [(competition, places)], cap)
+
+    # All-or-nothing booking on distinct competitions, journaled as one line
+    def reserve_many(self, club, bookings, cap=None):
+        seq = None
+
+        def record():
+            nonlocal seq
+            seq = self.journal.append_many(club['name'], [(c['name'], places) for c, places in bookings])
+        competitions = [competition for competition, _ in bookings]
+        try:
+            with self.store.lock:
+                current_club, *current_competitions = self._current_records(club, competitions)
+                current_bookings = [(c, places) for c, (_, places) in zip(current_competitions, bookings)]
+                self.store.reserve_many(current_club, current_bookings, commit=record, ledger=self.ledger, cap=cap)
+            # Wait for the journal writer outside the lock so bookings share its fsyncs
+            self.journal.wait(seq)
+        except OSError:
+            raise self._unsaved(club, seq)
+        finally:
+            if seq is not None:
+                self._copy_back(current_club, current_competitions, club, competitions)
+        self.registry.touch()
+        for competition, places in bookings:
+            self._notify(club, competition, places)
+
+    # Give back places of a club's booking and refund the points, journaled as
+    # a booking of negative places; listeners get the negative places too
+    def cancel(self, club, competition, places):
+        seq = None
+
+        def record():
+            nonlocal seq
+            seq = self.journal.append(club['name'], competition['name'], -places)
+        try:
+            with self.store.lock:
+                current_club, current_competition = self._current_records(club, [competition])
+                self.store.release(current_club, current_competition, places, self.ledger, commit=record)
+            self.journal.wait(seq)
+        except OSError:
+            raise self._unsaved(club, seq)
+        finally:
+            if seq is not None:
+                self._copy_back(current_club, [current_competition], club, [competition])
+        self.registry.touch()
+        self._notify(club, competition, -places)
+
+    # The error shown for a booking the journal could not write; nothing of
+    # it is left in memory (the journal's on_lost took it back)
+    @staticmethod
+    def _unsaved(club, seq):
+        logger.exception("Journaling a booking of %s failed (seq %s)", club['name'], seq)
+        return ReservationError("Something went wrong-please try again")
+
+    # Take back a queued booking the journal writer failed to write, unless
+    # the data was reloaded since: the files read then never had it
+    def _undo(self, seq, club_name, bookings):
+        undone = []
+        with self.store.lock:
+            if seq <= self._reloaded_seq:
+                return
+            registry = self.registry
+            club = registry.club_by_name(club_name)
+            for competition_name, places in bookings:
+                competition = registry.competition_by_name(competition_name)
+                if club is None or competition is None:
+                    continue
+                club['points'] += places
+                competition['numberOfPlaces'] += places
+                registry.ledger.undo(club_name, competition_name, places)
+                undone.append((competition, places))
+        registry.touch()
+        for competition, places in undone:
+            self._notify(club, competition, -places)
+
+    # The current registry's records for a club and competitions the caller
+    # may have looked up before a reload; called under the store lock
+    def _current_records(self, club, competitions):
+        registry = self.registry
+        current = [registry.club_by_name(club['name'])]
+        current += [registry.competition_by_name(competition['name']) for competition in competitions]
+        if None in current:
+            # Removed from the data files by a reload
+            raise ReservationError("Something went wrong-please try again")
+        return current
+
+    # Give the caller's records, if older copies, the values just committed
+    @staticmethod
+    def _copy_back(current_club, current_competitions, club, competitions):
+        if club is not current_club:
+            club['points'] = current_club['points']
+        for current, competition in zip(current_competitions, competitions):
+            if competition is not current:
+                competition['numberOfPlaces'] = current['numberOfPlaces']
+
+    def close(self):
+        self.journal.close()
+
+
+class SQLiteRepository(Repository):
+    """
+    Storage backend over a SQLite database shared by every worker process.
+    Lookups go through the email and name indexes instead of holding the
+    data sets in memory, and a booking is a pair of conditional row updates
+    in one IMMEDIATE transaction, so the database stays the single source of
+    truth for places and points. The same transaction keeps the bookings
+    table (keyed by club and competition, indexed by competition) and the
+    per-club history. The database runs in WAL mode so readers never block
+    the booking path.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self.changes_interval = CHANGES_POLL_INTERVAL
+        self._poller = None
+        self._closed = threading.Event()
+        # Competition dates parsed once per name
+        self._dates = {}
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS clubs (
+                name TEXT NOT NULL UNIQUE,
+                email TEXT NOT NULL,
+                points INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS clubs_email ON clubs (email);
+            CREATE TABLE IF NOT EXISTS competitions (
+                name TEXT NOT NULL UNIQUE,
+                date TEXT NOT NULL,
+                numberOfPlaces INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS competitions_date ON competitions (date);
+            CREATE TABLE IF NOT EXISTS bookings (
+                club TEXT NOT NULL,
+                competition TEXT NOT NULL,
+                places INTEGER NOT NULL,
+                PRIMARY KEY (club, competition)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS bookings_competition ON bookings (competition);
+            CREATE TABLE IF NOT EXISTS booking_history (
+                club TEXT NOT NULL,
+                competition TEXT NOT NULL,
+                places INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS booking_history_club ON booking_history (club);
+            CREATE TABLE IF NOT EXISTS meta (revision INTEGER NOT NULL);
+            INSERT INTO meta SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM meta);
+            CREATE TABLE IF NOT EXISTS club_roster (generation INTEGER NOT NULL);
+            INSERT INTO club_roster SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM club_roster);
+        ''')
+
+    # One connection per thread, in autocommit mode so transactions are explicit
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _one(self, record_class, query, args):
+        row = self._connection().execute(query, args).fetchone()
+        return record_class(*row) if row is not None else None
+
+    # Revision bumped by every write from any process
+    @property
+    def version(self):
+        return self._connection().execute('SELECT revision FROM meta').fetchone()[0]
+
+    # Bumped when clubs are imported (added, removed or overwritten); points
+    # changed by bookings are told by club_changes()
+    @property
+    def clubs_generation(self):
+        return self._connection().execute('SELECT generation FROM club_roster').fetchone()[0]
+
+    # Clubs booked or refunded since cursor (the last booking_history row seen)
+    def club_changes(self, cursor):
+        conn = self._connection()
+        last = conn.execute('SELECT MAX(rowid) FROM booking_history').fetchone()[0] or 0
+        if cursor is None:
+            return last, []
+        if cursor > last:
+            return last, None
+        rows = conn.execute('SELECT DISTINCT club FROM booking_history WHERE rowid > ? AND rowid <= ?',
+                            (cursor, last))
+        return last, [row[0] for row in rows]
+
+    # Fed by a thread reading the booking history (written by every process,
+    # this one included) every changes_interval seconds
+    def subscribe_changes(self, listener):
+        self.change_listeners.append(listener)
+        if self._poller is None:
+            start = (self.club_changes(None)[0], self.clubs_generation)
+            self._poller = threading.Thread(target=self._poll_changes, args=start, daemon=True)
+            self._poller.start()
+
+    def _poll_changes(self, cursor, generation):
+        while not self._closed.wait(self.changes_interval):
+            try:
+                conn = self._connection()
+                last = conn.execute('SELECT MAX(rowid) FROM booking_history').fetchone()[0] or 0
+                if self.clubs_generation != generation or last < cursor:
+                    generation = self.clubs_generation
+                    self._notify_changes(None, None)
+                elif last > cursor:
+                    rows = conn.execute('SELECT DISTINCT club, competition FROM booking_history '
+                                        'WHERE rowid > ? AND rowid <= ?', (cursor, last)).fetchall()
+                    clubs = [self.club_by_name(name) for name in dict.fromkeys(row[0] for row in rows)]
+                    competitions = [self.competition_by_name(name) for name in dict.fromkeys(row[1] for row in rows)]
+                    self._notify_changes([c for c in clubs if c is not None],
+                                         [c for c in competitions if c is not None])
+                cursor = last
+            except sqlite3.Error:
+                logger.exception("Reading the booking history failed")
+
+    # The data lives in the database, there is nothing to follow
+    def sync(self, clubs, competitions):
+        pass
+
+    def club_by_email(self, email):
+        return self._one(Club, 'SELECT name, email, points FROM clubs WHERE email = ? ORDER BY rowid LIMIT 1', (email,))
+
+    def club_by_name(self, name):
+        return self._one(Club, 'SELECT name, email, points FROM clubs WHERE name = ?', (name,))
+
+    def competition_by_name(self, name):
+        return self._one(Competition, 'SELECT name, date, numberOfPlaces FROM competitions WHERE name = ?', (name,))
+
+    def list_clubs(self):
+        rows = self._connection().execute('SELECT name, email, points FROM clubs ORDER BY rowid')
+        return [Club(*row) for row in rows]
+
+    def list_competitions(self):
+        rows = self._connection().execute('SELECT name, date, numberOfPlaces FROM competitions ORDER BY rowid')
+        return [Competition(*row) for row in rows]
+
+    def is_past(self, competition, now):
+        date = self._dates.get(competition['name'])
+        if date is None:
+            date = self._dates[competition['name']] = parseDate(competition['date'])
+        return date < now
+
+    # Return (upcoming, past, total) for one page, read through the date index
+    def competitions_page(self, now, offset=0, limit=None, include_past=True):
+        conn = self._connection()
+        bound = now.strftime(DATE_FORMAT)
+        nb_upcoming = conn.execute('SELECT COUNT(*) FROM competitions WHERE date >= ?', (bound,)).fetchone()[0]
+        total = nb_upcoming
+        if include_past:
+            total += conn.execute('SELECT COUNT(*) FROM competitions WHERE date < ?', (bound,)).fetchone()[0]
+        stop = total if limit is None else min(offset + limit, total)
+        upcoming = conn.execute('SELECT name, date, numberOfPlaces FROM competitions '
+                                'WHERE date >= ? ORDER BY date, rowid LIMIT ? OFFSET ?',
+                                (bound, max(min(stop, nb_upcoming) - offset, 0), offset))
+        past_start = max(offset - nb_upcoming, 0)
+        past = conn.execute('SELECT name, date, numberOfPlaces FROM competitions '
+                            'WHERE date < ? ORDER BY date DESC, rowid DESC LIMIT ? OFFSET ?',
+                            (bound, max(stop - nb_upcoming - past_start, 0), past_start))
+        return [Competition(*row) for row in upcoming], [Competition(*row) for row in past], total
+
+    # Insert or overwrite records, e.g. when migrating from the JSON files,
+    # along with the bookings of a ledger if given
+    def import_data(self, clubs, competitions, ledger=None):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany('INSERT OR REPLACE INTO clubs (name, email, points) VALUES (?, ?, ?)',
+                         [(c['name'], c['email'], int(c['points'])) for c in clubs])
+        conn.executemany('INSERT OR REPLACE INTO competitions (name, date, numberOfPlaces) VALUES (?, ?, ?)',
+                         [(c['name'], c['date'], int(c['numberOfPlaces'])) for c in competitions])
+        if ledger is not None:
+            history = ledger.to_json()['history']
+            conn.executemany('INSERT INTO booking_history (club, competition, places) VALUES (?, ?, ?)',
+                             [(club, name, places) for club, lines in history.items() for name, places in lines])
+            conn.executemany('INSERT OR REPLACE INTO bookings (club, competition, places) VALUES (?, ?, ?)',
+                             [(club, name, places) for club in history
+                              for name, places in ledger.club_bookings(club).items()])
+        if clubs:
+            conn.execute('UPDATE club_roster SET generation = generation + 1')
+        conn.execute('UPDATE meta SET revision = revision + 1')
+        conn.execute('COMMIT')
+        self._dates.clear()
+
+    def booked_places(self, club, competition):
+        row = self._connection().execute('SELECT places FROM bookings WHERE club = ? AND competition = ?',
+                                         (club['name'], competition['name'])).fetchone()
+        return row[0] if row is not None else 0
+
+    def club_bookings(self, club):
+        rows = self._connection().execute('SELECT competition, places FROM bookings WHERE club = ?',
+                                          (club['name'],))
+        return dict(rows.fetchall())
+
+    def history(self, club):
+        rows = self._connection().execute(
+            'SELECT competition, places FROM booking_history WHERE club = ? ORDER BY rowid', (club['name'],))
+        return [tuple(row) for row in rows]
+
+    # Conditional row updates in one transaction, then refresh the given records
+    def reserve(self, club, competition, places, cap=None):
+        self.reserve_many(club, [(competition, places)], cap)
+
+    # All-or-nothing booking on distinct competitions in a single transaction;
+    # with a cap, the club may not hold more than cap places on a competition
+    def reserve_many(self, club, bookings, cap=None):
+        conn = self._connection()
+        remaining_places = []
+        total = sum(places for _, places in bookings)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for competition, places in bookings:
+                row = conn.execute(
+                    'UPDATE competitions SET numberOfPlaces = numberOfPlaces - ? '
+                    'WHERE name = ? AND numberOfPlaces >= ? RETURNING numberOfPlaces',
+                    (places, competition['name'], places)).fetchone()
+                if row is None:
+                    raise ReservationError("Not enough places", competition['name'])
+                remaining_places.append(row[0])
+                # The update is skipped (no row returned) when it would pass the cap
+                row = conn.execute(
+                    'INSERT INTO bookings (club, competition, places) VALUES (?, ?, ?) '
+                    'ON CONFLICT (club, competition) DO UPDATE SET places = places + excluded.places '
+                    'WHERE ? IS NULL OR places + excluded.places <= ? RETURNING places',
+                    (club['name'], competition['name'], places, cap, cap)).fetchone()
+                if row is None or cap is not None and row[0] > cap:
+                    raise ReservationError(f"You cannot book more than {cap} places", competition['name'])
+            row = conn.execute(
+                'UPDATE clubs SET points = points - ? WHERE name = ? AND points >= ? RETURNING points',
+                (total, club['name'], total)).fetchone()
+            if row is None:
+                raise ReservationError("Not enough points")
+            remaining_points = row[0]
+            conn.executemany('INSERT INTO booking_history (club, competition, places) VALUES (?, ?, ?)',
+                             [(club['name'], competition['name'], places) for competition, places in bookings])
+            conn.execute('UPDATE meta SET revision = revision + 1')
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        for (competition, places), remaining in zip(bookings, remaining_places):
+            competition['numberOfPlaces'] = remaining
+        club['points'] = remaining_points
+        for competition, places in bookings:
+            self._notify(club, competition, places)
+
+    # Give back places of a club's booking and refund the points in one transaction
+    def cancel(self, club, competition, places):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT places FROM bookings WHERE club = ? AND competition = ?',
+                               (club['name'], competition['name'])).fetchone()
+            held = row[0] if row is not None else 0
+            if not held:
+                raise ReservationError("You have no booking to cancel.")
+            if places > held:
+                raise ReservationError(f"You only booked {held} places")
+            if places == held:
+                conn.execute('DELETE FROM bookings WHERE club = ? AND competition = ?',
+                             (club['name'], competition['name']))
+            else:
+                conn.execute('UPDATE bookings SET places = places - ? WHERE club = ? AND competition = ?',
+                             (places, club['name'], competition['name']))
+            remaining_places = conn.execute(
+                'UPDATE competitions SET numberOfPlaces = numberOfPlaces + ? WHERE name = ? '
+                'RETURNING numberOfPlaces', (places, competition['name'])).fetchone()[0]
+            remaining_points = conn.execute(
+                'UPDATE clubs SET points = points + ? WHERE name = ? RETURNING points',
+                (places, club['name'])).fetchone()[0]
+            conn.execute('INSERT INTO booking_history (club, competition, places) VALUES (?, ?, ?)',
+                         (club['name'], competition['name'], -places))
+            conn.execute('UPDATE meta SET revision = revision + 1')
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        competition['numberOfPlaces'] = remaining_places
+        club['points'] = remaining_points
+        self._notify(club, competition, -places)
+
+    def close(self):
+        self._closed.set()
+
+
+class RedisRepository(Repository):
+    """
+    Storage backend over a Redis server (or anything speaking its protocol)
+    shared by every worker process, on one host or several. Clubs and
+    competitions are hashes. A booking or a cancellation is one optimistic
+    transaction: WATCH the rows, check the rules, then MULTI/EXEC the
+    HINCRBY updates, retried if another worker changed the rows in between.
+    Each worker keeps a read-through cache of the records, cleared through
+    pub/sub whenever any worker writes.
+    """
+
+    CHANNEL = 'invalidate'
+
+    # client must decode responses (decode_responses=True); cache=False reads
+    # everything from Redis, e.g. for one-shot scripts
+    def __init__(self, client, prefix='gudlft:', cache=True):
+        super().__init__()
+        self.redis = client
+        self.prefix = prefix
+        self.cache = cache
+        self._clubs = {}
+        self._emails = {}
+        self._competitions = {}
+        self._revision = None
+        self._clubs_generation = None
+        # (seq, club name or None for every club) of the club invalidations received
+        self._club_log = deque(maxlen=CLUB_CHANGES_SIZE)
+        self._club_seq = 0
+        self._club_log_lock = threading.Lock()
+        # Bumped by every invalidation, so that a read racing with one is not cached
+        self._epoch = 0
+        self._dates = {}
+        self._listener = None
+        self._pubsub = None
+        if cache:
+            self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self._key(self.CHANNEL): self._on_message})
+            self._listener = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    @classmethod
+    def from_url(cls, url, **options):
+        if redis is None:
+            raise RuntimeError("The redis backend needs the redis package (pip install redis)")
+        return cls(redis.Redis.from_url(url, decode_responses=True), **options)
+
+    def _key(self, *parts):
+        return self.prefix + ':'.join(parts)
+
+    # Pub/sub listener: drop what another worker (or this one) changed
+    def _on_message(self, message):
+        self._invalidate(message['data'])
+        if self.change_listeners:
+            try:
+                self._tell_changes(message['data'])
+            except Exception:
+                # Never let it stop the listener thread, the cache relies on it
+                logger.exception("Telling the changes of %s failed", message['data'])
+
+    # Run the change listeners with the records read again
+    def _tell_changes(self, what):
+        kind, _, name = what.partition(':')
+        if kind == 'club':
+            records = [self.club_by_name(name)], []
+        elif kind == 'competition':
+            records = [], [self.competition_by_name(name)]
+        else:
+            records = None, None
+        self._notify_changes(*(None if found is None else [r for r in found if r is not None]
+                               for found in records))
+
+    def _invalidate(self, what):
+        self._epoch += 1
+        self._revision = None
+        kind, _, name = what.partition(':')
+        if kind == 'club':
+            self._clubs.pop(name, None)
+            self._log_club(name)
+        elif kind == 'competition':
+            self._competitions.pop(name, None)
+        else:
+            self._clubs_generation = None
+            self._clubs.clear()
+            self._emails.clear()
+            self._competitions.clear()
+            self._log_club(None)
+
+    def _log_club(self, name):
+        with self._club_log_lock:
+            self._club_seq += 1
+            self._club_log.append((self._club_seq, name))
+
+    # Tell every worker (this one included) that records changed
+    def _publish(self, pipe, *changed):
+        pipe.incr(self._key('revision'))
+        for what in changed:
+            pipe.publish(self._key(self.CHANNEL), what)
+
+    # Records of the given names (None for unknown ones), fetching the ones
+    # missing from the cache in one round trip
+    def _records(self, cache, kind, record_class, names):
+        epoch = self._epoch
+        found = {name: cache[name] for name in names if name in cache} if self.cache else {}
+        missing = [name for name in dict.fromkeys(names) if name not in found]
+        if missing:
+            pipe = self.redis.pipeline(transaction=False)
+            for name in missing:
+                pipe.hgetall(self._key(kind, name))
+            loaded = {name: record_class.from_dict(fields) if fields else None
+                      for name, fields in zip(missing, pipe.execute())}
+            if self.cache and epoch == self._epoch:
+                cache.update(loaded)
+            found.update(loaded)
+        return [found[name] for name in names]
+
+    @property
+    def version(self):
+        if self._revision is not None and self.cache:
+            return self._revision
+        epoch = self._epoch
+        revision = int(self.redis.get(self._key('revision')) or 0)
+        if epoch == self._epoch:
+            self._revision = revision
+        return revision
+
+    # Bumped when clubs are imported; points changed by bookings of any
+    # worker are told by club_changes()
+    @property
+    def clubs_generation(self):
+        if self._clubs_generation is not None and self.cache:
+            return self._clubs_generation
+        epoch = self._epoch
+        generation = int(self.redis.get(self._key('clubs-generation')) or 0)
+        if epoch == self._epoch:
+            self._clubs_generation = generation
+        return generation
+
+    # Clubs named by the invalidations received since cursor (a position in
+    # the log of this worker's pub/sub messages)
+    def club_changes(self, cursor):
+        if not self.cache:
+            return 0, None
+        with self._club_log_lock:
+            last = self._club_seq
+            if cursor is None or cursor == last:
+                return last, []
+            if not self._club_log or self._club_log[0][0] > cursor + 1:
+                return last, None
+            names = [name for seq, name in self._club_log if seq > cursor]
+        return last, None if None in names else list(dict.fromkeys(names))
+
+    # Fed by the invalidations of every worker, this one included (without
+    # the cache there are none to follow)
+    def subscribe_changes(self, listener):
+        if not self.cache:
+            return super().subscribe_changes(listener)
+        self.change_listeners.append(listener)
+
+    # The data lives in Redis, there is nothing to follow
+    def sync(self, clubs, competitions):
+        pass
+
+    def club_by_email(self, email):
+        epoch = self._epoch
+        name = self._emails.get(email) if self.cache else None
+        if name is None:
+            name = self.redis.get(self._key('club-email', email))
+            if name is None:
+                return None
+            if self.cache and epoch == self._epoch:
+                self._emails[email] = name
+        return self.club_by_name(name)
+
+    def club_by_name(self, name):
+        return self._records(self._clubs, 'club', Club, [name])[0]
+
+    def competition_by_name(self, name):
+        return self._records(self._competitions, 'competition', Competition, [name])[0]
+
+    def list_clubs(self):
+        return self._records(self._clubs, 'club', Club, self.redis.lrange(self._key('clubs'), 0, -1))
+
+    def list_competitions(self):
+        names = self.redis.lrange(self._key('competitions'), 0, -1)
+        return self._records(self._competitions, 'competition', Competition, names)
+
+    def is_past(self, competition, now):
+        date = self._dates.get(competition['name'])
+        if date is None:
+            date = self._dates[competition['name']] = parseDate(competition['date'])
+        return date < now
+
+    # Return (upcoming, past, total) for one page, read through the date-scored set
+    def competitions_page(self, now, offset=0, limit=None, include_past=True):
+        key = self._key('schedule')
+        bound = now.timestamp()
+        nb_upcoming = self.redis.zcount(key, bound, '+inf')
+        total = nb_upcoming
+        if include_past:
+            total += self.redis.zcount(key, '-inf', f'({bound}')
+        stop = total if limit is None else min(offset + limit, total)
+        nb_page_upcoming = max(min(stop, nb_upcoming) - offset, 0)
+        past_start = max(offset - nb_upcoming, 0)
+        nb_page_past = max(stop - nb_upcoming - past_start, 0)
+        upcoming = self.redis.zrangebyscore(key, bound, '+inf', start=offset, num=nb_page_upcoming) \
+            if nb_page_upcoming else []
+        past = self.redis.zrevrangebyscore(key, f'({bound}', '-inf', start=past_start, num=nb_page_past) \
+            if nb_page_past else []
+        records = self._records(self._competitions, 'competition', Competition, upcoming + past)
+        return records[:len(upcoming)], records[len(upcoming):], total
+
+    # Insert or overwrite records, e.g. when migrating from the JSON files,
+    # along with the bookings of a ledger if given
+    def import_data(self, clubs, competitions, ledger=None):
+        pipe = self.redis.pipeline()
+        for name in dict.fromkeys(c['name'] for c in clubs):
+            pipe.exists(self._key('club', name))
+        for name in dict.fromkeys(c['name'] for c in competitions):
+            pipe.exists(self._key('competition', name))
+        existing = pipe.execute()
+        known = iter(existing)
+        new_clubs = [name for name in dict.fromkeys(c['name'] for c in clubs) if not next(known)]
+        new_competitions = [name for name in dict.fromkeys(c['name'] for c in competitions) if not next(known)]
+
+        pipe = self.redis.pipeline()
+        for club in clubs:
+            pipe.hset(self._key('club', club['name']), mapping={
+                'name': club['name'], 'email': club['email'], 'points': int(club['points'])})
+            pipe.setnx(self._key('club-email', club['email']), club['name'])
+        for competition in competitions:
+            pipe.hset(self._key('competition', competition['name']), mapping={
+                'name': competition['name'], 'date': competition['date'],
+                'numberOfPlaces': int(competition['numberOfPlaces'])})
+            pipe.zadd(self._key('schedule'), {competition['name']: parseDate(competition['date']).timestamp()})
+        if new_clubs:
+            pipe.rpush(self._key('clubs'), *new_clubs)
+        if new_competitions:
+            pipe.rpush(self._key('competitions'), *new_competitions)
+        if clubs:
+            pipe.incr(self._key('clubs-generation'))
+        if ledger is not None:
+            for club, lines in ledger.to_json()['history'].items():
+                pipe.rpush(self._key('history', club), *(json.dumps(line) for line in lines))
+                for name, places in ledger.club_bookings(club).items():
+                    pipe.hset(self._key('bookings', club), name, places)
+                    pipe.hset(self._key('booked', name), club, places)
+        self._publish(pipe, '*')
+        pipe.execute()
+        self._dates.clear()
+
+    def booked_places(self, club, competition):
+        return int(self.redis.hget(self._key('bookings', club['name']), competition['name']) or 0)
+
+    def club_bookings(self, club):
+        return {name: int(places) for name, places in self.redis.hgetall(self._key('bookings', club['name'])).items()}
+
+    def history(self, club):
+        return [tuple(json.loads(line)) for line in self.redis.lrange(self._key('history', club['name']), 0, -1)]
+
+    def reserve(self, club, competition, places, cap=None):
+        self.reserve_many(club, [(competition, places)], cap)
+
+    # All-or-nothing booking on distinct competitions in one optimistic
+    # transaction; with a cap, the club may not hold more than cap places on
+    # a competition
+    def reserve_many(self, club, bookings, cap=None):
+        club_key = self._key('club', club['name'])
+        bookings_key = self._key('bookings', club['name'])
+        competition_keys = [self._key('competition', c['name']) for c, _ in bookings]
+        total = sum(places for _, places in bookings)
+
+        def book(pipe):
+            remaining_places = []
+            for (competition, places), key in zip(bookings, competition_keys):
+                available = int(pipe.hget(key, 'numberOfPlaces') or 0)
+                if places > available:
+                    raise ReservationError("Not enough places", competition['name'])
+                held = int(pipe.hget(bookings_key, competition['name']) or 0)
+                if cap is not None and held + places > cap:
+                    raise ReservationError(f"You cannot book more than {cap} places", competition['name'])
+                remaining_places.append(available - places)
+            points = int(pipe.hget(club_key, 'points') or 0)
+            if total > points:
+                raise ReservationError("Not enough points")
+            pipe.multi()
+            for (competition, places), key in zip(bookings, competition_keys):
+                pipe.hincrby(key, 'numberOfPlaces', -places)
+                pipe.hincrby(bookings_key, competition['name'], places)
+                pipe.hincrby(self._key('booked', competition['name']), club['name'], places)
+                pipe.rpush(self._key('history', club['name']), json.dumps([competition['name'], places]))
+            pipe.hincrby(club_key, 'points', -total)
+            self._publish(pipe, 'club:' + club['name'], *('competition:' + c['name'] for c, _ in bookings))
+            return remaining_places, points - total
+
+        remaining_places, remaining_points = self.redis.transaction(
+            book, club_key, bookings_key, *competition_keys, value_from_callable=True)
+        for (competition, places), remaining in zip(bookings, remaining_places):
+            competition['numberOfPlaces'] = remaining
+        club['points'] = remaining_points
+        for competition, places in bookings:
+            self._notify(club, competition, places)
+
+    # Give back places of a club's booking and refund the points in one transaction
+    def cancel(self, club, competition, places):
+        club_key = self._key('club', club['name'])
+        competition_key = self._key('competition', competition['name'])
+        bookings_key = self._key('bookings', club['name'])
+        booked_key = self._key('booked', competition['name'])
+
+        def release(pipe):
+            held = int(pipe.hget(bookings_key, competition['name']) or 0)
+            if not held:
+                raise ReservationError("You have no booking to cancel.")
+            if places > held:
+                raise ReservationError(f"You only booked {held} places")
+            remaining_places = int(pipe.hget(competition_key, 'numberOfPlaces')) + places
+            remaining_points = int(pipe.hget(club_key, 'points')) + places
+            pipe.multi()
+            if places == held:
+                pipe.hdel(bookings_key, competition['name'])
+                pipe.hdel(booked_key, club['name'])
+            else:
+                pipe.hincrby(bookings_key, competition['name'], -places)
+                pipe.hincrby(booked_key, club['name'], -places)
+            pipe.hincrby(competition_key, 'numberOfPlaces', places)
+            pipe.hincrby(club_key, 'points', places)
+            pipe.rpush(self._key('history', club['name']), json.dumps([competition['name'], -places]))
+            self._publish(pipe, 'club:' + club['name'], 'competition:' + competition['name'])
+            return remaining_places, remaining_points
+
+        remaining_places, remaining_points = self.redis.transaction(
+            release, club_key, competition_key, bookings_key, value_from_callable=True)
+        competition['numberOfPlaces'] = remaining_places
+        club['points'] = remaining_points
+        self._notify(club, competition, -places)
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+# One-shot import of the JSON snapshots and journal tail into a SQLite database
+def migrateJsonToSqlite(clubs_path, competitions_path, journal_path, db_path):
+    source = JsonRepository.load(clubs_path, competitions_path, journal_path)
+    target = SQLiteRepository(db_path)
+    target.import_data(source.clubs, source.competitions, source.ledger)
+    return len(source.clubs), len(source.competitions)
+
+
+# One-shot import of the JSON snapshots, journal tail and ledger into Redis
+def migrateJsonToRedis(clubs_path, competitions_path, journal_path, url):
+    source = JsonRepository.load(clubs_path, competitions_path, journal_path)
+    target = RedisRepository.from_url(url, cache=False)
+    target.import_data(source.clubs, source.competitions, source.ledger)
+    target.close()
+    return len(source.clubs), len(source.competitions)
@@ -0,0 +1,70 @@
+import threading
+
+
+class ReservationError(Exception):
+    """
+    Raised when a booking is refused, either by the booking rules or because
+    it can no longer be honoured at commit time.
+    The message is the one shown to the user; competition names the
+    competition at fault in a batch, if any.
+    """
+
+    def __init__(self, message, competition=None):
+        super().__init__(message)
+        self.competition = competition
+
+
+class MemoryReservationStore:
+    """
+    Reservation store over the in-memory records of a single process.
+    The check and the decrement of places and points happen under one lock,
+    so concurrent threads can never oversell a competition nor take a club
+    over its per-competition cap.
+    """
+
+    durable = False
+
+    def __init__(self, lock=None):
+        self.lock = lock or threading.RLock()
+
+    # Atomically check and deduct places and points; commit runs inside the
+    # lock, before the deduction, which it cancels by raising
+    def reserve(self, club, competition, places, commit=None, ledger=None, cap=None):
+        self.reserve_many(club, [(competition, places)], commit, ledger, cap)
+
+    # Same for (competition, places) pairs on distinct competitions: all or nothing.
+    # With a ledger the bookings are recorded in it, and refused when they
+    # would take the club's places on a competition over cap.
+    def reserve_many(self, club, bookings, commit=None, ledger=None, cap=None):
+        with self.lock:
+            total = 0
+            for competition, places in bookings:
+                if places > competition['numberOfPlaces']:
+                    raise ReservationError("Not enough places", competition['name'])
+                if cap is not None and ledger is not None \
+                        and ledger.booked(club['name'], competition['name']) + places > cap:
+                    raise ReservationError(f"You cannot book more than {cap} places", competition['name'])
+                total += places
+            if total > club['points']:
+                raise ReservationError("Not enough points")
+            if commit is not None:
+                commit()
+            for competition, places in bookings:
+                competition['numberOfPlaces'] -= places
+                if ledger is not None:
+                    ledger.record(club['name'], competition['name'], places)
+            club['points'] -= total
+
+    # Give back places the club holds in the ledger and refund their points
+    def release(self, club, competition, places, ledger, commit=None):
+        with self.lock:
+            held = ledger.booked(club['name'], competition['name'])
+            if not held:
+                raise ReservationError("You have no booking to cancel.")
+            if places > held:
+                raise ReservationError(f"You only booked {held} places")
+            if commit is not None:
+                commit()
+            competition['numberOfPlaces'] += places
+            club['points'] += places
+            ledger.record(club['name'], competition['name'], -places)
@@ -0,0 +1,20 @@
+#!/bin/bash
+
+# Check if virtual environment directory exists
+if [ -d "venv" ]; then
+    # Activate the virtual environment
+    source venv/bin/activate
+else
+    echo "Error: venv directory not found."
+    exit 1
+fi
+
+# Address to listen on
+export GUDLFT_HOST=${GUDLFT_HOST:-127.0.0.1}
+export GUDLFT_PORT=${GUDLFT_PORT:-5000}
+# Load the data files at startup rather than on the first request
+export GUDLFT_PRELOAD=${GUDLFT_PRELOAD:-1}
+
+# Launch the gevent server: one process, a greenlet per connection, suited to
+# many open live-update streams
+exec python wsgi.py
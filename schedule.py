@@ -0,0 +1,59 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# Parse a competition date string once into a datetime
+def parseDate(value):
+    return datetime.strptime(value, DATE_FORMAT)
+
+
+class CompetitionSchedule:
+    """
+    Competitions kept sorted by their parsed date.
+    Dates are parsed once when a competition is added; splitting into
+    upcoming and past events is then a bisect against the given time.
+    """
+
+    def __init__(self, competitions=()):
+        self._dates_by_name = {}
+        dated = [(parseDate(c['date']), i, c) for i, c in enumerate(competitions)]
+        for date, _, competition in dated:
+            self._dates_by_name.setdefault(competition['name'], date)
+        dated.sort(key=lambda entry: entry[:2])
+        self._dates = [date for date, _, _ in dated]
+        self._competitions = [competition for _, _, competition in dated]
+
+    # Insert a competition at its place in date order (stable for equal dates)
+    def add(self, competition):
+        date = parseDate(competition['date'])
+        index = bisect_right(self._dates, date)
+        self._dates.insert(index, date)
+        self._competitions.insert(index, competition)
+        self._dates_by_name.setdefault(competition['name'], date)
+
+    def date_of(self, competition):
+        date = self._dates_by_name.get(competition['name'])
+        return date if date is not None else parseDate(competition['date'])
+
+    def is_past(self, competition, now):
+        return self.date_of(competition) < now
+
+    # Return (upcoming, past); upcoming soonest first, past most recent first
+    def split(self, now):
+        index = bisect_left(self._dates, now)
+        return self._competitions[index:], self._competitions[:index][::-1]
+
+    # Return (upcoming, past, total) for one page of the split list, where
+    # offset/limit count upcoming competitions first, then past ones
+    def page(self, now, offset=0, limit=None, include_past=True):
+        index = bisect_left(self._dates, now)
+        nb_upcoming = len(self._dates) - index
+        total = len(self._dates) if include_past else nb_upcoming
+        stop = total if limit is None else min(offset + limit, total)
+        upcoming = self._competitions[index + min(offset, nb_upcoming):index + min(stop, nb_upcoming)]
+        past_start = max(offset - nb_upcoming, 0)
+        past_stop = max(stop - nb_upcoming, 0)
+        past = self._competitions[index - past_stop:index - past_start][::-1] if past_stop > past_start else []
+        return upcoming, past, total
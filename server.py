@@ -1,28 +1,253 @@
+import atexit
 import json
-from flask import Flask, render_template, request, redirect, flash, url_for
+import os
+import threading
+import click
+from flask import Flask, render_template, request, redirect, flash, url_for, make_response, session, \
+    stream_template, get_flashed_messages
 from datetime import datetime
+from repository import JsonRepository, RedisRepository, SQLiteRepository, loadSnapshot, migrateJsonToRedis, \
+    migrateJsonToSqlite
+from reservations import ReservationError
+from booking import MAX_PLACES_PER_CLUB, checkBooking, placeCancellation
+from metrics import Metrics, instrument, phase
+from compression import CompressedCache, installCompression
+from ratelimit import installAdmission
+from events import EventBroker, installEvents
+from api import createApi
+from pointsboard import PointsBoard, ORDERS
+from waitlist import Waitlist
+from fragments import CompetitionRows
+from jinja2 import FileSystemBytecodeCache
+from flask_login import LoginManager, current_user, login_user, logout_user
+from sessions import FileSessionStore, MemorySessionStore, ServerSessionInterface
+from auth import ClubLoader
+
+# Folder holding the data files (e.g. a generated load-test data set)
+DATA_DIR = os.environ.get('GUDLFT_DATA_DIR', '.')
+CLUBS_FILE = os.path.join(DATA_DIR, 'clubs.json')
+COMPETITIONS_FILE = os.path.join(DATA_DIR, 'competitions.json')
+JOURNAL_FILE = os.path.join(DATA_DIR, 'bookings.journal')
+# Storage backend: 'json' (default), 'sqlite' or 'redis'
+STORAGE_BACKEND = os.environ.get('GUDLFT_STORAGE_BACKEND', 'json')
+SQLITE_DB = os.environ.get('GUDLFT_SQLITE_DB', 'gudlft.db')
+REDIS_URL = os.environ.get('GUDLFT_REDIS_URL', 'redis://localhost:6379/0')
+# Journal writer: bookings are flushed together at most every JOURNAL_FLUSH_MS
+# (0 writes each one inline) or every JOURNAL_BATCH bookings. 'durable' acks a
+# booking once it is on disk, 'fast' as soon as it is queued.
+JOURNAL_FLUSH_MS = float(os.environ.get('GUDLFT_JOURNAL_FLUSH_MS', '5'))
+JOURNAL_BATCH = int(os.environ.get('GUDLFT_JOURNAL_BATCH', '256'))
+JOURNAL_ACK = os.environ.get('GUDLFT_JOURNAL_ACK', 'durable')
+# Seconds between checks of the data files for changes, reloaded without a
+# restart (0 to disable)
+RELOAD_INTERVAL = float(os.environ.get('GUDLFT_RELOAD_INTERVAL', '2'))
+# Compiled templates are kept here across restarts (empty to disable)
+TEMPLATE_CACHE_DIR = os.environ.get('GUDLFT_TEMPLATE_CACHE', '.jinja_cache')
+# Serving order of the waitlists: 'fifo' or 'points' (highest first)
+WAITLIST_ORDER = os.environ.get('GUDLFT_WAITLIST_ORDER', 'fifo')
+# The waitlists are saved here, to survive restarts (empty to keep them in
+# memory only)
+WAITLIST_FILE = os.environ.get('GUDLFT_WAITLIST_FILE', os.path.join(DATA_DIR, 'waitlist.json'))
+# Session store: 'memory' (in-process LRU) or 'file' (shared by the workers of a host)
+SESSION_STORE = os.environ.get('GUDLFT_SESSION_STORE', 'memory')
+SESSION_DIR = os.environ.get('GUDLFT_SESSION_DIR', 'sessions')
+MAX_SESSIONS = int(os.environ.get('GUDLFT_MAX_SESSIONS', '10000'))
+# Admission control of the booking and login routes, as JSON:
+# {endpoint: {"ip": [rate/s, burst], "club": [rate/s, burst], "concurrency": n}}
+# (ratelimit.DEFAULT_LIMITS when unset); GUDLFT_RATE_LIMITING=0 turns it off
+RATE_LIMITS = json.loads(os.environ['GUDLFT_RATE_LIMITS']) if os.environ.get('GUDLFT_RATE_LIMITS') else None
+# Live update (Server-Sent Events) streams served at once by a process
+MAX_EVENT_STREAMS = int(os.environ.get('GUDLFT_MAX_EVENT_STREAMS', '1000'))
+# Largest page size accepted by the paginated views
+MAX_PAGE_SIZE = 500
 
 
 # Load club data from JSON file
 def loadClubs():
-    with open('clubs.json') as c:
-        listOfClubs = json.load(c)['clubs']
-        return listOfClubs
+    listOfClubs = loadSnapshot(CLUBS_FILE, 'clubs')[0]
+    return listOfClubs
 
 
 # Load competition data from JSON file
 def loadCompetitions():
-    with open('competitions.json') as comps:
-        listOfCompetitions = json.load(comps)['competitions']
-        return listOfCompetitions
+    listOfCompetitions = loadSnapshot(COMPETITIONS_FILE, 'competitions')[0]
+    return listOfCompetitions
 
 
 app = Flask(__name__)
 app.secret_key = 'something_special'
+# Clock used for past/upcoming checks; tests can inject a fixed one
+app.config['CLOCK'] = datetime.now
+# Opt-in request/phase timings served at /metrics, with optional cProfile
+# dumps of requests slower than the threshold
+app.config['METRICS'] = os.environ.get('GUDLFT_METRICS') == '1'
+app.config['PROFILE_THRESHOLD_MS'] = float(os.environ.get('GUDLFT_PROFILE_THRESHOLD_MS') or 0) or None
+app.config['PROFILE_DIR'] = os.environ.get('GUDLFT_PROFILE_DIR', 'profiles')
+# Largest request body accepted, in bytes; bigger ones get a 413
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('GUDLFT_MAX_BODY', str(1 << 20)))
+metrics = Metrics()
+instrument(app, metrics)
+# Responses are sent brotli/gzip-compressed to the clients accepting it
+# (GUDLFT_COMPRESSION=0 leaves it to a proxy); static files are served with
+# fingerprinted URLs and cached by clients for good
+app.config['COMPRESSION'] = os.environ.get('GUDLFT_COMPRESSION', '1') != '0'
+compressedCache = CompressedCache()
+installCompression(app, compressedCache)
+if TEMPLATE_CACHE_DIR:
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+# Guards every check-and-decrement on the in-memory data sets
+dataLock = threading.RLock()
+
+
+# Pick the storage backend from the configuration
+def createRepository():
+    if STORAGE_BACKEND == 'sqlite':
+        return SQLiteRepository(SQLITE_DB)
+    if STORAGE_BACKEND == 'redis':
+        return RedisRepository.from_url(REDIS_URL)
+    return JsonRepository.load(CLUBS_FILE, COMPETITIONS_FILE, JOURNAL_FILE, dataLock,
+                               flush_interval=JOURNAL_FLUSH_MS / 1000, batch_size=JOURNAL_BATCH,
+                               durable=JOURNAL_ACK != 'fast')
+
+
+# Open the storage backend; the JSON data files are only read on first use
+# (and the booking journal replayed then), so importing the app stays cheap
+repository = createRepository()
+# Flush queued journal lines when the process exits
+atexit.register(repository.close)
+# Load the data in the background right away instead of on the first request
+if os.environ.get('GUDLFT_PRELOAD') == '1':
+    threading.Thread(target=repository.preload, daemon=True).start()
+# Pick up edited data files (new clubs, competitions) in the background
+if RELOAD_INTERVAL:
+    repository.watch(RELOAD_INTERVAL)
+# Replacement data sets (e.g. set by tests); None keeps the loaded ones
+clubs = None
+competitions = None
+
+# Sorted points board, updated club by club as bookings happen
+pointsBoard = PointsBoard()
+repository.subscribe(lambda club, competition, places: pointsBoard.update(club))
+# Dashboard rows per competition, re-rendered when a booking changes its places
+competitionRows = CompetitionRows()
+repository.subscribe(lambda club, competition, places: competitionRows.invalidate(competition))
+repository.subscribe_reload(competitionRows.clear)
+# Places and points pushed to the open pages as bookings happen (/events)
+events = installEvents(app, repository, EventBroker(MAX_EVENT_STREAMS))
+
+
+# Return the repository, re-indexed if the data sets were replaced
+def getRepository():
+    repository.sync(clubs, competitions)
+    return repository
+
+
+# Sessions live on the server; the logged-in club is resolved by Flask-Login
+if SESSION_STORE == 'file':
+    app.session_interface = ServerSessionInterface(FileSessionStore(SESSION_DIR))
+else:
+    app.session_interface = ServerSessionInterface(MemorySessionStore(MAX_SESSIONS))
+clubLoader = ClubLoader(getRepository)
+loginManager = LoginManager(app)
+loginManager.user_loader(clubLoader)
+
+
+# Club whose bucket a request spends: only the logged-in one. A club named
+# in the form is client-controlled, and would let anyone drain its bucket;
+# anonymous clients are limited per IP.
+def requestClub():
+    if current_user.is_authenticated:
+        return current_user.get_id()
+    return None
+
+
+# Retry storms and login floods are shed with a 429 before reaching the routes
+app.config['RATE_LIMITING'] = os.environ.get('GUDLFT_RATE_LIMITING', '1') != '0'
+admission = installAdmission(app, metrics, requestClub, RATE_LIMITS)
+
+
+# Club acting in this request: the logged-in one (None if the client names
+# another club), else the club named by clients without a session
+def actingClub(data, name):
+    if current_user.is_authenticated:
+        club = current_user.club
+        return club if name is None or name == club['name'] else None
+    return data.club_by_name(name)
+
+
+# Current time from the configured clock
+def currentTime():
+    return app.config['CLOCK']()
+
+
+# Read the page/limit parameters; without a limit everything is listed
+def pageArgs():
+    try:
+        page = max(int(request.values.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    try:
+        limit = min(max(int(request.values['limit']), 1), MAX_PAGE_SIZE)
+    except (KeyError, ValueError):
+        limit = None
+    return page, limit
+
+
+# Stream a template chunk by chunk. The session is saved before a streamed
+# body renders, so pending flash messages are taken now (the template gets
+# them from the request) or they would be shown again on the next page.
+def streamTemplate(template, **context):
+    get_flashed_messages()
+    return stream_template(template, **context)
+
+
+# Render a template, or stream it chunk by chunk when asked to (?stream=1)
+def renderPage(template, **context):
+    if request.values.get('stream') == '1':
+        return streamTemplate(template, **context)
+    return render_template(template, **context)
+
 
-# Initialize data sets
-competitions = loadCompetitions()
-clubs = loadClubs()
+# Render the dashboard with upcoming competitions first (or only those)
+def renderWelcome(data, club):
+    if club:
+        for notice in waitlist.pop_notices(club):
+            flash(notice)
+    page, limit = pageArgs()
+    includePast = request.values.get('show') != 'upcoming'
+    offset = (page - 1) * limit if limit else 0
+    upcoming, past, total = data.competitions_page(currentTime(), offset, limit, includePast)
+    bookings = data.club_bookings(club) if club else {}
+    return renderPage('welcome.html', club=club, upcoming=upcoming, past=past, rows=competitionRows,
+                      bookings=bookings, page=page, limit=limit, total=total, upcoming_only=not includePast)
+
+
+# Queues for sold-out competitions, served when places are given back here
+# or by the other processes sharing the data. They are kept by this process:
+# run a single worker when clubs use the waitlists.
+waitlist = Waitlist(getRepository, currentTime, WAITLIST_ORDER, WAITLIST_FILE or None)
+repository.subscribe_changes(waitlist.on_changes)
+
+# JSON API for machine clients
+app.register_blueprint(createApi(getRepository, currentTime, pointsBoard, waitlist))
+
+
+# One-shot copy of the JSON files (and pending journal) into SQLite
+@app.cli.command('migrate-sqlite')
+@click.option('--db', default=SQLITE_DB, help='Target SQLite database file.')
+def migrateSqlite(db):
+    nbClubs, nbCompetitions = migrateJsonToSqlite(CLUBS_FILE, COMPETITIONS_FILE, JOURNAL_FILE, db)
+    click.echo(f"Migrated {nbClubs} clubs and {nbCompetitions} competitions to {db}")
+
+
+# One-shot copy of the JSON files (pending journal and bookings included) into Redis
+@app.cli.command('migrate-redis')
+@click.option('--url', default=REDIS_URL, help='Target Redis URL.')
+def migrateRedis(url):
+    nbClubs, nbCompetitions = migrateJsonToRedis(CLUBS_FILE, COMPETITIONS_FILE, JOURNAL_FILE, url)
+    click.echo(f"Migrated {nbClubs} clubs and {nbCompetitions} competitions to {url}")
 
 
 # Display the login page
@@ -35,114 +260,162 @@ def index():
 @app.route('/showSummary', methods=['POST'])
 def showSummary():
     # Attempt to find the club matching the provided email
-    try:
-        club = [club for club in clubs if club['email'] == request.form['email']][0]
-        return render_template('welcome.html', club=club, competitions=competitions)
-    except IndexError:
+    data = getRepository()
+    email = request.form.get('email')
+    # A logged-in club is taken from the session (e.g. when paging)
+    if current_user.is_authenticated and email in (None, current_user.club['email']):
+        return renderWelcome(data, current_user.club)
+    with phase('lookup'):
+        club = data.club_by_email(email)
+    if club is None:
         # Replaced login_message variable with flash()
         flash("Sorry, that email was not found.")
         return render_template('index.html')
+    login_user(clubLoader.remember(club))
+    return renderWelcome(data, club)
 
 
 # Display the booking form for a specific competition
 @app.route('/book/<competition>/<club>')
 def book(competition, club):
     # Retrieve specific club and competition objects
-    foundClubList = [c for c in clubs if c['name'] == club]
-    foundCompetitionList = [c for c in competitions if c['name'] == competition]
+    data = getRepository()
+    with phase('lookup'):
+        foundClub = actingClub(data, club)
+        foundCompetition = data.competition_by_name(competition)
 
-    if not foundClubList or not foundCompetitionList:
+    if foundClub is None or foundCompetition is None:
         flash("Something went wrong-please try again")
-        return render_template('welcome.html', club=None, competitions=competitions), 404
-
-    foundClub = foundClubList[0]
-    foundCompetition = foundCompetitionList[0]
+        return renderWelcome(data, None), 404
 
     # Check if competition is in the past
-    if foundCompetition['date'] < datetime.now().strftime("%Y-%m-%d %H:%M:%S"):
+    if data.is_past(foundCompetition, currentTime()):
         flash("This competition is over.")
-        return render_template('welcome.html', club=foundClub, competitions=competitions)
+        return renderWelcome(data, foundClub)
 
     if foundClub and foundCompetition:
         return render_template('booking.html', club=foundClub, competition=foundCompetition)
     else:
         # Error handling if data is missing
         flash("Something went wrong-please try again")
-        return render_template('welcome.html', club=club, competitions=competitions)
+        return renderWelcome(data, club)
 
 
 # Process the place purchase and update inventory
 @app.route('/purchasePlaces', methods=['POST'])
 def purchasePlaces():
     # Identify the competition and club from form data
-    competition_list = [c for c in competitions if c['name'] == request.form['competition']]
-    club_list = [c for c in clubs if c['name'] == request.form['club']]
+    data = getRepository()
+    with phase('lookup'):
+        competition = data.competition_by_name(request.form['competition'])
+        club = actingClub(data, request.form.get('club') if current_user.is_authenticated
+                          else request.form['club'])
 
     # Handle missing data without crashing
-    if not competition_list or not club_list:
+    if competition is None or club is None:
         flash("Something went wrong-please try again")
-        return render_template('welcome.html', club=None, competitions=competitions), 404
+        return renderWelcome(data, None), 404
 
-    competition = competition_list[0]
-    club = club_list[0]
+    try:
+        with phase('validation'):
+            placesRequired = checkBooking(data, club, competition, request.form['places'], currentTime())
+        # Deduct places and points in one atomic step; the checks above are re-done
+        # inside it since a concurrent booking may have consumed them meanwhile
+        with phase('persistence'):
+            data.reserve(club, competition, placesRequired, cap=MAX_PLACES_PER_CLUB)
+    except ReservationError as error:
+        flash(str(error))
+        return renderWelcome(data, club)
+    flash('Great-booking complete!')
+    return renderWelcome(data, club)
 
-    # Double check if competition is in the past during purchase
-    if competition['date'] < datetime.now().strftime("%Y-%m-%d %H:%M:%S"):
-        flash("This competition is over.")
-        return render_template('welcome.html', club=club, competitions=competitions)
 
-    # Handle non-numeric input for places
+# Cancel places of a booking (all of them without a number) for a refund
+@app.route('/cancelPlaces', methods=['POST'])
+def cancelPlaces():
+    data = getRepository()
+    with phase('lookup'):
+        competition = data.competition_by_name(request.form['competition'])
+        club = actingClub(data, request.form.get('club') if current_user.is_authenticated
+                          else request.form['club'])
+
+    if competition is None or club is None:
+        flash("Something went wrong-please try again")
+        return renderWelcome(data, None), 404
+
     try:
-        placesRequired = int(request.form['places'])
-    except ValueError:
-        flash("Invalid quantity.")
-        return render_template('welcome.html', club=club, competitions=competitions)
-
-    # Check if quantity is negative or zero
-    if placesRequired <= 0:
-        flash("Invalid quantity.")
-        return render_template('welcome.html', club=club, competitions=competitions)
-
-    # Check if the competition has enough places
-    if placesRequired > int(competition['numberOfPlaces']):
-        flash("Not enough places")
-        return render_template('welcome.html', club=club, competitions=competitions)
-
-    # Limit booking to 12 places per transaction
-    if placesRequired > 12:
-        flash("You cannot book more than 12 places")
-        return render_template('welcome.html', club=club, competitions=competitions)
-
-    # Check if the club has enough points
-    if placesRequired > int(club['points']):
-        flash("Not enough points")
-        return render_template('welcome.html', club=club, competitions=competitions)
-
-    # Deduct requested places from competition capacity
-    competition['numberOfPlaces'] = int(competition['numberOfPlaces'])-placesRequired
-    club['points'] = int(club['points'])-placesRequired
-    # Save updated data to JSON files
-    with open('clubs.json', 'w') as c:
-        json.dump({'clubs': clubs}, c)
-    with open('competitions.json', 'w') as comps:
-        json.dump({'competitions': competitions}, comps)
-    flash('Great-booking complete!')
-    return render_template('welcome.html', club=club, competitions=competitions)
+        with phase('persistence'):
+            placesCancelled = placeCancellation(data, club, competition, request.form.get('places'),
+                                                currentTime())
+    except ReservationError as error:
+        flash(str(error))
+        return renderWelcome(data, club)
+    flash(f"Booking cancelled: {placesCancelled} place(s) refunded.")
+    return renderWelcome(data, club)
+
+
+# Queue the club for places on a sold-out competition instead of retrying
+@app.route('/joinWaitlist', methods=['POST'])
+def joinWaitlist():
+    data = getRepository()
+    with phase('lookup'):
+        competition = data.competition_by_name(request.form['competition'])
+        club = actingClub(data, request.form.get('club') if current_user.is_authenticated
+                          else request.form['club'])
+
+    if competition is None or club is None:
+        flash("Something went wrong-please try again")
+        return renderWelcome(data, None), 404
+
+    try:
+        position = waitlist.join(club, competition, request.form['places'], currentTime())
+    except ReservationError as error:
+        flash(str(error))
+        return renderWelcome(data, club)
+    flash(f"You are number {position} on the waitlist for {competition['name']}.")
+    return renderWelcome(data, club)
 
 
 # Route to display the points board for all clubs
 @app.route('/pointsDisplay')
 def pointsDisplay():
-    # Sort clubs by name to provide a clear, organized list for the user
+    # Clubs are listed by name, or by points for a leaderboard (?order=points)
     # Note: This route is public and does not require a login, fulfilling TU15 requirements
-    sorted_clubs = sorted(clubs, key=lambda x: x['name'])
-
-    # Render the points-display.html template and pass the list of clubs
-    # This allows the template to iterate over the data and display names and points
-    return render_template('points-display.html', clubs=sorted_clubs)
-
-
-# Log out the user and return to index
+    order = request.args.get('order', 'name')
+    if order not in ORDERS:
+        order = 'name'
+    data = getRepository()
+    with phase('lookup'):
+        pointsBoard.refresh(data)
+    page, limit = pageArgs()
+
+    def render(renderer=render_template):
+        # Render the points-display.html template and pass the list of clubs
+        # This allows the template to iterate over the data and display names and points
+        start, stop = ((page - 1) * limit, page * limit) if limit else (0, None)
+        return renderer('points-display.html', clubs=pointsBoard.clubs(order, start, stop),
+                        order=order, page=page, limit=limit, total=len(pointsBoard))
+
+    # Streamed pages go out as they render and are not cached
+    if request.args.get('stream') == '1':
+        return render(streamTemplate)
+
+    # Pending flash messages are personal, so such a page is never cached,
+    # nor are pages past the last one (any number can be asked for)
+    if session.get('_flashes') or limit and page > 1 and (page - 1) * limit >= len(pointsBoard):
+        return render()
+
+    # Serve the cached page, or a 304 if the client already has it
+    html, etag, lastModified = pointsBoard.page((order, page, limit), render)
+    response = make_response(html)
+    response.set_etag(etag)
+    response.last_modified = lastModified
+    return response.make_conditional(request)
+
+
+# Log out the user, drop their session and return to index
 @app.route('/logout')
 def logout():
+    logout_user()
+    session.clear()
     return redirect(url_for('index'))
\ No newline at end of file
@@ -0,0 +1,175 @@
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+# Session ids are secrets.token_urlsafe(32); anything else in the cookie is ignored
+SID_PATTERN = re.compile(r'[A-Za-z0-9_-]{43}')
+serializer = TaggedJSONSerializer()
+# Seconds between two sweeps of the expired sessions of a store
+SWEEP_INTERVAL = 300
+# Session keys that alone are not worth storing: flash messages of an
+# anonymous client are shown by the page that flashes them
+TRANSIENT_KEYS = frozenset(('_flashes',))
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """
+    Session whose data stays on the server; the cookie only carries its id.
+    """
+
+    def __init__(self, initial=None, sid=None):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+
+
+class MemorySessionStore:
+    """
+    In-process session store, dropping the least recently used sessions past
+    max_sessions, and the expired ones every SWEEP_INTERVAL seconds.
+    Sessions are kept serialized so requests never share state.
+    """
+
+    def __init__(self, max_sessions=10000, clock=time.time):
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self._next_sweep = clock() + SWEEP_INTERVAL
+
+    def load(self, sid):
+        with self.lock:
+            entry = self._sessions.get(sid)
+            if entry is None:
+                return None
+            expires, payload = entry
+            if expires < self.clock():
+                del self._sessions[sid]
+                return None
+            self._sessions.move_to_end(sid)
+        return serializer.loads(payload)
+
+    def save(self, sid, data, expires):
+        payload = serializer.dumps(dict(data))
+        now = self.clock()
+        with self.lock:
+            if now >= self._next_sweep:
+                self._next_sweep = now + SWEEP_INTERVAL
+                for expired in [key for key, (until, _) in self._sessions.items() if until < now]:
+                    del self._sessions[expired]
+            self._sessions[sid] = (expires, payload)
+            self._sessions.move_to_end(sid)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, sid):
+        with self.lock:
+            self._sessions.pop(sid, None)
+
+
+class FileSessionStore:
+    """
+    Session store with one file per session in a local folder, so that the
+    worker processes of one host share their sessions. A file's mtime is set
+    to the session's expiry, so that the sweep run every SWEEP_INTERVAL
+    seconds deletes the expired files without reading them.
+    """
+
+    def __init__(self, directory, clock=time.time):
+        self.directory = directory
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self._next_sweep = clock()
+
+    def _path(self, sid):
+        return os.path.join(self.directory, sid)
+
+    def load(self, sid):
+        try:
+            with open(self._path(sid)) as f:
+                entry = serializer.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if entry['expires'] < self.clock():
+            self.delete(sid)
+            return None
+        return entry['data']
+
+    def save(self, sid, data, expires):
+        now = self.clock()
+        if now >= self._next_sweep:
+            self._next_sweep = now + SWEEP_INTERVAL
+            self.sweep(now)
+        tmp_path = self._path(sid) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(serializer.dumps({'expires': expires, 'data': dict(data)}))
+        os.utime(tmp_path, (expires, expires))
+        os.replace(tmp_path, self._path(sid))
+
+    # Delete the expired session files (and temporary files left by a crash)
+    def sweep(self, now):
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    stale = entry.stat().st_mtime < now - SWEEP_INTERVAL if entry.name.endswith('.tmp') \
+                        else entry.stat().st_mtime < now
+                    if stale:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Flask session interface over a pluggable store (memory or file).
+    Unchanged sessions are not written back.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and SID_PATTERN.fullmatch(sid):
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSession(data, sid)
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session.modified:
+            return
+        if not session.keys() - TRANSIENT_KEYS:
+            # Emptied (e.g. on logout), or only holding an anonymous client's
+            # flash messages: forget it on both sides
+            if session.sid is not None:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        sid = session.sid or secrets.token_urlsafe(32)
+        expires = self.get_expiration_time(app, session)
+        lifetime = expires.timestamp() if expires else time.time() + app.permanent_session_lifetime.total_seconds()
+        self.store.save(sid, session, lifetime)
+        response.set_cookie(name, sid, expires=expires, path=path, domain=domain,
+                            httponly=self.get_cookie_httponly(app),
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
+        response.vary.add('Cookie')
@@ -0,0 +1,46 @@
+// Live places and points: the figures of the page (elements carrying
+// data-places / data-points) are updated in place from the /events stream,
+// instead of reloading the page to watch them change.
+(function () {
+    var script = document.currentScript;
+
+    function figures(attribute, name) {
+        return Array.prototype.filter.call(document.querySelectorAll('[' + attribute + ']'), function (element) {
+            return element.getAttribute(attribute) === name;
+        });
+    }
+
+    // Replace the number ending the element's text ("Number of Places: 12")
+    function show(elements, value) {
+        elements.forEach(function (element) {
+            element.textContent = element.textContent.replace(/-?\d+(\s*)$/, value + '$1');
+        });
+    }
+
+    function staleNotice() {
+        if (document.getElementById('live-stale')) {
+            return;
+        }
+        var notice = document.createElement('p');
+        notice.id = 'live-stale';
+        notice.className = 'flash-message';
+        notice.textContent = 'Live updates were interrupted: reload the page for the latest figures.';
+        document.querySelector('.container').prepend(notice);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        if (!window.EventSource || !document.querySelector('[data-places], [data-points]')) {
+            return;
+        }
+        var source = new EventSource(script.dataset.events);
+        source.addEventListener('places', function (event) {
+            var data = JSON.parse(event.data);
+            show(figures('data-places', data.competition), data.places);
+        });
+        source.addEventListener('points', function (event) {
+            var data = JSON.parse(event.data);
+            show(figures('data-points', data.club), data.points);
+        });
+        source.addEventListener('stale', staleNotice);
+    });
+})();
@@ -0,0 +1,3 @@
+"""
+Package initialization for tests.
+"""
\ No newline at end of file
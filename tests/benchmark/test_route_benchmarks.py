@@ -0,0 +1,150 @@
+# tests/benchmark/test_route_benchmarks.py
+import json
+import os
+import time
+import tracemalloc
+from itertools import cycle, product
+import pytest
+from datagen import generateClubs, generateCompetitions
+from server import app
+
+# The full run (GUDLFT_BENCHMARK=1 python -m pytest tests/benchmark) measures
+# every size and writes the results; the normal suite runs a quick check on
+# the two smallest sizes
+FULL = os.environ.get('GUDLFT_BENCHMARK') == '1'
+SIZES = sorted(int(size) for size in os.environ.get('GUDLFT_BENCH_SIZES', '10,1000,100000').split(','))
+if not FULL:
+    SIZES = SIZES[:2]
+OUTPUT = os.environ.get('GUDLFT_BENCH_OUTPUT', 'benchmark_results.json')
+BASELINE = os.environ.get('GUDLFT_BENCH_BASELINE', os.path.join(os.path.dirname(__file__), 'baseline.json'))
+# Allowed growth of a route's p50 from the smallest size, over the growth
+# recorded in the baseline, before the route counts as regressed. Ratios
+# between sizes carry over from one machine to another, milliseconds do not.
+THRESHOLD = float(os.environ.get('GUDLFT_BENCH_THRESHOLD', '1.0'))
+ALLOCATION_SAMPLES = 3
+QUICK_ITERATIONS = 20
+
+results = {}
+
+
+# Fewer iterations for bigger data sets so the whole run stays bounded
+def iterationsFor(size):
+    if not FULL:
+        return QUICK_ITERATIONS
+    return max(10, min(200, 200000 // size))
+
+
+# p50 of a route at size over its p50 at the smallest size of the same run
+def growth(run, route, size):
+    return run[route][str(size)]['p50_ms'] / run[route][str(SIZES[0])]['p50_ms']
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# Time `call` and sample its peak allocations; returns the route statistics
+def measure(call, iterations):
+    call()  # warm-up (template compilation, caches)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOCATION_SAMPLES):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        'iterations': iterations,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'peak_alloc_bytes': max(peaks),
+    }
+
+
+@pytest.fixture(scope='module', autouse=True)
+def write_results():
+    """
+    Action: Collects every measurement of the module.
+    Expected: Results of a full run are written as JSON once all sizes ran.
+    """
+    yield
+    if not FULL:
+        return
+    with open(OUTPUT, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    if os.environ.get('GUDLFT_BENCH_UPDATE_BASELINE') == '1':
+        with open(BASELINE, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+class TestRouteBenchmarks:
+    """
+    In-process benchmarks of the main routes on generated data sets.
+    Records latency percentiles and allocations, and fails when a route
+    slows down with the data size faster than in the recorded baseline.
+    """
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_routes_scale(self, mocker, fixed_clock, size):
+        """
+        Action: Hit showSummary, book, purchasePlaces and pointsDisplay on
+        `size` clubs and `size` competitions.
+        Expected: Results recorded; no p50 grows from the smallest size by
+        more than the baseline's growth * (1 + threshold).
+        """
+        clubs = generateClubs(size, seed=size, min_points=10 ** 6, max_points=10 ** 6)
+        competitions = generateCompetitions(size, seed=size, now=fixed_clock,
+                                            min_places=10 ** 6, max_places=10 ** 6)
+        mocker.patch('server.clubs', clubs)
+        mocker.patch('server.competitions', competitions)
+        club = clubs[size // 2]
+        upcoming = [c for c in competitions if c['date'] > str(fixed_clock)]
+        competition = upcoming[-1]
+        app.config['TESTING'] = True
+        client = app.test_client()
+        # Each purchase books for another club and competition, so that no
+        # pair reaches the 12-place cap and every call times a real booking
+        buyer = app.test_client()
+        pairs = cycle(product(clubs, upcoming))
+
+        def purchase():
+            buyerClub, buyerCompetition = next(pairs)
+            response = buyer.post('/purchasePlaces', data={
+                'club': buyerClub['name'], 'competition': buyerCompetition['name'], 'places': '1'})
+            assert b'Great-booking complete!' in response.data
+            return response
+
+        routes = {
+            'showSummary': lambda: client.post('/showSummary', data={'email': club['email']}),
+            'book': lambda: client.get(f"/book/{competition['name']}/{club['name']}"),
+            'purchasePlaces': purchase,
+            'pointsDisplay': lambda: client.get('/pointsDisplay'),
+        }
+        iterations = iterationsFor(size)
+        for route, call in routes.items():
+            assert call().status_code == 200
+            results.setdefault(route, {})[str(size)] = measure(call, iterations)
+
+        if size == SIZES[0] or not os.path.exists(BASELINE) \
+                or any(str(SIZES[0]) not in results[route] for route in routes):
+            return
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{route} @ {size}: p50 x{growth(results, route, size):.1f} from {SIZES[0]} "
+            f"vs x{growth(baseline, route, size):.1f} in the baseline"
+            for route in routes
+            if {str(SIZES[0]), str(size)} <= set(baseline.get(route, {}))
+            and growth(results, route, size) > growth(baseline, route, size) * (1 + THRESHOLD)
+        ]
+        assert not regressions, "Route regressions: " + "; ".join(regressions)
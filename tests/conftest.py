@@ -0,0 +1,53 @@
+# tests/conftest.py
+from datetime import datetime
+import pytest
+import server
+from journal import BookingJournal
+
+
+@pytest.fixture(autouse=True)
+def fixed_clock(monkeypatch):
+    """
+    Action: Pins the server clock to 2026-01-01 10:00:00.
+    Expected: Past/upcoming checks no longer depend on the day the suite runs.
+    """
+    now = datetime(2026, 1, 1, 10, 0, 0)
+    monkeypatch.setitem(server.app.config, 'CLOCK', lambda: now)
+    return now
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(monkeypatch):
+    """
+    Action: Turns the rate limiter and concurrency gates off.
+    Expected: Tests can fire requests as fast as they like; the limiter's own
+    tests turn it back on.
+    """
+    monkeypatch.setitem(server.app.config, 'RATE_LIMITING', False)
+
+
+@pytest.fixture(autouse=True)
+def isolated_journal(tmp_path, monkeypatch):
+    """
+    Action: Points the booking journal and its snapshots at a temporary folder.
+    Expected: Bookings made by tests never touch the real data files.
+    """
+    journal = BookingJournal(
+        str(tmp_path / 'bookings.journal'),
+        str(tmp_path / 'clubs.json'),
+        str(tmp_path / 'competitions.json'),
+        source=lambda: (server.repository.clubs, server.repository.competitions),
+        lock=server.dataLock
+    )
+    monkeypatch.setattr(server.repository, 'journal', journal)
+    yield journal
+    journal.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_waitlist(tmp_path, monkeypatch):
+    """
+    Action: Points the waitlist file at a temporary folder.
+    Expected: Queues joined by tests are never saved next to the real data files.
+    """
+    monkeypatch.setattr(server.waitlist, 'path', str(tmp_path / 'waitlist.json'))
@@ -0,0 +1,151 @@
+# tests/integration/test_api.py
+import gzip
+import pytest
+from server import app
+
+
+class TestApi:
+    """
+    Integration test suite for the /api/v1 JSON endpoints.
+    Validates payloads, booking rules, compression and conditional GETs.
+    """
+
+    @pytest.fixture
+    def client(self, mocker):
+        """
+        Action: Initializes the Flask test client over a small data set.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        mocker.patch('server.clubs', [
+            {'name': 'Club', 'email': 'c@c.co', 'points': '20'},
+            {'name': 'Other', 'email': 'o@c.co', 'points': '3'}
+        ])
+        mocker.patch('server.competitions', [
+            {'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'},
+            {'name': 'Past Comp', 'date': '2020-01-01 10:00:00', 'numberOfPlaces': '10'}
+        ])
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_clubs_hide_emails(self, client):
+        """
+        Action: GET /api/v1/clubs.
+        Expected: Names and integer points, without the secretary emails.
+        """
+        response = client.get('/api/v1/clubs')
+
+        assert response.status_code == 200
+        assert response.get_json()['clubs'][0] == {'name': 'Club', 'points': 20}
+
+    def test_competitions_flag_past_events(self, client):
+        """
+        Action: GET /api/v1/competitions, then with show=upcoming.
+        Expected: Past competitions are flagged, and left out on request.
+        """
+        full = client.get('/api/v1/competitions').get_json()
+        upcoming = client.get('/api/v1/competitions?show=upcoming').get_json()
+
+        assert [(c['name'], c['past']) for c in full['competitions']] == [('Comp', False), ('Past Comp', True)]
+        assert [c['name'] for c in upcoming['competitions']] == ['Comp']
+
+    def test_points_board_by_points(self, client):
+        """
+        Action: GET /api/v1/pointsBoard?order=points.
+        Expected: Clubs listed from the highest to the lowest balance.
+        """
+        response = client.get('/api/v1/pointsBoard?order=points')
+
+        assert [c['name'] for c in response.get_json()['clubs']] == ['Club', 'Other']
+
+    def test_booking_success_and_rules(self, client):
+        """
+        Action: POST /api/v1/bookings with valid and invalid quantities.
+        Expected: 201 with updated balances, then 400 with the purchasePlaces messages.
+        """
+        ok = client.post('/api/v1/bookings', json={'club': 'Club', 'competition': 'Comp', 'places': 5})
+        too_many = client.post('/api/v1/bookings', json={'club': 'Club', 'competition': 'Comp', 'places': 13})
+        no_points = client.post('/api/v1/bookings', json={'club': 'Other', 'competition': 'Comp', 'places': 4})
+        past = client.post('/api/v1/bookings', json={'club': 'Club', 'competition': 'Past Comp', 'places': 1})
+        unknown = client.post('/api/v1/bookings', json={'club': 'Nobody', 'competition': 'Comp', 'places': 1})
+
+        assert ok.status_code == 201
+        assert ok.get_json()['club']['points'] == 15
+        assert ok.get_json()['competition']['numberOfPlaces'] == 20
+        assert too_many.status_code == 400
+        assert too_many.get_json()['error'] == 'You cannot book more than 12 places'
+        assert no_points.get_json()['error'] == 'Not enough points'
+        assert past.get_json()['error'] == 'This competition is over.'
+        assert unknown.status_code == 404
+
+    def test_malformed_payloads_are_refused(self, client):
+        """
+        Action: POST bookings with a non-object body, a list as club, and 2.7, true or 2.0 as places.
+        Expected: HTTP 400 each time and nothing booked.
+        """
+        payloads = [[1, 2], 'Club', {'club': ['Club'], 'competition': 'Comp', 'places': 1},
+                    {'club': 'Club', 'competition': 'Comp', 'places': 2.7},
+                    {'club': 'Club', 'competition': 'Comp', 'places': True},
+                    {'club': 'Club', 'competition': 'Comp', 'places': 2.0}]
+
+        for payload in payloads:
+            for path in ('/api/v1/bookings', '/api/v1/bookings/cancel', '/api/v1/waitlist'):
+                response = client.post(path, json=payload)
+                assert response.status_code == 400, (path, payload)
+                assert 'error' in response.get_json()
+        assert client.get('/api/v1/clubs').get_json()['clubs'][0]['points'] == 20
+
+    def test_numeric_string_places_are_accepted(self, client):
+        """
+        Action: POST a booking with places given as the string "2".
+        Expected: HTTP 201 and 2 places booked.
+        """
+        response = client.post('/api/v1/bookings', json={'club': 'Club', 'competition': 'Comp', 'places': '2'})
+
+        assert response.status_code == 201
+        assert response.get_json()['places'] == 2
+
+    def test_conditional_get_and_invalidation(self, client):
+        """
+        Action: GET /api/v1/clubs with its ETag before and after a booking.
+        Expected: 304 while unchanged, 200 once the points changed.
+        """
+        first = client.get('/api/v1/clubs')
+        etag = first.headers['ETag']
+
+        unchanged = client.get('/api/v1/clubs', headers={'If-None-Match': etag})
+        client.post('/api/v1/bookings', json={'club': 'Club', 'competition': 'Comp', 'places': 1})
+        changed = client.get('/api/v1/clubs', headers={'If-None-Match': etag})
+
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+        assert changed.get_json()['clubs'][0]['points'] == 19
+
+    def test_large_payload_is_gzipped(self, mocker, client):
+        """
+        Action: GET /api/v1/clubs over many clubs with Accept-Encoding: gzip.
+        Expected: A gzip-encoded body that decodes to the full JSON payload.
+        """
+        mocker.patch('server.clubs', [
+            {'name': 'Club %d' % i, 'email': 'c%d@c.co' % i, 'points': '10'} for i in range(100)
+        ])
+
+        response = client.get('/api/v1/clubs', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert b'Club 99' in gzip.decompress(response.data)
+
+    def test_large_payload_prefers_brotli(self, mocker, client):
+        """
+        Action: GET /api/v1/clubs over many clubs accepting both br and gzip.
+        Expected: A brotli-encoded body when the brotli package is installed.
+        """
+        brotli = pytest.importorskip('brotli')
+        mocker.patch('server.clubs', [
+            {'name': 'Club %d' % i, 'email': 'c%d@c.co' % i, 'points': '10'} for i in range(100)
+        ])
+
+        response = client.get('/api/v1/clubs', headers={'Accept-Encoding': 'gzip, br'})
+
+        assert response.headers['Content-Encoding'] == 'br'
+        assert b'Club 99' in brotli.decompress(response.data)
@@ -0,0 +1,243 @@
+# tests/integration/test_asgi.py
+import asyncio
+import threading
+import pytest
+import server
+from asgi import WsgiToAsgi, application
+
+
+# Drive one HTTP request through an ASGI app; returns (status, headers, body chunks).
+# The client stays until the response is complete, or leaves after
+# leave_after body chunks.
+def call(app, method, path, body=b'', query=b'', headers=(), leave_after=None):
+    async def run():
+        incoming = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+        gone = asyncio.Event()
+
+        async def receive():
+            if incoming:
+                return incoming.pop(0)
+            await gone.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if message['type'] == 'http.response.body':
+                nb_chunks = sum(1 for m in sent if m['type'] == 'http.response.body' and m['body'])
+                if not message['more_body'] or nb_chunks == leave_after:
+                    gone.set()
+
+        scope = {'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+                 'path': path, 'root_path': '', 'query_string': query,
+                 'headers': [(name.encode(), value.encode()) for name, value in headers],
+                 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000)}
+        await app(scope, receive, send)
+        return sent
+
+    sent = asyncio.run(run())
+    start = sent[0]
+    chunks = [message['body'] for message in sent[1:] if message['body']]
+    if leave_after is None:
+        assert sent[-1]['more_body'] is False
+    return start['status'], dict(start['headers']), chunks
+
+
+class TestAsgi:
+    """
+    Integration test suite for the ASGI entry point.
+    Validates that the Flask routes are served through the thread-pool adapter.
+    """
+
+    @pytest.fixture(autouse=True)
+    def data(self, mocker):
+        """
+        Action: Loads one club and one upcoming competition.
+        Expected: Routes run against the mocked data sets.
+        """
+        clubs = [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}]
+        competitions = [{'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}]
+        mocker.patch('server.clubs', clubs)
+        mocker.patch('server.competitions', competitions)
+        return clubs, competitions
+
+    def test_index(self):
+        """
+        Action: GET / through the ASGI application.
+        Expected: HTTP 200 with an HTML body.
+        """
+        status, headers, chunks = call(application, 'GET', '/')
+
+        assert status == 200
+        assert headers[b'content-type'].startswith(b'text/html')
+        assert b'GUDLFT' in b''.join(chunks)
+
+    def test_purchase_places(self, data):
+        """
+        Action: POST a form-encoded booking of 3 places.
+        Expected: The booking is confirmed and points/places are deducted.
+        """
+        clubs, competitions = data
+
+        status, _, chunks = call(application, 'POST', '/purchasePlaces',
+                                 body=b'club=Club&competition=Comp&places=3',
+                                 headers=[('content-type', 'application/x-www-form-urlencoded')])
+
+        assert status == 200
+        assert b'Great-booking complete!' in b''.join(chunks)
+        assert int(clubs[0]['points']) == 17
+        assert int(competitions[0]['numberOfPlaces']) == 22
+
+    def test_streamed_page_arrives_in_chunks(self):
+        """
+        Action: POST /showSummary with stream=1.
+        Expected: The page is sent as several body messages.
+        """
+        status, _, chunks = call(application, 'POST', '/showSummary', query=b'stream=1',
+                                 body=b'email=c%40c.co',
+                                 headers=[('content-type', 'application/x-www-form-urlencoded')])
+
+        assert status == 200
+        assert len(chunks) > 1
+        assert b'Comp' in b''.join(chunks)
+
+    def test_event_stream_stops_when_client_leaves(self, monkeypatch):
+        """
+        Action: GET /events from a client that disconnects after the first chunk.
+        Expected: The stream ends at its next keep-alive and frees its slot and pool thread.
+        """
+        monkeypatch.setattr(server.events, 'heartbeat', 0.05)
+        status, headers, chunks = call(application, 'GET', '/events', leave_after=1)
+
+        assert status == 200
+        assert headers[b'content-type'].startswith(b'text/event-stream')
+        assert chunks[0].startswith(b'retry: ')
+        assert server.events.streams == 0
+
+    def test_event_streams_run_in_their_own_pool(self):
+        """
+        Action: Open a stream on an adapter with one route thread, then GET a route.
+        Expected: The route is served while the stream holds its stream thread.
+        """
+        opened, release = threading.Event(), threading.Event()
+
+        def streamingApp(environ, startResponse):
+            startResponse('200 OK', [('Content-Type', 'text/plain')])
+            if environ['PATH_INFO'] == '/events':
+                opened.set()
+                release.wait(5)
+            return [b'done']
+
+        adapter = WsgiToAsgi(streamingApp, threads=1, stream_paths=['/events'], stream_threads=1)
+        stream = threading.Thread(target=call, args=(adapter, 'GET', '/events'))
+        stream.start()
+        assert opened.wait(5)
+
+        status, _, chunks = call(adapter, 'GET', '/')
+        release.set()
+        stream.join(5)
+
+        assert (status, chunks) == (200, [b'done'])
+
+    def test_bodies_over_the_limit_are_refused(self):
+        """
+        Action: POST an announced 11-byte body, then send 6-byte chunks without
+        a length, to an adapter accepting 10 bytes.
+        Expected: Both get a 413 without running the app; a body of 10 bytes is accepted.
+        """
+        calls = []
+
+        def wsgiApp(environ, startResponse):
+            calls.append(environ['wsgi.input'].read())
+            startResponse('200 OK', [('Content-Type', 'text/plain')])
+            return [b'ok']
+        adapter = WsgiToAsgi(wsgiApp, threads=1, max_body=10)
+
+        async def chunked():
+            incoming = [{'type': 'http.request', 'body': b'x' * 6, 'more_body': True}] * 3
+            sent = []
+
+            async def receive():
+                return incoming.pop(0)
+
+            async def send(message):
+                sent.append(message)
+            scope = {'type': 'http', 'method': 'POST', 'path': '/', 'headers': []}
+            await adapter(scope, receive, send)
+            return sent[0]['status']
+
+        announced = call(adapter, 'POST', '/', body=b'x' * 11, headers=[('content-length', '11')])
+        assert announced[0] == 413
+        assert asyncio.run(chunked()) == 413
+        assert calls == []
+        assert call(adapter, 'POST', '/', body=b'x' * 10, headers=[('content-length', '10')])[0] == 200
+        assert calls == [b'x' * 10]
+        assert application.max_body == server.app.config['MAX_CONTENT_LENGTH']
+
+    def test_lifespan_shuts_down_the_pool(self, mocker):
+        """
+        Action: Run the ASGI lifespan startup and shutdown on a fresh adapter.
+        Expected: Both complete and the thread pool is shut down.
+        """
+        adapter = WsgiToAsgi(mocker.Mock(), threads=1)
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(adapter({'type': 'lifespan'}, receive, send))
+
+        assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        assert adapter.executor._shutdown
+        assert adapter.stream_executor._shutdown
+
+    def test_shutdown_with_a_request_in_flight(self):
+        """
+        Action: Start a slow request, cancel it as the server does after its
+        graceful timeout, then shut the lifespan down while the request still runs.
+        Expected: The shutdown completes; the drain callback released the
+        request, which stops sending instead of waiting for the loop.
+        """
+        started, release = threading.Event(), threading.Event()
+
+        def slowApp(environ, startResponse):
+            startResponse('200 OK', [('Content-Type', 'text/plain')])
+            started.set()
+            release.wait(5)
+            yield b'late'
+
+        adapter = WsgiToAsgi(slowApp, threads=1, on_drain=[release.set])
+        messages = [{'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def run():
+            async def receiveRequest():
+                await asyncio.sleep(3600)
+
+            async def send(message):
+                sent.append(message['type'])
+
+            scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': []}
+            incoming = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+            async def receive():
+                return incoming.pop(0) if incoming else await receiveRequest()
+
+            request = asyncio.create_task(adapter(scope, receive, send))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            request.cancel()
+
+            async def receiveLifespan():
+                return messages.pop(0)
+            await asyncio.wait_for(adapter({'type': 'lifespan'}, receiveLifespan, send), 10)
+
+        asyncio.run(run())
+
+        assert release.is_set()
+        assert sent[-1] == 'lifespan.shutdown.complete'
+        assert 'http.response.body' not in sent
+        assert adapter.executor._shutdown
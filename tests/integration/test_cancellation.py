@@ -0,0 +1,78 @@
+# tests/integration/test_cancellation.py
+import pytest
+import server
+from server import app
+
+
+class TestCancellation:
+    """
+    Integration test suite for the bookings ledger: the 12-place cap across
+    bookings, cancellations with refunds and the per-club history.
+    """
+
+    @pytest.fixture
+    def client(self, mocker):
+        """
+        Action: Loads a club with 20 points and an upcoming competition.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        self.clubs = [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}]
+        self.comps = [{'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}]
+        mocker.patch('server.clubs', self.clubs)
+        mocker.patch('server.competitions', self.comps)
+        server.competitionRows.clear()
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def book(self, client, places):
+        return client.post('/purchasePlaces', data={'club': 'Club', 'competition': 'Comp', 'places': places})
+
+    def test_cap_counts_earlier_bookings(self, client):
+        """
+        Action: Book 8 places, then 5 more on the same competition.
+        Expected: The second booking is refused by the 12-place cap.
+        """
+        self.book(client, '8')
+        response = self.book(client, '5')
+
+        assert b'You cannot book more than 12 places' in response.data
+        assert self.clubs[0]['points'] == 12
+
+    def test_cancel_refunds_points_and_places(self, client):
+        """
+        Action: Book 6 places, then cancel 4 from the dashboard.
+        Expected: 4 points and places are given back and 2 places stay booked.
+        """
+        self.book(client, '6')
+        response = client.post('/cancelPlaces', data={'club': 'Club', 'competition': 'Comp', 'places': '4'})
+
+        assert b'Booking cancelled: 4 place(s) refunded.' in response.data
+        assert b'Comp: 2 place(s)' in response.data
+        assert self.clubs[0]['points'] == 18
+        assert self.comps[0]['numberOfPlaces'] == 23
+
+    def test_cancel_without_booking_is_refused(self, client):
+        """
+        Action: Cancel places the club never booked.
+        Expected: An error is flashed and nothing changes.
+        """
+        response = client.post('/cancelPlaces', data={'club': 'Club', 'competition': 'Comp'})
+
+        assert b'You have no booking to cancel.' in response.data
+        assert self.clubs[0]['points'] == 20
+
+    def test_cancel_and_history_api(self, client):
+        """
+        Action: Book 3 places, cancel them all through the API, read the history.
+        Expected: HTTP 200 with 3 places cancelled; nothing held, both lines listed.
+        """
+        self.book(client, '3')
+        cancelled = client.post('/api/v1/bookings/cancel', json={'club': 'Club', 'competition': 'Comp'})
+        bookings = client.get('/api/v1/clubs/Club/bookings').get_json()
+
+        assert cancelled.status_code == 200
+        assert cancelled.get_json()['places'] == 3
+        assert bookings['bookings'] == {}
+        assert bookings['history'] == [{'competition': 'Comp', 'places': 3},
+                                       {'competition': 'Comp', 'places': -3}]
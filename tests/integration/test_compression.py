@@ -0,0 +1,95 @@
+# tests/integration/test_compression.py
+import gzip
+import re
+import pytest
+import server
+from server import app
+
+
+class TestCompression:
+    """
+    Integration test suite for the response compression and static asset layer.
+    """
+
+    @pytest.fixture
+    def client(self, mocker):
+        """
+        Action: Loads enough clubs for a points board worth compressing.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        mocker.patch('server.clubs', [
+            {'name': 'Club %d' % i, 'email': 'c%d@c.co' % i, 'points': '10'} for i in range(50)
+        ])
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_pages_are_gzipped_on_request(self, client):
+        """
+        Action: GET /pointsDisplay with and without Accept-Encoding: gzip.
+        Expected: The same page, gzip-encoded only when accepted.
+        """
+        plain = client.get('/pointsDisplay')
+        encoded = client.get('/pointsDisplay', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in plain.headers
+        assert encoded.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in encoded.headers['Vary']
+        assert gzip.decompress(encoded.data) == plain.data
+
+    def test_brotli_is_preferred(self, client):
+        """
+        Action: GET /pointsDisplay accepting both br and gzip.
+        Expected: A brotli-encoded page when the brotli package is installed.
+        """
+        brotli = pytest.importorskip('brotli')
+
+        response = client.get('/pointsDisplay', headers={'Accept-Encoding': 'gzip, br'})
+
+        assert response.headers['Content-Encoding'] == 'br'
+        assert b'Club 49' in brotli.decompress(response.data)
+
+    def test_unchanged_page_is_compressed_once(self, client, mocker):
+        """
+        Action: GET the same points board page twice with gzip.
+        Expected: The body is compressed once, then served from the cache.
+        """
+        compress = mocker.patch('compression.compress', side_effect=lambda body, *args: gzip.compress(body))
+        server.compressedCache._entries.clear()
+
+        first = client.get('/pointsDisplay', headers={'Accept-Encoding': 'gzip'})
+        second = client.get('/pointsDisplay', headers={'Accept-Encoding': 'gzip'})
+
+        assert compress.call_count == 1
+        assert first.data == second.data
+
+    def test_compressed_page_revalidates(self, client):
+        """
+        Action: GET /pointsDisplay with gzip, then again with its (weak) ETag.
+        Expected: HTTP 304.
+        """
+        first = client.get('/pointsDisplay', headers={'Accept-Encoding': 'gzip'})
+        assert first.headers['ETag'].startswith('W/')
+
+        again = client.get('/pointsDisplay', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+
+        assert again.status_code == 304
+
+    def test_stylesheet_url_is_fingerprinted_and_immutable(self, client):
+        """
+        Action: Read the stylesheet URL from the login page and fetch it.
+        Expected: A ?v=<hash> URL served with long-lived immutable caching.
+        """
+        page = client.get('/').get_data(as_text=True)
+        url = re.search(r'href="(/static/style\.css\?v=\w+)"', page).group(1)
+
+        response = client.get(url)
+        stale = client.get('/static/style.css?v=old')
+
+        assert response.status_code == 200
+        assert 'immutable' in response.headers['Cache-Control']
+        assert 'max-age=31536000' in response.headers['Cache-Control']
+        assert response.data == stale.data
+        assert 'no-cache' in stale.headers['Cache-Control']
+        assert client.get('/static/missing.css').status_code == 404
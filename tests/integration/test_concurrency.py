@@ -0,0 +1,81 @@
+# tests/integration/test_concurrency.py
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from server import app
+from repository import SQLiteRepository
+from reservations import ReservationError
+
+
+# Book one place at a time from a separate process until the database refuses
+def book_until_sold_out(path, club_name, attempts):
+    repository = SQLiteRepository(path)
+    club = repository.club_by_name(club_name)
+    competition = repository.competition_by_name('Hot Comp')
+    booked = 0
+    for _ in range(attempts):
+        try:
+            repository.reserve(club, competition, 1)
+            booked += 1
+        except ReservationError:
+            pass
+    return booked
+
+
+class TestConcurrency:
+    """
+    Stress test suite for concurrent bookings.
+    Validates that places and points are never oversold under parallel load.
+    """
+
+    def test_parallel_purchases_never_oversell(self, mocker):
+        """
+        Action: Fire 2000 parallel POST /purchasePlaces from 32 threads for 300
+        places, spread over 32 clubs allowed 12 places each (384 in all).
+        Expected: The competition sells out, exactly, and points match the places sold.
+        """
+        nbClubs = 32
+        mock_clubs = [
+            {'name': 'Club %d' % i, 'email': 'c%d@c.co' % i, 'points': '100'}
+            for i in range(nbClubs)
+        ]
+        mock_comps = [{'name': 'Hot Comp', 'date': '2099-01-01 10:00:00', 'numberOfPlaces': '300'}]
+        mocker.patch('server.clubs', mock_clubs)
+        mocker.patch('server.competitions', mock_comps)
+        app.config['TESTING'] = True
+
+        def post(i):
+            with app.test_client() as client:
+                response = client.post('/purchasePlaces', data={
+                    'club': 'Club %d' % (i % nbClubs),
+                    'competition': 'Hot Comp',
+                    'places': str(1 + i % 3)
+                })
+                return b'Great-booking complete!' in response.data, 1 + i % 3
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(post, range(2000)))
+
+        sold = sum(places for ok, places in results if ok)
+        spent = sum(100 - int(c['points']) for c in mock_clubs)
+        assert sold == 300
+        assert int(mock_comps[0]['numberOfPlaces']) == 0
+        assert spent == sold
+        assert all(int(c['points']) >= 0 for c in mock_clubs)
+
+    def test_sqlite_backend_is_consistent_across_processes(self, tmp_path):
+        """
+        Action: Four processes each try to book 100 single places out of 150.
+        Expected: Exactly 150 bookings succeed in total across the processes.
+        """
+        path = str(tmp_path / 'reservations.db')
+        clubs = [{'name': 'Club %d' % i, 'email': 'c%d@c.co' % i, 'points': 100} for i in range(4)]
+        comps = [{'name': 'Hot Comp', 'date': '2099-01-01 10:00:00', 'numberOfPlaces': 150}]
+        repository = SQLiteRepository(path)
+        repository.import_data(clubs, comps)
+
+        with multiprocessing.get_context('spawn').Pool(4) as pool:
+            booked = pool.starmap(book_until_sold_out, [(path, c['name'], 100) for c in clubs])
+
+        assert sum(booked) == 150
+        assert repository.competition_by_name('Hot Comp')['numberOfPlaces'] == 0
+        assert sum(100 - c['points'] for c in repository.list_clubs()) == 150
@@ -0,0 +1,82 @@
+# tests/integration/test_fragments.py
+import pytest
+from flask import get_template_attribute
+from jinja2 import BytecodeCache
+import server
+from server import app
+
+
+class TestCompetitionRows:
+    """
+    Integration test suite for the cached dashboard rows.
+    Validates row reuse across clubs and invalidation on bookings.
+    """
+
+    @pytest.fixture
+    def client(self, mocker):
+        """
+        Action: Loads two clubs and one competition and initializes the Flask test client.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        mocker.patch('server.clubs', [
+            {'name': 'Alpha', 'email': 'a@a.co', 'points': '20'},
+            {'name': 'Beta', 'email': 'b@b.co', 'points': '20'},
+        ])
+        mocker.patch('server.competitions', [
+            {'name': 'Spring Fest', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}
+        ])
+        server.competitionRows.clear()
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_rows_are_rendered_once_for_every_club(self, mocker, client):
+        """
+        Action: Open the dashboard as two different clubs.
+        Expected: The row is rendered once; each club gets its own Book Places link.
+        """
+        render = mocker.spy(server.competitionRows, 'row')
+        macro = mocker.patch('fragments.get_template_attribute', side_effect=get_template_attribute)
+
+        first = client.post('/showSummary', data={'email': 'a@a.co'})
+        second = client.post('/showSummary', data={'email': 'b@b.co'})
+
+        assert macro.call_count == 1
+        assert render.call_count == 2
+        assert b'/book/Spring%20Fest/Alpha' in first.data
+        assert b'/book/Spring%20Fest/Beta' in second.data
+        assert b'/book/Spring%20Fest/Alpha' not in second.data
+
+    def test_booking_refreshes_the_row(self, client):
+        """
+        Action: Show the dashboard, book 5 places, show it again.
+        Expected: The row shows the remaining 20 places.
+        """
+        client.post('/showSummary', data={'email': 'b@b.co'})
+
+        client.post('/purchasePlaces', data={'club': 'Beta', 'competition': 'Spring Fest', 'places': '5'})
+        response = client.post('/showSummary', data={'email': 'b@b.co'})
+
+        assert b'Number of Places: 20' in response.data
+        assert b'Number of Places: 25' not in response.data
+
+    def test_full_competition_has_no_book_link(self, mocker, client):
+        """
+        Action: Show a competition with no places left.
+        Expected: No Book Places link is rendered.
+        """
+        mocker.patch('server.competitions', [
+            {'name': 'Spring Fest', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '0'}
+        ])
+
+        response = client.post('/showSummary', data={'email': 'a@a.co'})
+
+        assert b'Spring Fest' in response.data
+        assert b'Book Places' not in response.data
+
+    def test_templates_use_bytecode_cache(self):
+        """
+        Action: Inspect the Jinja environment.
+        Expected: A bytecode cache is configured.
+        """
+        assert isinstance(app.jinja_env.bytecode_cache, BytecodeCache)
@@ -0,0 +1,88 @@
+# tests/integration/test_live_events.py
+import json
+import pytest
+import server
+from server import app
+
+
+class TestLiveEvents:
+    """
+    Integration test suite for the live places/points stream (/events).
+    """
+
+    @pytest.fixture
+    def client(self, mocker):
+        """
+        Action: Loads a club and a competition and initializes the Flask test client.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        mocker.patch('server.clubs', [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}])
+        mocker.patch('server.competitions', [
+            {'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}
+        ])
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_booking_is_pushed_to_open_streams(self, client):
+        """
+        Action: Open /events, then book 3 places.
+        Expected: The stream gets the places and points left, as Server-Sent Events.
+        """
+        response = client.get('/events', buffered=False)
+        stream = iter(response.response)
+        next(stream)
+
+        client.post('/purchasePlaces', data={'club': 'Club', 'competition': 'Comp', 'places': '3'})
+        chunk = next(stream).decode()
+        response.close()
+
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        assert 'Content-Encoding' not in response.headers
+        assert 'event: places\ndata: ' + json.dumps({'competition': 'Comp', 'places': 22},
+                                                    separators=(',', ':')) in chunk
+        assert 'event: points\ndata: ' + json.dumps({'club': 'Club', 'points': 17},
+                                                    separators=(',', ':')) in chunk
+
+    def test_pages_resume_from_the_event_they_show(self, client):
+        """
+        Action: Open the dashboard.
+        Expected: It loads the live script with the id of the last event, and marks its figures.
+        """
+        response = client.post('/showSummary', data={'email': 'c@c.co'})
+
+        assert f'/events?after={server.events.last_id}'.encode() in response.data
+        assert b'live.js' in response.data
+        assert b'data-places="Comp"' in response.data
+        assert b'data-points="Club"' in response.data
+
+    def test_shared_pages_do_not_change_with_events(self, client):
+        """
+        Action: Load the index and the points board, book 3 places, then load them again.
+        Expected: The index has no live script and is unchanged; the board follows
+        /events without a resume id.
+        """
+        index = client.get('/').data
+        board = client.get('/pointsDisplay').data
+
+        client.post('/purchasePlaces', data={'club': 'Club', 'competition': 'Comp', 'places': '3'})
+
+        assert client.get('/').data == index
+        assert b'live.js' not in index
+        assert b'data-events="/events"' in board
+        assert b'after=' not in client.get('/pointsDisplay').data
+
+    def test_full_broker_asks_to_reconnect_later(self, client, monkeypatch):
+        """
+        Action: Open /events while no stream slot is left.
+        Expected: A stream that ends at once, asking the browser to retry in 30 seconds
+        (an error status would stop EventSource for good).
+        """
+        monkeypatch.setattr(server.events, 'max_streams', 0)
+
+        response = client.get('/events')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert response.data == b'retry: 30000\n\n'
@@ -0,0 +1,62 @@
+# tests/integration/test_metrics.py
+import pytest
+from server import app
+
+
+class TestMetrics:
+    """
+    Integration test suite for the opt-in instrumentation.
+    Validates route and phase histograms, /metrics and profile dumps.
+    """
+
+    @pytest.fixture
+    def client(self, mocker, monkeypatch):
+        """
+        Action: Enables metrics and initializes the Flask test client.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        monkeypatch.setitem(app.config, 'METRICS', True)
+        mocker.patch('server.metrics.histograms', {})
+        mocker.patch('server.clubs', [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}])
+        mocker.patch('server.competitions', [
+            {'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}
+        ])
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_metrics_disabled_by_default(self, monkeypatch, client):
+        """
+        Action: GET /metrics with instrumentation turned off.
+        Expected: HTTP 404.
+        """
+        monkeypatch.setitem(app.config, 'METRICS', False)
+
+        assert client.get('/metrics').status_code == 404
+
+    def test_purchase_phases_are_recorded(self, client):
+        """
+        Action: Book places, then scrape /metrics.
+        Expected: Route histogram plus lookup, validation, persistence and render phases.
+        """
+        client.post('/purchasePlaces', data={'club': 'Club', 'competition': 'Comp', 'places': '2'})
+
+        body = client.get('/metrics').data.decode()
+
+        assert '# TYPE gudlft_request_seconds histogram' in body
+        assert 'gudlft_request_seconds_count{method="POST",route="purchasePlaces"} 1' in body
+        for name in ('lookup', 'validation', 'persistence', 'render'):
+            assert f'gudlft_phase_seconds_count{{phase="{name}",route="purchasePlaces"}} 1' in body
+        assert 'le="+Inf"' in body
+
+    def test_slow_requests_are_profiled(self, monkeypatch, tmp_path, client):
+        """
+        Action: Set a 0.001 ms profiling threshold and request the index page.
+        Expected: A cProfile dump is written for the request.
+        """
+        monkeypatch.setitem(app.config, 'PROFILE_THRESHOLD_MS', 0.001)
+        monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path))
+
+        client.get('/')
+
+        assert [p.name for p in tmp_path.iterdir() if p.name.endswith('-index.prof')]
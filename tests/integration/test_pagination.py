@@ -0,0 +1,104 @@
+# tests/integration/test_pagination.py
+from datetime import datetime
+import pytest
+from schedule import CompetitionSchedule
+from server import app
+
+
+def make_competitions(year=2025):
+    return [
+        {'name': 'Comp %02d' % month, 'date': '%d-%02d-01 10:00:00' % (year, month), 'numberOfPlaces': '5'}
+        for month in range(1, 13)
+    ]
+
+
+class TestPagination:
+    """
+    Integration test suite for paginated and streamed listings.
+    Validates page/limit parameters on the dashboard and the points board.
+    """
+
+    @pytest.fixture
+    def client(self):
+        """
+        Action: Initializes the Flask test client.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_schedule_page_spans_upcoming_then_past(self):
+        """
+        Action: Page through 12 competitions, 6 of them past, by 4.
+        Expected: The second page holds the last 2 upcoming and first 2 past ones.
+        """
+        schedule = CompetitionSchedule(make_competitions())
+
+        upcoming, past, total = schedule.page(datetime(2025, 6, 15), offset=4, limit=4)
+
+        assert total == 12
+        assert [c['name'] for c in upcoming] == ['Comp 11', 'Comp 12']
+        assert [c['name'] for c in past] == ['Comp 06', 'Comp 05']
+
+    def test_dashboard_page_and_limit(self, mocker, client):
+        """
+        Action: POST /showSummary asking for page 2 with 5 competitions per page.
+        Expected: Only competitions 6 to 10 are listed.
+        """
+        mocker.patch('server.clubs', [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}])
+        mocker.patch('server.competitions', make_competitions(2027))
+
+        response = client.post('/showSummary', data={'email': 'c@c.co', 'page': '2', 'limit': '5'})
+
+        assert b'Comp 05' not in response.data
+        assert b'Comp 06' in response.data
+        assert b'Comp 10' in response.data
+        assert b'Comp 11' not in response.data
+
+    def test_points_board_page_and_limit(self, mocker, client):
+        """
+        Action: GET /pointsDisplay?page=2&limit=2 over five clubs.
+        Expected: Only the third and fourth clubs by name are listed.
+        """
+        mocker.patch('server.clubs', [
+            {'name': 'Club %s' % letter, 'email': '%s@c.co' % letter, 'points': '1'}
+            for letter in 'EDCBA'
+        ])
+
+        response = client.get('/pointsDisplay?page=2&limit=2')
+
+        assert b'Club C' in response.data
+        assert b'Club D' in response.data
+        assert b'Club B' not in response.data
+        assert b'Club E' not in response.data
+
+    def test_streamed_points_board(self, mocker, client):
+        """
+        Action: GET /pointsDisplay?stream=1.
+        Expected: A streamed response holding the full board.
+        """
+        mocker.patch('server.clubs', [{'name': 'Alpha', 'email': 'a@c.co', 'points': '5'}])
+
+        response = client.get('/pointsDisplay?stream=1')
+
+        assert response.is_streamed
+        assert b'Alpha' in response.data
+
+    def test_streamed_page_consumes_its_flash_messages(self, mocker, client):
+        """
+        Action: Book with stream=1, then open the dashboard again.
+        Expected: The confirmation is in the streamed page only, not shown twice.
+        """
+        mocker.patch('server.clubs', [{'name': 'Alpha', 'email': 'a@c.co', 'points': '5'}])
+        mocker.patch('server.competitions', [
+            {'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}
+        ])
+
+        streamed = client.post('/purchasePlaces?stream=1', data={'club': 'Alpha', 'competition': 'Comp', 'places': '1'})
+        assert streamed.is_streamed
+        assert b'Great-booking complete!' in streamed.data
+
+        following = client.post('/showSummary', data={'email': 'a@c.co'})
+
+        assert b'Great-booking complete!' not in following.data
@@ -0,0 +1,112 @@
+# tests/integration/test_rate_limits.py
+import pytest
+import server
+from ratelimit import DEFAULT_LIMITS
+from server import app
+
+
+class TestRateLimits:
+    """
+    Integration test suite for the admission control of the booking and login routes.
+    """
+
+    @pytest.fixture
+    def client(self, mocker, monkeypatch):
+        """
+        Action: Loads a club and a competition and turns the limiter on.
+        Expected: Returns a client; the default limits are restored afterwards.
+        """
+        mocker.patch('server.clubs', [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}])
+        mocker.patch('server.competitions', [
+            {'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}
+        ])
+        monkeypatch.setitem(app.config, 'RATE_LIMITING', True)
+        monkeypatch.setitem(app.config, 'METRICS', True)
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+        server.admission.configure(server.RATE_LIMITS or DEFAULT_LIMITS)
+
+    def purchase(self, client):
+        return client.post('/purchasePlaces', data={'club': 'Club', 'competition': 'Comp', 'places': '1'})
+
+    def test_ip_burst_is_shed_with_retry_after(self, client):
+        """
+        Action: Three purchases from one IP limited to a burst of 2 at 1/s.
+        Expected: The third gets a 429 with Retry-After: 1 and is counted in metrics.
+        """
+        server.admission.configure({'purchasePlaces': {'ip': [1, 2]}})
+
+        responses = [self.purchase(client) for _ in range(3)]
+
+        assert [r.status_code for r in responses] == [200, 200, 429]
+        assert responses[2].headers['Retry-After'] == '1'
+        assert 'gudlft_rejected_requests_total{reason="ip",route="purchasePlaces"}' in \
+            client.get('/metrics').get_data(as_text=True)
+
+    def test_login_flood_is_limited_per_ip(self, client):
+        """
+        Action: Log in twice from one IP limited to a burst of 1.
+        Expected: The second login is refused, whatever email it names.
+        """
+        server.admission.configure({'showSummary': {'ip': [0.1, 1]}})
+
+        first = client.post('/showSummary', data={'email': 'c@c.co'})
+        client.get('/logout')
+        second = client.post('/showSummary', data={'email': 'x@x.co'})
+
+        assert (first.status_code, second.status_code) == (200, 429)
+        assert second.headers['Retry-After'] == '10'
+
+    def test_club_bucket_is_only_spent_by_its_session(self, client):
+        """
+        Action: Purchase twice anonymously naming the club, then twice logged in as it, on a 1-per-club limit.
+        Expected: The anonymous purchases leave the club's bucket alone; the
+        second logged-in one is refused.
+        """
+        server.admission.configure({'purchasePlaces': {'club': [0.1, 1]}})
+
+        anonymous = [self.purchase(client) for _ in range(2)]
+        client.post('/showSummary', data={'email': 'c@c.co'})
+        logged_in = [self.purchase(client) for _ in range(2)]
+
+        assert [r.status_code for r in anonymous + logged_in] == [200, 200, 200, 429]
+
+    def test_api_bookings_are_limited_and_gated(self, client):
+        """
+        Action: Book through /api/v1/bookings and /bookings/batch while the shared booking gate is full.
+        Expected: Both are shed with a 429, as /purchasePlaces is.
+        """
+        server.admission.configure(DEFAULT_LIMITS)
+        gate = server.admission.rules['purchasePlaces'][2]
+        while gate.enter():
+            pass
+
+        single = client.post('/api/v1/bookings', json={'club': 'Club', 'competition': 'Comp', 'places': 1})
+        batch = client.post('/api/v1/bookings/batch',
+                            json={'club': 'Club', 'bookings': [{'competition': 'Comp', 'places': 1}]})
+        purchase = self.purchase(client)
+        for _ in range(DEFAULT_LIMITS['purchasePlaces']['concurrency']):
+            gate.leave()
+
+        assert (single.status_code, batch.status_code, purchase.status_code) == (429, 429, 429)
+        assert server.admission.rules['api.createBatchBooking'][2] is gate
+
+    def test_full_gate_sheds_bookings(self, client):
+        """
+        Action: Purchase while the only booking slot is taken, then after it is freed.
+        Expected: 429 first, then the booking goes through; cheap routes are never gated.
+        """
+        server.admission.configure({'purchasePlaces': {'concurrency': 1}})
+        gate = server.admission.rules['purchasePlaces'][2]
+        gate.enter()
+
+        shed = self.purchase(client)
+        board = client.get('/pointsDisplay')
+        gate.leave()
+        booked = self.purchase(client)
+
+        assert shed.status_code == 429
+        assert board.status_code == 200
+        assert b'Great-booking complete!' in booked.data
+        assert gate.enter()
@@ -0,0 +1,114 @@
+# tests/integration/test_sessions.py
+import pytest
+import server
+from server import app
+
+
+class TestClubSession:
+    """
+    Integration test suite for the logged-in club session.
+    Validates that booking routes use the session club instead of form fields.
+    """
+
+    @pytest.fixture
+    def clubs(self, mocker):
+        """
+        Action: Loads two clubs and one upcoming competition.
+        Expected: Returns the mocked clubs.
+        """
+        clubs = [
+            {'name': 'Alpha', 'email': 'a@a.co', 'points': '20'},
+            {'name': 'Beta', 'email': 'b@b.co', 'points': '20'},
+        ]
+        mocker.patch('server.clubs', clubs)
+        mocker.patch('server.competitions', [
+            {'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}
+        ])
+        return clubs
+
+    @pytest.fixture
+    def client(self, clubs):
+        """
+        Action: Initializes the Flask test client and logs in as Alpha.
+        Expected: Returns a client holding Alpha's session cookie.
+        """
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            client.post('/showSummary', data={'email': 'a@a.co'})
+            yield client
+
+    def test_cookie_only_holds_the_session_id(self, client):
+        """
+        Action: Read the session cookie and the server-side session.
+        Expected: The cookie is an opaque id; the store knows the club.
+        """
+        sid = client.get_cookie('session').value
+
+        assert 'Alpha' not in sid
+        assert app.session_interface.store.load(sid)['_user_id'] == 'Alpha'
+
+    def test_booking_uses_the_session_club(self, mocker, client, clubs):
+        """
+        Action: Book 2 places without naming the club.
+        Expected: Alpha is charged and no club lookup runs.
+        """
+        lookup = mocker.spy(server.repository, 'club_by_name')
+
+        response = client.post('/purchasePlaces', data={'competition': 'Comp', 'places': '2'})
+
+        assert b'Great-booking complete!' in response.data
+        assert clubs[0]['points'] == 18
+        assert lookup.call_count == 0
+
+    def test_other_club_cannot_be_booked_for(self, client, clubs):
+        """
+        Action: While logged in as Alpha, book and open the booking page as Beta.
+        Expected: HTTP 404 both times and Beta keeps its points.
+        """
+        response = client.post('/purchasePlaces', data={'club': 'Beta', 'competition': 'Comp', 'places': '2'})
+        page = client.get('/book/Comp/Beta')
+
+        assert response.status_code == 404
+        assert page.status_code == 404
+        assert clubs[1]['points'] == 20
+
+    def test_replaced_clubs_are_looked_up_again(self, mocker, client):
+        """
+        Action: Replace the club list, then book 2 places without naming the club.
+        Expected: The session club is resolved against the new list and charged.
+        """
+        replaced = [{'name': 'Alpha', 'email': 'a@a.co', 'points': '3'}]
+        mocker.patch('server.clubs', replaced)
+
+        response = client.post('/purchasePlaces', data={'competition': 'Comp', 'places': '2'})
+
+        assert b'Great-booking complete!' in response.data
+        assert replaced[0]['points'] == 1
+
+    def test_logout_forgets_the_session(self, client):
+        """
+        Action: Log out, then book without naming the club.
+        Expected: The stored session is gone and the booking is refused.
+        """
+        sid = client.get_cookie('session').value
+
+        client.get('/logout')
+        response = client.post('/purchasePlaces', data={'competition': 'Comp', 'places': '2'})
+
+        assert app.session_interface.store.load(sid) is None
+        assert response.status_code == 400
+
+    def test_anonymous_flashes_are_not_stored(self, mocker, clubs):
+        """
+        Action: Fail to log in with an unknown email, from a fresh client.
+        Expected: The message is shown, but no session is stored nor any cookie set.
+        """
+        save = mocker.spy(app.session_interface.store, 'save')
+
+        with app.test_client() as client:
+            response = client.post('/showSummary', data={'email': 'nobody@x.co'})
+            cookie = client.get_cookie('session')
+
+        assert b'Sorry, that email was not found.' in response.data
+        assert cookie is None
+        assert save.call_count == 0
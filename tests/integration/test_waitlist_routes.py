@@ -0,0 +1,59 @@
+# tests/integration/test_waitlist_routes.py
+import pytest
+import server
+from server import app
+
+
+class TestWaitlistRoutes:
+    """
+    Integration test suite for joining waitlists from the dashboard and the API.
+    """
+
+    @pytest.fixture
+    def client(self, mocker):
+        """
+        Action: Loads a club and a sold-out competition, with an empty waitlist.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        mocker.patch('server.clubs', [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}])
+        mocker.patch('server.competitions', [
+            {'name': 'Full Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '0'}
+        ])
+        mocker.patch.object(server.waitlist, '_queues', {})
+        mocker.patch.object(server.waitlist, '_entries', {})
+        server.competitionRows.clear()
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_sold_out_row_offers_the_waitlist(self, client):
+        """
+        Action: Open the dashboard with a sold-out competition.
+        Expected: A Join waitlist form replaces the Book Places link.
+        """
+        response = client.post('/showSummary', data={'email': 'c@c.co'})
+
+        assert b'Join waitlist' in response.data
+        assert b'Book Places' not in response.data
+
+    def test_join_waitlist_from_the_dashboard(self, client):
+        """
+        Action: POST /joinWaitlist for 3 places.
+        Expected: The club is told its position and is queued.
+        """
+        response = client.post('/joinWaitlist', data={'club': 'Club', 'competition': 'Full Comp', 'places': '3'})
+
+        assert b'You are number 1 on the waitlist for Full Comp.' in response.data
+        assert server.waitlist.waiting({'name': 'Full Comp'}) == [('Club', 3)]
+
+    def test_join_waitlist_api(self, client):
+        """
+        Action: POST /api/v1/waitlist, then again with 13 places.
+        Expected: HTTP 202 with the position, then HTTP 400.
+        """
+        ok = client.post('/api/v1/waitlist', json={'club': 'Club', 'competition': 'Full Comp', 'places': 2})
+        refused = client.post('/api/v1/waitlist', json={'club': 'Club', 'competition': 'Full Comp', 'places': 13})
+
+        assert ok.status_code == 202
+        assert ok.get_json() == {'position': 1, 'competition': 'Full Comp'}
+        assert refused.status_code == 400
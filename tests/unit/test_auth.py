@@ -1,5 +1,7 @@
 # tests/unit/test_auth.py
 import pytest
+from auth import ClubLoader
+from repository import SQLiteRepository
 from server import app
 
 
@@ -55,4 +57,31 @@ class TestAuth:
         response = client.get('/logout')
 
         assert response.status_code == 302
-        assert response.location.endswith('/') or response.location == 'http://localhost/'
\ No newline at end of file
+        assert response.location.endswith('/') or response.location == 'http://localhost/'
+
+class TestClubLoader:
+    """
+    Test suite for the cache of the logged-in clubs.
+    Validates that a cached club follows the bookings of other processes.
+    """
+
+    def test_cached_club_follows_other_processes(self, tmp_path):
+        """
+        Action: Load a club's user, book for it from a second connection (another process), load it again.
+        Expected: The user is looked up again and shows the points left.
+        """
+        path = str(tmp_path / 'gudlft.db')
+        repository, other = SQLiteRepository(path), SQLiteRepository(path)
+        repository.import_data(
+            [{'name': 'Club', 'email': 'c@c.co', 'points': '10'},
+             {'name': 'Other', 'email': 'o@c.co', 'points': '10'}],
+            [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}]
+        )
+        loader = ClubLoader(lambda: repository)
+        loader('Club')
+        untouched = loader('Other')
+
+        other.reserve(other.club_by_name('Club'), other.competition_by_name('Comp'), 4)
+
+        assert loader('Club').club['points'] == 6
+        assert loader('Other') is untouched
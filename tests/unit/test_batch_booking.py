@@ -0,0 +1,118 @@
+# tests/unit/test_batch_booking.py
+import json
+import pytest
+from server import app
+
+
+class TestBatchBooking:
+    """
+    Unit tests for booking several competitions in one transaction.
+    Validates the shared rules and the all-or-nothing behaviour.
+    """
+
+    @pytest.fixture
+    def client(self, mocker):
+        """
+        Action: Initializes the Flask test client over three competitions.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        self.clubs = [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}]
+        self.comps = [
+            {'name': 'Comp A', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'},
+            {'name': 'Comp B', 'date': '2026-11-10 10:00:00', 'numberOfPlaces': '3'},
+            {'name': 'Past Comp', 'date': '2020-01-01 10:00:00', 'numberOfPlaces': '10'}
+        ]
+        mocker.patch('server.clubs', self.clubs)
+        mocker.patch('server.competitions', self.comps)
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def post(self, client, bookings):
+        return client.post('/api/v1/bookings/batch', json={'club': 'Club', 'bookings': bookings})
+
+    def test_batch_applies_every_line(self, client, isolated_journal):
+        """
+        Action: Book 5 places on Comp A and 2 on Comp B in one batch.
+        Expected: HTTP 201, both competitions and the points updated, one journal line.
+        """
+        response = self.post(client, [
+            {'competition': 'Comp A', 'places': 5},
+            {'competition': 'Comp B', 'places': 2}
+        ])
+        isolated_journal.close()
+
+        assert response.status_code == 201
+        assert self.comps[0]['numberOfPlaces'] == 20
+        assert self.comps[1]['numberOfPlaces'] == 1
+        assert self.clubs[0]['points'] == 13
+        with open(isolated_journal.path) as f:
+            lines = f.read().splitlines()
+        assert json.loads(lines[0])['bookings'] == [['Comp A', 5], ['Comp B', 2]]
+        assert len(lines) == 1
+
+    def test_one_failing_line_rejects_the_batch(self, client):
+        """
+        Action: Book 2 places on Comp A and 4 on Comp B (only 3 left).
+        Expected: HTTP 400 naming Comp B, and nothing is booked.
+        """
+        response = self.post(client, [
+            {'competition': 'Comp A', 'places': 2},
+            {'competition': 'Comp B', 'places': 4}
+        ])
+
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Not enough places', 'competition': 'Comp B'}
+        assert self.comps[0]['numberOfPlaces'] == 25
+        assert self.clubs[0]['points'] == 20
+
+    def test_cap_applies_to_merged_lines(self, client):
+        """
+        Action: Book Comp A twice in one batch for 13 places in total.
+        Expected: HTTP 400 with the 12-place cap message.
+        """
+        response = self.post(client, [
+            {'competition': 'Comp A', 'places': 7},
+            {'competition': 'Comp A', 'places': 6}
+        ])
+
+        assert response.get_json()['error'] == 'You cannot book more than 12 places'
+
+    def test_total_points_are_checked(self, client):
+        """
+        Action: Book two lines that each fit the balance but not together.
+        Expected: HTTP 400 with 'Not enough points'.
+        """
+        self.clubs[0]['points'] = '10'
+
+        response = self.post(client, [
+            {'competition': 'Comp A', 'places': 8},
+            {'competition': 'Comp B', 'places': 3}
+        ])
+
+        assert response.get_json()['error'] == 'Not enough points'
+
+    def test_past_competition_is_refused(self, client):
+        """
+        Action: Include a past competition in the batch.
+        Expected: HTTP 400 naming the past competition.
+        """
+        response = self.post(client, [
+            {'competition': 'Comp A', 'places': 1},
+            {'competition': 'Past Comp', 'places': 1}
+        ])
+
+        assert response.get_json() == {'error': 'This competition is over.', 'competition': 'Past Comp'}
+
+    def test_malformed_lines_are_refused(self, client):
+        """
+        Action: Send bookings as an object, then with a line that is not an object.
+        Expected: HTTP 400, naming the line at fault when there is one.
+        """
+        not_a_list = self.post(client, {'a': 1})
+        bad_line = self.post(client, [{'competition': 'Comp A', 'places': 1}, 1])
+
+        assert not_a_list.status_code == 400
+        assert bad_line.status_code == 400
+        assert bad_line.get_json()['line'] == 1
+        assert int(self.clubs[0]['points']) == 20
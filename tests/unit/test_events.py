@@ -0,0 +1,147 @@
+# tests/unit/test_events.py
+import json
+import threading
+from events import EventBroker
+
+
+# Split an encoded chunk into its (event, data) messages
+def parse(chunk):
+    messages = []
+    for block in chunk.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            messages.append((fields['event'], json.loads(fields['data'])))
+    return messages
+
+
+class TestEventBroker:
+    """
+    Test suite for the live update broker.
+    """
+
+    def test_stream_receives_events_published_after_it_opened(self):
+        """
+        Action: Open a stream, then publish the changes of a booking of Club on Comp.
+        Expected: The stream gets the places left and the points left, in one chunk.
+        """
+        broker = EventBroker()
+        stream = broker.open()
+        assert next(stream).startswith(b'retry: ')
+
+        broker.on_changes([{'name': 'Club', 'points': 17}], [{'name': 'Comp', 'numberOfPlaces': 22}])
+
+        assert parse(next(stream)) == [('places', {'competition': 'Comp', 'places': 22}),
+                                       ('points', {'club': 'Club', 'points': 17})]
+
+    def test_stream_resumes_after_last_event_id(self):
+        """
+        Action: Publish two events, then open a stream resuming after the first one.
+        Expected: Only the second event is replayed.
+        """
+        broker = EventBroker()
+        broker.publish('places', {'competition': 'A', 'places': 1})
+        first = broker.last_id
+        broker.publish('places', {'competition': 'B', 'places': 2})
+
+        stream = broker.open(first)
+        next(stream)
+
+        assert parse(next(stream)) == [('places', {'competition': 'B', 'places': 2})]
+
+    def test_expired_id_is_reported_stale(self):
+        """
+        Action: Resume from an id pushed out of the replay buffer.
+        Expected: The stream starts with a stale event.
+        """
+        broker = EventBroker(replay_size=2)
+        old = broker.last_id
+        for places in range(3):
+            broker.publish('places', {'competition': 'A', 'places': places})
+
+        stream = broker.open(old)
+        next(stream)
+
+        assert parse(next(stream)) == [('stale', {})]
+
+    def test_id_of_another_worker_follows_from_now(self):
+        """
+        Action: Resume from the id of another worker, then publish an event.
+        Expected: No stale event; the stream gets the new event.
+        """
+        broker = EventBroker(heartbeat=0.01)
+        broker.publish('places', {'competition': 'A', 'places': 1})
+        stream = broker.open('deadbeef-7')
+        next(stream)
+
+        broker.publish('places', {'competition': 'A', 'places': 2})
+
+        assert parse(next(stream)) == [('places', {'competition': 'A', 'places': 2})]
+
+    def test_any_change_is_reported_stale(self):
+        """
+        Action: Open a stream, then tell the broker that every record may have changed.
+        Expected: The stream gets a stale event.
+        """
+        broker = EventBroker()
+        stream = broker.open()
+        next(stream)
+
+        broker.on_changes(None, None)
+
+        assert parse(next(stream)) == [('stale', {})]
+
+    def test_idle_stream_sends_keep_alive(self):
+        """
+        Action: Read an idle stream with a heartbeat of 10 ms.
+        Expected: A comment line keeps the connection alive.
+        """
+        broker = EventBroker(heartbeat=0.01)
+        stream = broker.open()
+        next(stream)
+
+        assert next(stream) == b': keep-alive\n\n'
+
+    def test_waiting_stream_is_woken_by_publish(self):
+        """
+        Action: Block a reader on an idle stream and publish from another thread.
+        Expected: The reader gets the event without waiting for the heartbeat.
+        """
+        broker = EventBroker(heartbeat=30)
+        stream = broker.open()
+        next(stream)
+        chunks = []
+        reader = threading.Thread(target=lambda: chunks.append(next(stream)))
+        reader.start()
+
+        broker.publish('points', {'club': 'Club', 'points': 5})
+        reader.join(5)
+
+        assert parse(chunks[0]) == [('points', {'club': 'Club', 'points': 5})]
+
+    def test_streams_are_capped_and_released(self):
+        """
+        Action: Open one stream on a broker allowing one, close it, then open another.
+        Expected: A second concurrent stream is refused; a slot is freed on close.
+        """
+        broker = EventBroker(max_streams=1)
+        stream = broker.open()
+        next(stream)
+
+        assert broker.open() is None
+        stream.close()
+        assert broker.streams == 0
+        assert broker.open() is not None
+
+    def test_close_ends_open_streams(self):
+        """
+        Action: Close the broker while a stream is open.
+        Expected: The stream ends and new streams are refused.
+        """
+        broker = EventBroker()
+        stream = broker.open()
+        next(stream)
+
+        broker.close()
+
+        assert list(stream) == []
+        assert broker.open() is None
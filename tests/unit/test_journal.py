@@ -0,0 +1,248 @@
+# tests/unit/test_journal.py
+import json
+import pytest
+import journal as journal_module
+from journal import BookingJournal
+from registry import Registry
+
+
+def make_data():
+    clubs = [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}]
+    comps = [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}]
+    return clubs, comps
+
+
+class TestJournal:
+    """
+    Test suite for the append-only booking journal.
+    Validates replay on startup, crash tolerance and snapshot compaction.
+    """
+
+    def make_journal(self, tmp_path, clubs, comps, **kwargs):
+        return BookingJournal(
+            str(tmp_path / 'bookings.journal'),
+            str(tmp_path / 'clubs.json'),
+            str(tmp_path / 'competitions.json'),
+            source=lambda: (clubs, comps),
+            **kwargs
+        )
+
+    def test_append_writes_one_line_per_booking(self, tmp_path):
+        """
+        Action: Append two bookings.
+        Expected: The journal holds two JSON lines with increasing sequences.
+        """
+        clubs, comps = make_data()
+        journal = self.make_journal(tmp_path, clubs, comps)
+        journal.append('Club', 'Comp', 2)
+        journal.append('Club', 'Comp', 3)
+        journal.close()
+
+        lines = (tmp_path / 'bookings.journal').read_text().splitlines()
+        assert [json.loads(line)['seq'] for line in lines] == [1, 2]
+
+    def test_replay_applies_journal_tail(self, tmp_path):
+        """
+        Action: Append bookings, then replay them on fresh data.
+        Expected: Points and places reflect every journaled booking.
+        """
+        clubs, comps = make_data()
+        journal = self.make_journal(tmp_path, clubs, comps)
+        journal.append('Club', 'Comp', 2)
+        journal.append('Club', 'Comp', 3)
+        journal.close()
+
+        clubs, comps = make_data()
+        replayed = self.make_journal(tmp_path, clubs, comps).replay(Registry(clubs, comps))
+
+        assert replayed == 2
+        assert clubs[0]['points'] == 15
+        assert comps[0]['numberOfPlaces'] == 20
+
+    def test_replay_ignores_torn_last_line(self, tmp_path):
+        """
+        Action: Replay a journal whose last line was cut by a crash.
+        Expected: Complete lines are applied and the torn tail is removed.
+        """
+        path = tmp_path / 'bookings.journal'
+        path.write_text('{"seq": 1, "club": "Club", "competition": "Comp", "places": 1}\n{"seq": 2, "cl')
+        clubs, comps = make_data()
+
+        self.make_journal(tmp_path, clubs, comps).replay(Registry(clubs, comps))
+
+        assert clubs[0]['points'] == 19
+        assert path.read_text().endswith('"places": 1}\n')
+
+    def test_compaction_skips_entries_in_snapshot(self, tmp_path):
+        """
+        Action: Compact after two bookings, then book again and replay.
+        Expected: Snapshots carry the first two bookings and only the third is replayed.
+        """
+        clubs, comps = make_data()
+        journal = self.make_journal(tmp_path, clubs, comps)
+        for places in (1, 2):
+            clubs[0]['points'] = int(clubs[0]['points']) - places
+            comps[0]['numberOfPlaces'] = int(comps[0]['numberOfPlaces']) - places
+            journal.append('Club', 'Comp', places)
+        journal.compact()
+        journal.append('Club', 'Comp', 4)
+        journal.close()
+
+        clubs_doc = json.loads((tmp_path / 'clubs.json').read_text())
+        comps_doc = json.loads((tmp_path / 'competitions.json').read_text())
+        clubs, comps = clubs_doc['clubs'], comps_doc['competitions']
+        journal = self.make_journal(tmp_path, clubs, comps)
+        replayed = journal.replay(Registry(clubs, comps), clubs_doc['journalSeq'], comps_doc['journalSeq'])
+
+        assert replayed == 1
+        assert clubs[0]['points'] == 13
+        assert comps[0]['numberOfPlaces'] == 18
+        assert journal.seq == 3
+
+    def test_compaction_writes_the_figures_read_under_the_lock(self, tmp_path):
+        """
+        Action: Compact Record-based data while a booking lands between the snapshot
+        (under the booking lock) and the writing of the files.
+        Expected: The files hold the figures of the snapshot, not the later booking.
+        """
+        registry = Registry(*make_data())
+        clubs, comps = registry.clubs, registry.competitions
+        journal = self.make_journal(tmp_path, clubs, comps)
+
+        def bookMeanwhile(call, args=()):
+            clubs[0]['points'] = 1
+            comps[0]['numberOfPlaces'] = 1
+            return call(*args)
+        journal.run_blocking = bookMeanwhile
+        journal.compact()
+        journal.close()
+
+        assert json.loads((tmp_path / 'clubs.json').read_text())['clubs'][0]['points'] == 20
+        assert json.loads((tmp_path / 'competitions.json').read_text())['competitions'][0]['numberOfPlaces'] == 25
+
+    def test_replay_batch_entry(self, tmp_path):
+        """
+        Action: Append a batch of two bookings, then replay it on fresh data.
+        Expected: Both competitions and the club total are updated.
+        """
+        clubs, comps = make_data()
+        comps.append({'name': 'Other', 'date': '2030-11-10 10:00:00', 'numberOfPlaces': '5'})
+        journal = self.make_journal(tmp_path, clubs, comps)
+        journal.append_many('Club', [('Comp', 2), ('Other', 3)])
+        journal.close()
+
+        clubs, comps = make_data()
+        comps.append({'name': 'Other', 'date': '2030-11-10 10:00:00', 'numberOfPlaces': '5'})
+        self.make_journal(tmp_path, clubs, comps).replay(Registry(clubs, comps))
+
+        assert clubs[0]['points'] == 15
+        assert comps[0]['numberOfPlaces'] == 23
+        assert comps[1]['numberOfPlaces'] == 2
+
+
+class TestJournalWriter:
+    """
+    Test suite for the background journal writer.
+    Validates write coalescing, the durable and fast acknowledgement modes
+    and the flush on shutdown.
+    """
+
+    def make_journal(self, tmp_path, **kwargs):
+        clubs, comps = make_data()
+        return BookingJournal(
+            str(tmp_path / 'bookings.journal'),
+            str(tmp_path / 'clubs.json'),
+            str(tmp_path / 'competitions.json'),
+            source=lambda: (clubs, comps),
+            **kwargs
+        )
+
+    def read_seqs(self, tmp_path):
+        path = tmp_path / 'bookings.journal'
+        if not path.exists():
+            return []
+        return [json.loads(line)['seq'] for line in path.read_text().splitlines()]
+
+    def test_bookings_are_coalesced_into_one_fsync(self, mocker, tmp_path):
+        """
+        Action: Queue 50 bookings within one flush interval, then wait for the last.
+        Expected: All 50 lines are written, in order, with a single fsync.
+        """
+        fsync = mocker.patch('journal.os.fsync')
+        journal = self.make_journal(tmp_path, flush_interval=0.2, batch_size=1000)
+
+        seqs = [journal.append('Club', 'Comp', 1) for _ in range(50)]
+        journal.wait(seqs[-1])
+
+        assert self.read_seqs(tmp_path) == list(range(1, 51))
+        assert fsync.call_count == 1
+        journal.close()
+
+    def test_full_batch_is_flushed_before_the_interval(self, tmp_path):
+        """
+        Action: Queue a full batch with a one-minute flush interval.
+        Expected: wait() returns as soon as the batch is written.
+        """
+        journal = self.make_journal(tmp_path, flush_interval=60, batch_size=3)
+
+        seqs = [journal.append('Club', 'Comp', 1) for _ in range(3)]
+        journal.wait(seqs[-1])
+
+        assert self.read_seqs(tmp_path) == [1, 2, 3]
+        journal.close()
+
+    def test_fast_ack_does_not_wait_for_the_disk(self, tmp_path):
+        """
+        Action: Queue a booking in fast mode with a one-minute flush interval.
+        Expected: wait() returns at once; close() writes the line.
+        """
+        journal = self.make_journal(tmp_path, flush_interval=60, durable=False)
+
+        journal.wait(journal.append('Club', 'Comp', 1))
+        assert self.read_seqs(tmp_path) == []
+
+        journal.close()
+        assert self.read_seqs(tmp_path) == [1]
+
+    def test_write_errors_reach_durable_waiters(self, mocker, tmp_path):
+        """
+        Action: Make the journal write fail, then wait for a queued booking.
+        Expected: wait() raises the write error instead of hanging, and the
+        lost line is handed to on_lost.
+        """
+        mocker.patch('journal.os.write', side_effect=OSError("disk full"))
+        lost = []
+        journal = self.make_journal(tmp_path, flush_interval=0.01,
+                                    on_lost=lambda *args: lost.append(args))
+
+        seq = journal.append('Club', 'Comp', 1)
+
+        with pytest.raises(OSError, match="disk full"):
+            journal.wait(seq)
+        assert lost == [(seq, 'Club', [['Comp', 1]])]
+        journal.close()
+
+    def test_writer_recovers_from_a_failed_write(self, mocker, tmp_path):
+        """
+        Action: Fail the first write halfway through its line, then queue another booking.
+        Expected: The writer keeps running: the second line is written, with
+        no torn line before it.
+        """
+        write = journal_module.os.write
+        calls = []
+
+        def failing_once(fd, data):
+            calls.append(fd)
+            if len(calls) == 1:
+                write(fd, bytes(data[:5]))
+                raise OSError("disk full")
+            return write(fd, data)
+        mocker.patch('journal.os.write', side_effect=failing_once)
+        journal = self.make_journal(tmp_path, flush_interval=0.01)
+
+        with pytest.raises(OSError):
+            journal.wait(journal.append('Club', 'Comp', 1))
+        journal.wait(journal.append('Club', 'Comp', 2))
+
+        assert self.read_seqs(tmp_path) == [2]
+        journal.close()
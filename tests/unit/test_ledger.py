@@ -0,0 +1,54 @@
+# tests/unit/test_ledger.py
+from ledger import BookingLedger
+
+
+class TestBookingLedger:
+    """
+    Test suite for the bookings ledger.
+    Validates both indexes, the per-club history and its serialized form.
+    """
+
+    def test_bookings_are_indexed_by_club_and_competition(self):
+        """
+        Action: Record two bookings of one club and one of another.
+        Expected: Holdings add up per (club, competition) and are listed both ways.
+        """
+        ledger = BookingLedger()
+        ledger.record('Alpha', 'Comp', 2)
+        ledger.record('Alpha', 'Comp', 3)
+        ledger.record('Beta', 'Comp', 1)
+
+        assert ledger.booked('Alpha', 'Comp') == 5
+        assert ledger.club_bookings('Alpha') == {'Comp': 5}
+        assert ledger.competition_bookings('Comp') == {'Alpha': 5, 'Beta': 1}
+        assert ledger.booked('Gamma', 'Comp') == 0
+
+    def test_cancelling_everything_drops_the_holding(self):
+        """
+        Action: Book 4 places, then cancel 1 and 3 of them.
+        Expected: Nothing is held any more; the history keeps every line.
+        """
+        ledger = BookingLedger()
+        ledger.record('Alpha', 'Comp', 4)
+        ledger.record('Alpha', 'Comp', -1)
+        ledger.record('Alpha', 'Comp', -3)
+
+        assert ledger.club_bookings('Alpha') == {}
+        assert ledger.competition_bookings('Comp') == {}
+        assert ledger.history('Alpha') == [('Comp', 4), ('Comp', -1), ('Comp', -3)]
+
+    def test_restore_rebuilds_the_holdings(self):
+        """
+        Action: Restore a fresh ledger from another one's to_json().
+        Expected: Same holdings and history.
+        """
+        ledger = BookingLedger()
+        ledger.record('Alpha', 'Comp', 4)
+        ledger.record('Alpha', 'Other', 2)
+        ledger.record('Alpha', 'Comp', -1)
+
+        restored = BookingLedger()
+        restored.restore(ledger.to_json())
+
+        assert restored.club_bookings('Alpha') == {'Comp': 3, 'Other': 2}
+        assert restored.history('Alpha') == ledger.history('Alpha')
@@ -0,0 +1,116 @@
+# tests/unit/test_points_board_cache.py
+import pytest
+import server
+from pointsboard import PointsBoard
+from server import app
+
+
+class TestPointsBoardCache:
+    """
+    Test suite for the cached points board.
+    Validates incremental ordering, leaderboard view and conditional GETs.
+    """
+
+    @pytest.fixture
+    def client(self):
+        """
+        Action: Initializes the Flask test client.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_update_moves_only_changed_club(self):
+        """
+        Action: Lower the points of the leading club.
+        Expected: The points order changes while the name order is kept.
+        """
+        clubs = [
+            {'name': 'Alpha', 'email': 'a@c.co', 'points': '5'},
+            {'name': 'Beta', 'email': 'b@c.co', 'points': '12'}
+        ]
+        board = PointsBoard()
+        board.sync(lambda: clubs, 1)
+        assert [c['name'] for c in board.clubs('points')] == ['Beta', 'Alpha']
+
+        clubs[1]['points'] = 2
+        board.update(clubs[1])
+
+        assert [c['name'] for c in board.clubs('points')] == ['Alpha', 'Beta']
+        assert [c['name'] for c in board.clubs('name')] == ['Alpha', 'Beta']
+
+    def test_leaderboard_order(self, mocker, client):
+        """
+        Action: GET /pointsDisplay?order=points.
+        Expected: Clubs are listed from the highest to the lowest balance.
+        """
+        mocker.patch('server.clubs', [
+            {'name': 'Alpha', 'email': 'a@c.co', 'points': '5'},
+            {'name': 'Beta', 'email': 'b@c.co', 'points': '12'}
+        ])
+
+        response = client.get('/pointsDisplay?order=points')
+
+        assert response.data.index(b'Beta') < response.data.index(b'Alpha')
+
+    def test_repeat_visit_gets_304(self, mocker, client):
+        """
+        Action: GET /pointsDisplay twice, the second time with If-None-Match.
+        Expected: HTTP 304 with an empty body for the repeat visit.
+        """
+        mocker.patch('server.clubs', [{'name': 'Alpha', 'email': 'a@c.co', 'points': '5'}])
+
+        first = client.get('/pointsDisplay')
+        second = client.get('/pointsDisplay', headers={'If-None-Match': first.headers['ETag']})
+
+        assert first.status_code == 200
+        assert first.headers['Last-Modified']
+        assert second.status_code == 304
+        assert second.data == b''
+
+    def test_booking_invalidates_cached_page(self, mocker, client):
+        """
+        Action: GET /pointsDisplay, book places, then GET it again with the old ETag.
+        Expected: HTTP 200 with the new balance instead of a 304.
+        """
+        mock_clubs = [{'name': 'Alpha', 'email': 'a@c.co', 'points': '10'}]
+        mocker.patch('server.clubs', mock_clubs)
+        mocker.patch('server.competitions', [
+            {'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}
+        ])
+
+        first = client.get('/pointsDisplay')
+        client.post('/purchasePlaces', data={'club': 'Alpha', 'competition': 'Comp', 'places': '3'})
+        second = client.get('/pointsDisplay', headers={'If-None-Match': first.headers['ETag']})
+
+        assert second.status_code == 200
+        assert b'<td data-points="Alpha">7</td>' in second.data
+
+    def test_page_cache_is_bounded(self):
+        """
+        Action: Render three pages on a board keeping two, serving the first again before the third.
+        Expected: The second page, least recently served, is the one dropped.
+        """
+        board = PointsBoard(max_pages=2)
+        board.page(1, lambda: 'one')
+        board.page(2, lambda: 'two')
+        board.page(1, lambda: 'one again')
+        board.page(3, lambda: 'three')
+
+        assert board.page(1, lambda: 'rendered')[0] == 'one'
+        assert board.page(2, lambda: 'rendered')[0] == 'rendered'
+
+    def test_pages_past_the_last_are_not_cached(self, mocker, client):
+        """
+        Action: GET /pointsDisplay for 50 pages past the last one.
+        Expected: Each is answered, but none is kept in the page cache.
+        """
+        mocker.patch('server.clubs', [{'name': 'Alpha', 'email': 'a@c.co', 'points': '5'}])
+        client.get('/pointsDisplay?page=1&limit=5')
+        cached = len(server.pointsBoard._pages)
+
+        for page in range(2, 52):
+            assert client.get(f'/pointsDisplay?page={page}&limit=5').status_code == 200
+
+        assert len(server.pointsBoard._pages) == cached
@@ -0,0 +1,73 @@
+# tests/unit/test_ratelimit.py
+from ratelimit import AdmissionControl, ConcurrencyGate, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter:
+    """
+    Test suite for the token buckets and the concurrency gate.
+    """
+
+    def test_burst_then_refill(self):
+        """
+        Action: Spend a burst of 3 at 2 tokens/s, then wait half a second.
+        Expected: The 4th request waits 0.5 s; one more is admitted after it.
+        """
+        clock = FakeClock()
+        limiter = RateLimiter(2, 3, clock=clock)
+
+        assert [limiter.acquire('ip') for _ in range(3)] == [0, 0, 0]
+        assert limiter.acquire('ip') == 0.5
+        clock.now = 0.5
+        assert limiter.acquire('ip') == 0
+
+    def test_keys_have_their_own_buckets(self):
+        """
+        Action: Exhaust the bucket of one key.
+        Expected: Another key is still admitted.
+        """
+        limiter = RateLimiter(1, 1, clock=FakeClock())
+        limiter.acquire('a')
+
+        assert limiter.acquire('a') > 0
+        assert limiter.acquire('b') == 0
+
+    def test_least_recently_seen_keys_are_dropped(self):
+        """
+        Action: Use three keys with room for two.
+        Expected: Only the two most recent buckets are kept.
+        """
+        limiter = RateLimiter(1, 1, max_keys=2, clock=FakeClock())
+        for key in ('a', 'b', 'c'):
+            limiter.acquire(key)
+
+        assert list(limiter._buckets) == ['b', 'c']
+
+    def test_gate_sheds_when_full(self):
+        """
+        Action: Enter a gate of 2 three times, leave once and enter again.
+        Expected: The third entry is refused, the fourth admitted.
+        """
+        gate = ConcurrencyGate(2)
+
+        assert [gate.enter(), gate.enter(), gate.enter()] == [True, True, False]
+        gate.leave()
+        assert gate.enter()
+
+    def test_admission_reports_the_reason(self):
+        """
+        Action: Admit requests on an endpoint limited to one per club.
+        Expected: The second one for the same club is refused with reason 'club'.
+        """
+        admission = AdmissionControl({'book': {'club': [1, 1]}})
+
+        assert admission.admit('book', '1.2.3.4', 'Club') == (None, None)
+        assert admission.admit('book', '1.2.3.4', 'Club')[1][0] == 'club'
+        assert admission.admit('other', '1.2.3.4', 'Club') == (None, None)
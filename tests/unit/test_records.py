@@ -0,0 +1,86 @@
+# tests/unit/test_records.py
+import json
+import pytest
+from records import Club, Competition
+from registry import Registry
+
+
+class TestRecords:
+    """
+    Test suite for the slot-based club and competition records.
+    Validates dict-style access, int normalization and JSON round trips.
+    """
+
+    def test_numeric_fields_are_ints(self):
+        """
+        Action: Build records from JSON dicts holding strings.
+        Expected: points and numberOfPlaces are ints; other fields are kept.
+        """
+        club = Club.from_dict({'name': 'Club', 'email': 'c@c.co', 'points': '13'})
+        competition = Competition.from_dict({'name': 'Comp', 'date': '2030-10-10 10:00:00',
+                                             'numberOfPlaces': '25'})
+
+        assert club.points == 13 and club['points'] == 13
+        assert competition['numberOfPlaces'] == 25
+        assert competition['date'] == '2030-10-10 10:00:00'
+
+    def test_dict_style_access(self):
+        """
+        Action: Read, write and test fields with the subscript syntax.
+        Expected: Known fields behave like dict keys; unknown ones raise KeyError.
+        """
+        club = Club('Club', 'c@c.co', 20)
+
+        club['points'] -= 5
+
+        assert club.points == 15
+        assert 'email' in club and 'address' not in club
+        assert club.get('address', 'n/a') == 'n/a'
+        with pytest.raises(KeyError):
+            club['address'] = 'x'
+        with pytest.raises(KeyError):
+            club['keys']
+
+    def test_records_have_no_instance_dict(self):
+        """
+        Action: Inspect a record.
+        Expected: It has no per-instance __dict__.
+        """
+        assert not hasattr(Club('Club', 'c@c.co', 20), '__dict__')
+
+    def test_json_round_trip(self):
+        """
+        Action: Serialize a record through dict() and parse it back.
+        Expected: The same record, with int points.
+        """
+        club = Club('Club', 'c@c.co', 7)
+
+        document = json.loads(json.dumps(dict(club)))
+
+        assert document == {'name': 'Club', 'email': 'c@c.co', 'points': 7}
+        assert Club.from_dict(document).to_dict() == club.to_dict()
+
+    def test_unknown_fields_are_kept(self):
+        """
+        Action: Build a club from a dict holding a field the class does not know.
+        Expected: The field reads like the others and is serialized back.
+        """
+        club = Club.from_dict({'name': 'Club', 'email': 'c@c.co', 'points': '7', 'phone': '0102'})
+
+        assert club['phone'] == '0102' and 'phone' in club
+        assert dict(club) == {'name': 'Club', 'email': 'c@c.co', 'points': 7, 'phone': '0102'}
+        assert not hasattr(club, '__dict__')
+
+    def test_registry_normalizes_plain_dicts(self):
+        """
+        Action: Hand dicts holding numeric strings to a registry.
+        Expected: The very same dicts now hold ints.
+        """
+        clubs = [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}]
+        comps = [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}]
+
+        registry = Registry(clubs, comps)
+
+        assert registry.club_by_name('Club') is clubs[0]
+        assert clubs[0]['points'] == 20
+        assert comps[0]['numberOfPlaces'] == 25
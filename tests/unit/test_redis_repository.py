@@ -0,0 +1,136 @@
+# tests/unit/test_redis_repository.py
+import time
+from datetime import datetime
+import fakeredis
+import pytest
+from pointsboard import PointsBoard
+from repository import RedisRepository
+from reservations import ReservationError
+
+NOW = datetime(2026, 1, 1, 10, 0, 0)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def workers():
+    """
+    Action: Opens two repositories (two "workers") on one fake Redis server
+    loaded with a club and two competitions.
+    Expected: Returns both; their pub/sub listeners are stopped afterwards.
+    """
+    server = fakeredis.FakeServer()
+    first, second = (RedisRepository(fakeredis.FakeRedis(server=server, decode_responses=True))
+                     for _ in range(2))
+    first.import_data(
+        [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}],
+        [{'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'},
+         {'name': 'Old', 'date': '2025-10-10 10:00:00', 'numberOfPlaces': '5'}]
+    )
+    yield first, second
+    first.close()
+    second.close()
+
+
+class TestRedisRepository:
+    """
+    Test suite for the Redis backend shared by several worker processes.
+    """
+
+    def test_lookups_and_schedule(self, workers):
+        """
+        Action: Look records up by email and name, and page the schedule.
+        Expected: Records with int fields; upcoming first, then past.
+        """
+        repository, _ = workers
+
+        assert repository.club_by_email('c@c.co')['points'] == 20
+        assert repository.club_by_email('x@x.co') is None
+        assert repository.competition_by_name('Comp')['numberOfPlaces'] == 25
+        upcoming, past, total = repository.competitions_page(NOW)
+        assert ([c['name'] for c in upcoming], [c['name'] for c in past], total) == (['Comp'], ['Old'], 2)
+
+    def test_booking_is_seen_by_the_other_worker(self, workers):
+        """
+        Action: Worker 2 caches the club, then worker 1 books 5 places.
+        Expected: Worker 2's cache is invalidated and it reads 15 points.
+        """
+        first, second = workers
+        assert second.club_by_name('Club')['points'] == 20
+
+        first.reserve(first.club_by_name('Club'), first.competition_by_name('Comp'), 5)
+
+        wait_until(lambda: second.club_by_name('Club')['points'] == 15)
+        assert second.competition_by_name('Comp')['numberOfPlaces'] == 20
+
+    def test_points_board_follows_the_other_worker(self, mocker, workers):
+        """
+        Action: Worker 2 syncs a points board, then worker 1 books 5 places.
+        Expected: Worker 2's board moves the club from the invalidation, without rereading every club.
+        """
+        first, second = workers
+        # The import's own invalidation must not count as a change
+        wait_until(lambda: second.club_changes(None)[0] == 1)
+        board = PointsBoard()
+        board.refresh(second)
+        list_clubs = mocker.spy(second, 'list_clubs')
+
+        first.reserve(first.club_by_name('Club'), first.competition_by_name('Comp'), 5)
+        wait_until(lambda: second.club_changes(board.cursor)[1])
+        board.refresh(second)
+
+        assert list_clubs.call_count == 0
+        assert board.clubs()[0]['points'] == 15
+
+    def test_changes_of_the_other_worker_are_told(self, workers):
+        """
+        Action: Worker 2 subscribes to changes, then worker 1 books 5 places.
+        Expected: Worker 2 is told the club's points and the competition's places left.
+        """
+        first, second = workers
+        wait_until(lambda: second.club_changes(None)[0] == 1)
+        changes = []
+        second.subscribe_changes(lambda clubs, competitions: changes.append((clubs, competitions)))
+
+        first.reserve(first.club_by_name('Club'), first.competition_by_name('Comp'), 5)
+
+        wait_until(lambda: len(changes) == 2)
+        assert [(c['name'], c['points']) for clubs, _ in changes for c in clubs] == [('Club', 15)]
+        assert [(c['name'], c['numberOfPlaces']) for _, competitions in changes for c in competitions] == \
+            [('Comp', 20)]
+
+    def test_stale_cache_never_oversells(self, workers):
+        """
+        Action: Both workers book 12 points' worth from the same 20 points.
+        Expected: The second booking is refused by the authoritative count.
+        """
+        first, second = workers
+        stale_club = second.club_by_name('Club')
+
+        first.reserve(first.club_by_name('Club'), first.competition_by_name('Comp'), 12)
+        with pytest.raises(ReservationError, match='Not enough points'):
+            second.reserve(stale_club, second.competition_by_name('Comp'), 12)
+
+        assert int(first.redis.hget('gudlft:club:Club', 'points')) == 8
+
+    def test_cap_cancel_and_history(self, workers):
+        """
+        Action: Book 10 places, try 3 more with the 12-place cap, cancel 4.
+        Expected: The cap refuses; the cancel refunds and is in the history.
+        """
+        repository, _ = workers
+        club, competition = repository.club_by_name('Club'), repository.competition_by_name('Comp')
+        repository.reserve(club, competition, 10, cap=12)
+
+        with pytest.raises(ReservationError, match='You cannot book more than 12 places'):
+            repository.reserve(club, competition, 3, cap=12)
+        repository.cancel(club, competition, 4)
+
+        assert (club['points'], competition['numberOfPlaces']) == (14, 19)
+        assert repository.club_bookings(club) == {'Comp': 6}
+        assert repository.history(club) == [('Comp', 10), ('Comp', -4)]
@@ -0,0 +1,63 @@
+# tests/unit/test_registry.py
+from registry import Registry
+
+
+class TestRegistry:
+    """
+    Test suite for the in-memory registry.
+    Validates the hash indexes used by the routes instead of list scans.
+    """
+
+    def test_lookup_by_email_and_name(self):
+        """
+        Action: Build a registry and look clubs up by email and by name.
+        Expected: The indexed record is the same object as in the list.
+        """
+        clubs = [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}]
+        comps = [{'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '25'}]
+        registry = Registry(clubs, comps)
+
+        assert registry.club_by_email('c@c.co') is clubs[0]
+        assert registry.club_by_name('Club') is clubs[0]
+        assert registry.competition_by_name('Comp') is comps[0]
+        assert registry.club_by_email('unknown@c.co') is None
+
+    def test_first_record_wins_on_duplicates(self):
+        """
+        Action: Index two clubs sharing the same email.
+        Expected: The first one is returned, as the former list scan did.
+        """
+        clubs = [
+            {'name': 'First', 'email': 'dup@c.co', 'points': '1'},
+            {'name': 'Second', 'email': 'dup@c.co', 'points': '2'}
+        ]
+        registry = Registry(clubs, [])
+
+        assert registry.club_by_email('dup@c.co')['name'] == 'First'
+
+    def test_sync_reindexes_replaced_lists(self):
+        """
+        Action: Sync the registry with new club and competition lists.
+        Expected: Old records are gone, new ones are indexed and version moves.
+        """
+        registry = Registry([{'name': 'Old', 'email': 'o@c.co', 'points': '1'}], [])
+        version = registry.version
+
+        registry.sync([{'name': 'New', 'email': 'n@c.co', 'points': '1'}], [])
+
+        assert registry.club_by_name('Old') is None
+        assert registry.club_by_name('New') is not None
+        assert registry.version > version
+
+    def test_add_competition_is_indexed(self):
+        """
+        Action: Add a competition after the registry was built.
+        Expected: It is appended to the list and immediately found by name.
+        """
+        comps = []
+        registry = Registry([], comps)
+
+        registry.add_competition({'name': 'Late', 'date': '2030-01-01 10:00:00', 'numberOfPlaces': 5})
+
+        assert comps[0]['name'] == 'Late'
+        assert registry.competition_by_name('Late') is comps[0]
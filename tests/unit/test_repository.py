@@ -0,0 +1,517 @@
+# tests/unit/test_repository.py
+import json
+import time
+import pytest
+import repository as repository_module
+from pointsboard import PointsBoard
+from repository import JsonRepository, SQLiteRepository, migrateJsonToSqlite
+from records import Club
+from reservations import ReservationError
+
+
+@pytest.fixture
+def json_files(tmp_path):
+    """
+    Action: Writes small clubs.json / competitions.json files.
+    Expected: Returns the paths used by the repositories.
+    """
+    clubs_path = tmp_path / 'clubs.json'
+    comps_path = tmp_path / 'competitions.json'
+    clubs_path.write_text(json.dumps({'clubs': [
+        {'name': 'Club', 'email': 'c@c.co', 'points': '20'}
+    ]}))
+    comps_path.write_text(json.dumps({'competitions': [
+        {'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}
+    ]}))
+    return str(clubs_path), str(comps_path), str(tmp_path / 'bookings.journal')
+
+
+class TestRepository:
+    """
+    Test suite for the pluggable storage backends.
+    Validates that the JSON and SQLite repositories behave the same way.
+    """
+
+    def test_json_repository_reserve_is_journaled(self, json_files):
+        """
+        Action: Reserve places, then reload the JSON repository from disk.
+        Expected: The reloaded data includes the booking through the journal.
+        """
+        repository = JsonRepository.load(*json_files)
+        repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 4)
+        repository.journal.close()
+
+        reloaded = JsonRepository.load(*json_files)
+        assert reloaded.club_by_email('c@c.co')['points'] == 16
+        assert reloaded.competition_by_name('Comp')['numberOfPlaces'] == 21
+
+    def test_sqlite_lookups_and_row_update(self, tmp_path):
+        """
+        Action: Import data into SQLite and reserve places.
+        Expected: Lookups by email and name work and the rows are decremented.
+        """
+        repository = SQLiteRepository(str(tmp_path / 'gudlft.db'))
+        repository.import_data(
+            [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}],
+            [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}]
+        )
+        club = repository.club_by_email('c@c.co')
+        competition = repository.competition_by_name('Comp')
+
+        repository.reserve(club, competition, 5)
+
+        assert club['points'] == 15
+        assert repository.club_by_name('Club')['points'] == 15
+        assert repository.competition_by_name('Comp')['numberOfPlaces'] == 20
+        assert repository.club_by_email('unknown@c.co') is None
+
+    def test_sqlite_refuses_overselling(self, tmp_path):
+        """
+        Action: Reserve more places than the club has points.
+        Expected: ReservationError is raised and no row is changed.
+        """
+        repository = SQLiteRepository(str(tmp_path / 'gudlft.db'))
+        repository.import_data(
+            [{'name': 'Club', 'email': 'c@c.co', 'points': '3'}],
+            [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}]
+        )
+
+        with pytest.raises(ReservationError, match='Not enough points'):
+            repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 4)
+
+        assert repository.competition_by_name('Comp')['numberOfPlaces'] == 25
+
+    def test_migration_includes_journal_tail(self, json_files, tmp_path):
+        """
+        Action: Journal a booking, then migrate the JSON files to SQLite.
+        Expected: The database holds every record with the booking applied.
+        """
+        repository = JsonRepository.load(*json_files)
+        repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 2)
+        repository.journal.close()
+
+        counts = migrateJsonToSqlite(*json_files, str(tmp_path / 'gudlft.db'))
+
+        migrated = SQLiteRepository(str(tmp_path / 'gudlft.db'))
+        assert counts == (1, 1)
+        assert migrated.club_by_name('Club')['points'] == 18
+
+    def test_sqlite_batch_is_all_or_nothing(self, tmp_path):
+        """
+        Action: Reserve on two competitions when the second lacks places.
+        Expected: ReservationError names it and the first row is rolled back.
+        """
+        repository = SQLiteRepository(str(tmp_path / 'gudlft.db'))
+        repository.import_data(
+            [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}],
+            [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'},
+             {'name': 'Small', 'date': '2030-11-10 10:00:00', 'numberOfPlaces': '1'}]
+        )
+        club = repository.club_by_name('Club')
+        bookings = [(repository.competition_by_name('Comp'), 3), (repository.competition_by_name('Small'), 2)]
+
+        with pytest.raises(ReservationError) as error:
+            repository.reserve_many(club, bookings)
+
+        assert error.value.competition == 'Small'
+        assert repository.competition_by_name('Comp')['numberOfPlaces'] == 25
+        assert repository.club_by_name('Club')['points'] == 20
+
+    def test_sqlite_points_board_follows_other_processes(self, mocker, tmp_path):
+        """
+        Action: Sync a points board, then book from a second connection (another process).
+        Expected: The club generation is unchanged and the board moves only that club.
+        """
+        path = str(tmp_path / 'gudlft.db')
+        repository, other = SQLiteRepository(path), SQLiteRepository(path)
+        repository.import_data(
+            [{'name': 'Alpha', 'email': 'a@c.co', 'points': '10'},
+             {'name': 'Beta', 'email': 'b@c.co', 'points': '5'}],
+            [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}]
+        )
+        board = PointsBoard()
+        board.refresh(repository)
+        generation = repository.clubs_generation
+        list_clubs = mocker.spy(repository, 'list_clubs')
+
+        other.reserve(other.club_by_name('Alpha'), other.competition_by_name('Comp'), 8)
+        board.refresh(repository)
+
+        assert repository.clubs_generation == generation
+        assert list_clubs.call_count == 0
+        assert [(c['name'], c['points']) for c in board.clubs('points')] == [('Beta', 5), ('Alpha', 2)]
+
+
+    def test_sqlite_changes_of_other_processes_are_told(self, tmp_path):
+        """
+        Action: Subscribe to changes, book from a second connection (another
+        process), then import the data again.
+        Expected: The booked club and competition are told with their new
+        figures, then (None, None) for the import.
+        """
+        path = str(tmp_path / 'gudlft.db')
+        repository, other = SQLiteRepository(path), SQLiteRepository(path)
+        repository.import_data([{'name': 'Alpha', 'email': 'a@c.co', 'points': '10'}],
+                               [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}])
+        repository.changes_interval = 0.01
+        changes = []
+        repository.subscribe_changes(lambda clubs, competitions: changes.append((clubs, competitions)))
+
+        other.reserve(other.club_by_name('Alpha'), other.competition_by_name('Comp'), 3)
+        deadline = time.monotonic() + 5
+        while not changes:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        other.import_data([{'name': 'Alpha', 'email': 'a@c.co', 'points': '10'}], [])
+        while len(changes) < 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        repository.close()
+
+        clubs, competitions = changes[0]
+        assert [(c['name'], c['points']) for c in clubs] == [('Alpha', 7)]
+        assert [(c['name'], c['numberOfPlaces']) for c in competitions] == [('Comp', 22)]
+        assert changes[1] == (None, None)
+
+
+class TestBookingLedger:
+    """
+    Test suite for the bookings ledger of both backends.
+    Validates the per-competition cap across bookings and cancellations.
+    """
+
+    def test_json_cap_applies_across_bookings(self, json_files):
+        """
+        Action: Book 10 places, then 3 more with the 12-place cap.
+        Expected: The second booking is refused and nothing changes.
+        """
+        repository = JsonRepository.load(*json_files)
+        club, competition = repository.club_by_name('Club'), repository.competition_by_name('Comp')
+        repository.reserve(club, competition, 10, cap=12)
+
+        with pytest.raises(ReservationError, match='You cannot book more than 12 places'):
+            repository.reserve(club, competition, 3, cap=12)
+
+        assert repository.booked_places(club, competition) == 10
+        assert club['points'] == 10
+        repository.close()
+
+    def test_json_cancel_refunds_and_survives_reload(self, json_files):
+        """
+        Action: Book 5 places, cancel 2, then reload the repository from disk.
+        Expected: Points and places are refunded and the ledger is rebuilt.
+        """
+        repository = JsonRepository.load(*json_files)
+        club, competition = repository.club_by_name('Club'), repository.competition_by_name('Comp')
+        repository.reserve(club, competition, 5)
+        repository.cancel(club, competition, 2)
+        repository.close()
+
+        reloaded = JsonRepository.load(*json_files)
+        club, competition = reloaded.club_by_name('Club'), reloaded.competition_by_name('Comp')
+        assert club['points'] == 17
+        assert competition['numberOfPlaces'] == 22
+        assert reloaded.club_bookings(club) == {'Comp': 3}
+        assert reloaded.history(club) == [('Comp', 5), ('Comp', -2)]
+
+    def test_json_ledger_snapshot_on_compaction(self, json_files, tmp_path):
+        """
+        Action: Book, compact the journal, book again and reload.
+        Expected: The ledger snapshot plus the journal tail give both bookings.
+        """
+        repository = JsonRepository.load(*json_files)
+        club, competition = repository.club_by_name('Club'), repository.competition_by_name('Comp')
+        repository.reserve(club, competition, 2)
+        repository.journal.compact()
+        repository.reserve(club, competition, 1)
+        repository.close()
+
+        assert json.loads((tmp_path / 'bookings.ledger.json').read_text())['journalSeq'] == 1
+        reloaded = JsonRepository.load(*json_files)
+        assert reloaded.booked_places(reloaded.club_by_name('Club'), reloaded.competition_by_name('Comp')) == 3
+
+    def test_sqlite_cap_and_cancel(self, tmp_path):
+        """
+        Action: Book 10 places in SQLite, try 3 more, then cancel 4.
+        Expected: The cap refuses the second booking; the cancel refunds 4.
+        """
+        repository = SQLiteRepository(str(tmp_path / 'gudlft.db'))
+        repository.import_data(
+            [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}],
+            [{'name': 'Comp', 'date': '2030-10-10 10:00:00', 'numberOfPlaces': '25'}]
+        )
+        club, competition = repository.club_by_name('Club'), repository.competition_by_name('Comp')
+        repository.reserve(club, competition, 10, cap=12)
+
+        with pytest.raises(ReservationError, match='You cannot book more than 12 places'):
+            repository.reserve(club, competition, 3, cap=12)
+        with pytest.raises(ReservationError, match='You only booked 10 places'):
+            repository.cancel(club, competition, 11)
+        repository.cancel(club, competition, 4)
+
+        assert club['points'] == 14
+        assert repository.competition_by_name('Comp')['numberOfPlaces'] == 19
+        assert repository.club_bookings(club) == {'Comp': 6}
+        assert repository.history(club) == [('Comp', 10), ('Comp', -4)]
+
+
+class TestLazyLoading:
+    """
+    Test suite for deferred loading of the JSON data files.
+    Validates that files are read on first use and cached in binary form.
+    """
+
+    def test_files_are_read_on_first_use(self, mocker, json_files):
+        """
+        Action: Open the JSON repository, then look up a club.
+        Expected: Nothing is read when opening; both files are read on the lookup.
+        """
+        load = mocker.spy(repository_module, 'loadSnapshot')
+
+        repository = JsonRepository.load(*json_files)
+        assert load.call_count == 0
+
+        assert repository.club_by_email('c@c.co')['name'] == 'Club'
+        assert load.call_count == 2
+
+    def test_binary_snapshot_is_reused(self, mocker, monkeypatch, json_files):
+        """
+        Action: Load a snapshot twice with the binary copy enabled for all sizes.
+        Expected: The second load does not parse the JSON file.
+        """
+        monkeypatch.setattr(repository_module, 'SNAPSHOT_CACHE_MIN_SIZE', 0)
+        clubs_path = json_files[0]
+        first = repository_module.loadSnapshot(clubs_path, 'clubs')
+
+        parse = mocker.patch('repository.json.load')
+        second = repository_module.loadSnapshot(clubs_path, 'clubs')
+
+        assert parse.call_count == 0
+        assert second == first
+
+    def test_binary_snapshot_follows_json_changes(self, monkeypatch, json_files):
+        """
+        Action: Load a snapshot, rewrite the JSON file, load it again.
+        Expected: The new content is returned, not the stale binary copy.
+        """
+        monkeypatch.setattr(repository_module, 'SNAPSHOT_CACHE_MIN_SIZE', 0)
+        clubs_path = json_files[0]
+        repository_module.loadSnapshot(clubs_path, 'clubs')
+
+        with open(clubs_path, 'w') as f:
+            json.dump({'clubs': [{'name': 'Other', 'email': 'o@o.co', 'points': '3'}], 'journalSeq': 7}, f)
+
+        clubs, seq = repository_module.loadSnapshot(clubs_path, 'clubs')
+        assert clubs[0]['name'] == 'Other'
+        assert seq == 7
+
+    def test_binary_snapshot_of_records(self, monkeypatch, json_files):
+        """
+        Action: Load the clubs as records twice with the binary copy enabled.
+        Expected: The cached load returns equal Club records.
+        """
+        monkeypatch.setattr(repository_module, 'SNAPSHOT_CACHE_MIN_SIZE', 0)
+        first, _ = repository_module.loadSnapshot(json_files[0], 'clubs', Club)
+
+        second, _ = repository_module.loadSnapshot(json_files[0], 'clubs', Club)
+
+        assert isinstance(second[0], Club)
+        assert second[0].to_dict() == first[0].to_dict() == {'name': 'Club', 'email': 'c@c.co', 'points': 20}
+
+    def test_unknown_fields_survive_the_binary_copy_and_compaction(self, monkeypatch, json_files):
+        """
+        Action: Add fields unknown to Club to clubs.json, load it twice (binary copy), book and compact.
+        Expected: The fields are kept by the binary copy and written back by the compaction.
+        """
+        monkeypatch.setattr(repository_module, 'SNAPSHOT_CACHE_MIN_SIZE', 0)
+        clubs_path = json_files[0]
+        with open(clubs_path, 'w') as f:
+            json.dump({'clubs': [{'name': 'Club', 'email': 'c@c.co', 'points': '20',
+                                  'address': {'city': 'Lyon'}, 'active': True}]}, f)
+        repository_module.loadSnapshot(clubs_path, 'clubs', Club)
+        assert repository_module.loadSnapshot(clubs_path, 'clubs', Club)[0][0]['address'] == {'city': 'Lyon'}
+
+        repository = JsonRepository.load(*json_files)
+        repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 2)
+        repository.journal.compact()
+        repository.close()
+
+        with open(clubs_path) as f:
+            saved = json.load(f)['clubs'][0]
+        assert saved == {'name': 'Club', 'email': 'c@c.co', 'points': 18, 'address': {'city': 'Lyon'}, 'active': True}
+
+
+def add_club(clubs_path, name):
+    with open(clubs_path) as f:
+        document = json.load(f)
+    document['clubs'].append({'name': name, 'email': f'{name.lower()}@c.co', 'points': '7'})
+    with open(clubs_path, 'w') as f:
+        json.dump(document, f)
+
+
+class TestHotReload:
+    """
+    Test suite for reloading the JSON data files without a restart.
+    Validates that bookings made in memory survive a reload and that the
+    watcher only reacts to outside changes.
+    """
+
+    def test_reload_keeps_bookings_made_since_loading(self, json_files):
+        """
+        Action: Book 4 places, add a club to clubs.json, then reload.
+        Expected: The new club is found and the booking is still applied.
+        """
+        repository = JsonRepository.load(*json_files)
+        repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 4)
+        version = repository.version
+        add_club(json_files[0], 'New')
+
+        assert repository.reload()
+
+        assert repository.club_by_name('New')['points'] == 7
+        assert repository.club_by_name('Club')['points'] == 16
+        assert repository.competition_by_name('Comp')['numberOfPlaces'] == 21
+        assert repository.booked_places(repository.club_by_name('Club'), repository.competition_by_name('Comp')) == 4
+        assert repository.version > version
+        repository.close()
+
+    def test_queued_bookings_are_not_lost(self, json_files):
+        """
+        Action: Book with a slow background writer in fast mode, then reload at once.
+        Expected: The booking, still queued when the reload starts, is applied.
+        """
+        repository = JsonRepository.load(*json_files, flush_interval=10, durable=False)
+        repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 3)
+
+        repository.reload()
+
+        assert repository.club_by_name('Club')['points'] == 17
+        repository.close()
+
+    def test_booking_with_records_read_before_the_reload(self, json_files):
+        """
+        Action: Look a club up, reload, then book with the record read before.
+        Expected: The booking lands in the reloaded data and updates the old record.
+        """
+        repository = JsonRepository.load(*json_files)
+        club, competition = repository.club_by_name('Club'), repository.competition_by_name('Comp')
+        repository.reload()
+
+        repository.reserve(club, competition, 2)
+
+        assert repository.club_by_name('Club') is not club
+        assert repository.club_by_name('Club')['points'] == club['points'] == 18
+        repository.close()
+
+    def test_only_outside_changes_are_detected(self, json_files):
+        """
+        Action: Compact the journal, then edit clubs.json.
+        Expected: The compaction's own rewrite is ignored, the edit is reported.
+        """
+        repository = JsonRepository.load(*json_files)
+        repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 1)
+        repository.journal.compact()
+        assert repository.changed_files() == {}
+
+        add_club(json_files[0], 'New')
+
+        assert list(repository.changed_files()) == [json_files[0]]
+        repository.close()
+
+    def test_compaction_keeps_an_edit_not_reloaded_yet(self, json_files):
+        """
+        Action: Book, edit clubs.json, compact before any reload, then reload.
+        Expected: The compaction is skipped; the edit is still reported, and the
+        reload keeps both the new club and the booking.
+        """
+        repository = JsonRepository.load(*json_files)
+        repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 2)
+        add_club(json_files[0], 'New')
+
+        assert repository.journal.compact() is False
+        assert list(repository.changed_files()) == [json_files[0]]
+
+        repository.reload()
+        assert repository.club_by_name('New') is not None
+        assert repository.club_by_name('Club')['points'] == 18
+        assert repository.journal.compact() is True
+        repository.close()
+
+    def test_offloaded_file_work(self, json_files):
+        """
+        Action: Offload the blocking file work to a recording runner, then book, compact and reload.
+        Expected: The fsyncs, snapshot writes and file parsing all go through the runner.
+        """
+        calls = []
+
+        def runner(call, args=()):
+            calls.append(getattr(call, '__name__', call))
+            return call(*args)
+        repository = JsonRepository.load(*json_files)
+        repository.offload(runner)
+
+        repository.reserve(repository.club_by_name('Club'), repository.competition_by_name('Comp'), 2)
+        repository.journal.compact()
+        repository.reload()
+
+        assert {'_read_files', 'fsync', 'writeAtomic', '_truncate_through'} <= set(calls)
+        assert repository.club_by_name('Club')['points'] == 18
+        repository.close()
+
+    def test_watcher_reloads_changed_files(self, json_files):
+        """
+        Action: Watch the files, then add a club to clubs.json.
+        Expected: The club is picked up without calling reload().
+        """
+        repository = JsonRepository.load(*json_files)
+        repository.preload()
+        repository.watch(0.01)
+
+        add_club(json_files[0], 'New')
+
+        deadline = time.monotonic() + 5
+        while repository.club_by_name('New') is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        repository.close()
+
+
+class TestJournalFailures:
+    """
+    Test suite for bookings the journal fails to write.
+    Validates that they are refused and taken back, and that later bookings
+    are journaled again.
+    """
+
+    @pytest.mark.parametrize('options', [{}, {'flush_interval': 0.01}])
+    def test_unsaved_booking_is_refused_and_undone(self, mocker, json_files, options):
+        """
+        Action: Fail the first journal write of a booking, then book again.
+        Expected: The first booking is refused with nothing left in memory;
+        the second one is journaled and survives a restart.
+        """
+        write = repository_module.os.write
+        calls = []
+
+        def failing_once(fd, data):
+            calls.append(fd)
+            if len(calls) == 1:
+                raise OSError("disk full")
+            return write(fd, data)
+        mocker.patch('journal.os.write', side_effect=failing_once)
+        repository = JsonRepository.load(*json_files, **options)
+        club, competition = repository.club_by_name('Club'), repository.competition_by_name('Comp')
+
+        with pytest.raises(ReservationError, match="Something went wrong"):
+            repository.reserve(club, competition, 4)
+        assert club['points'] == 20
+        assert competition['numberOfPlaces'] == 25
+        assert repository.booked_places(club, competition) == 0
+        assert repository.history(club) == []
+
+        repository.reserve(club, competition, 3)
+        repository.close()
+
+        reloaded = JsonRepository.load(*json_files)
+        assert reloaded.club_by_name('Club')['points'] == 17
+        assert reloaded.history(reloaded.club_by_name('Club')) == [('Comp', 3)]
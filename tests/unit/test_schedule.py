@@ -0,0 +1,83 @@
+# tests/unit/test_schedule.py
+from datetime import datetime
+import pytest
+from schedule import CompetitionSchedule
+from server import app
+
+
+class TestSchedule:
+    """
+    Test suite for the date-sorted competition schedule.
+    Validates the upcoming/past split against an injected clock.
+    """
+
+    @pytest.fixture
+    def client(self):
+        """
+        Action: Initializes the Flask test client.
+        Expected: Returns a client for simulating HTTP requests.
+        """
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_split_is_sorted_around_now(self):
+        """
+        Action: Split three unordered competitions around a fixed time.
+        Expected: Upcoming soonest first, past most recent first.
+        """
+        comps = [
+            {'name': 'Late', 'date': '2026-09-01 10:00:00', 'numberOfPlaces': 5},
+            {'name': 'Old', 'date': '2020-01-01 10:00:00', 'numberOfPlaces': 5},
+            {'name': 'Soon', 'date': '2026-02-01 10:00:00', 'numberOfPlaces': 5},
+            {'name': 'Recent', 'date': '2025-12-01 10:00:00', 'numberOfPlaces': 5}
+        ]
+        schedule = CompetitionSchedule(comps)
+
+        upcoming, past = schedule.split(datetime(2026, 1, 1))
+
+        assert [c['name'] for c in upcoming] == ['Soon', 'Late']
+        assert [c['name'] for c in past] == ['Recent', 'Old']
+
+    def test_is_past_is_strict(self):
+        """
+        Action: Check a competition starting exactly at the current time.
+        Expected: It is not considered past yet.
+        """
+        comp = {'name': 'Now', 'date': '2026-01-01 10:00:00', 'numberOfPlaces': 5}
+        schedule = CompetitionSchedule([comp])
+
+        assert not schedule.is_past(comp, datetime(2026, 1, 1, 10, 0, 0))
+        assert schedule.is_past(comp, datetime(2026, 1, 1, 10, 0, 1))
+
+    def test_added_competition_keeps_order(self):
+        """
+        Action: Add a competition dated between two existing ones.
+        Expected: It is inserted at its place in date order.
+        """
+        schedule = CompetitionSchedule([
+            {'name': 'A', 'date': '2027-01-01 10:00:00', 'numberOfPlaces': 5},
+            {'name': 'C', 'date': '2027-03-01 10:00:00', 'numberOfPlaces': 5}
+        ])
+        schedule.add({'name': 'B', 'date': '2027-02-01 10:00:00', 'numberOfPlaces': 5})
+
+        upcoming, _ = schedule.split(datetime(2026, 1, 1))
+        assert [c['name'] for c in upcoming] == ['A', 'B', 'C']
+
+    def test_dashboard_can_hide_past_competitions(self, mocker, client):
+        """
+        Action: POST /showSummary with show=upcoming.
+        Expected: Only upcoming competitions are listed on the dashboard.
+        """
+        mocker.patch('server.clubs', [{'name': 'Club', 'email': 'c@c.co', 'points': '20'}])
+        mocker.patch('server.competitions', [
+            {'name': 'Past Comp', 'date': '2020-01-01 10:00:00', 'numberOfPlaces': '10'},
+            {'name': 'Next Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '10'}
+        ])
+
+        full = client.post('/showSummary', data={'email': 'c@c.co'})
+        upcoming = client.post('/showSummary', data={'email': 'c@c.co', 'show': 'upcoming'})
+
+        assert full.data.index(b'Next Comp') < full.data.index(b'Past Comp')
+        assert b'Next Comp' in upcoming.data
+        assert b'Past Comp' not in upcoming.data
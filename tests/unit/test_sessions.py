@@ -0,0 +1,97 @@
+# tests/unit/test_sessions.py
+import os
+import time
+from sessions import SWEEP_INTERVAL, FileSessionStore, MemorySessionStore
+
+
+class TestSessionStores:
+    """
+    Test suite for the server-side session stores.
+    Validates round trips, expiry and the LRU bound.
+    """
+
+    def test_memory_store_round_trip_is_a_copy(self):
+        """
+        Action: Save a session, load it and change the loaded copy.
+        Expected: The stored session is unchanged; tuples survive.
+        """
+        store = MemorySessionStore()
+        store.save('sid', {'_flashes': [('message', 'Hi')]}, time.time() + 60)
+
+        loaded = store.load('sid')
+        loaded['_flashes'].append(('message', 'Other'))
+
+        assert store.load('sid') == {'_flashes': [('message', 'Hi')]}
+
+    def test_memory_store_drops_least_recently_used(self):
+        """
+        Action: Save three sessions in a store bounded to two, reading the first again.
+        Expected: The second session, least recently used, is dropped.
+        """
+        store = MemorySessionStore(max_sessions=2)
+        expires = time.time() + 60
+        store.save('a', {'n': 1}, expires)
+        store.save('b', {'n': 2}, expires)
+        store.load('a')
+        store.save('c', {'n': 3}, expires)
+
+        assert store.load('b') is None
+        assert store.load('a') == {'n': 1}
+        assert store.load('c') == {'n': 3}
+
+    def test_expired_sessions_are_not_loaded(self, tmp_path):
+        """
+        Action: Save already expired sessions in both stores.
+        Expected: Neither is loaded back, and the file is removed.
+        """
+        memory = MemorySessionStore()
+        files = FileSessionStore(str(tmp_path))
+        for store in (memory, files):
+            store.save('sid', {'n': 1}, time.time() - 1)
+
+            assert store.load('sid') is None
+        assert not (tmp_path / 'sid').exists()
+
+    def test_file_store_round_trip_and_delete(self, tmp_path):
+        """
+        Action: Save, load from a second store on the same folder, then delete.
+        Expected: The session is shared, then gone.
+        """
+        FileSessionStore(str(tmp_path)).save('sid', {'_user_id': 'Club'}, time.time() + 60)
+        other = FileSessionStore(str(tmp_path))
+
+        assert other.load('sid') == {'_user_id': 'Club'}
+        other.delete('sid')
+        assert other.load('sid') is None
+
+    def test_memory_store_sweeps_expired_sessions(self):
+        """
+        Action: Save a short-lived session, then save another past the sweep interval.
+        Expected: The expired session is dropped without being loaded again.
+        """
+        now = [1000.0]
+        store = MemorySessionStore(clock=lambda: now[0])
+        store.save('old', {'n': 1}, now[0] + 1)
+
+        now[0] += SWEEP_INTERVAL
+        store.save('new', {'n': 2}, now[0] + 60)
+
+        assert list(store._sessions) == ['new']
+
+    def test_file_store_sweeps_expired_files(self, tmp_path):
+        """
+        Action: Save an expired and a live session, plus a stale temporary file,
+        then save once more past the sweep interval.
+        Expected: Only the live sessions are left in the folder.
+        """
+        now = [time.time()]
+        store = FileSessionStore(str(tmp_path), clock=lambda: now[0])
+        store.save('old', {'n': 1}, now[0] + 1)
+        store.save('live', {'n': 2}, now[0] + 3600)
+        (tmp_path / 'crashed.tmp').write_text('{}')
+        os.utime(tmp_path / 'crashed.tmp', (now[0], now[0]))
+
+        now[0] += 2 * SWEEP_INTERVAL
+        store.save('new', {'n': 3}, now[0] + 60)
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == ['live', 'new']
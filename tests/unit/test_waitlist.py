@@ -0,0 +1,188 @@
+# tests/unit/test_waitlist.py
+import time
+from datetime import datetime
+import pytest
+from journal import BookingJournal
+from repository import JsonRepository, SQLiteRepository
+from reservations import ReservationError
+from waitlist import Waitlist
+
+NOW = datetime(2026, 1, 1, 10, 0, 0)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """
+    Action: Builds a JSON repository with three clubs and a sold-out competition.
+    Expected: Returns the repository, journaled in a temporary folder.
+    """
+    clubs = [
+        {'name': 'Alpha', 'email': 'a@a.co', 'points': '5'},
+        {'name': 'Beta', 'email': 'b@b.co', 'points': '15'},
+        {'name': 'Gamma', 'email': 'g@g.co', 'points': '1'},
+    ]
+    comps = [{'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '0'}]
+    repository = JsonRepository(clubs, comps, None)
+    repository.journal = BookingJournal(
+        str(tmp_path / 'bookings.journal'), str(tmp_path / 'clubs.json'),
+        str(tmp_path / 'competitions.json'), source=lambda: (clubs, comps),
+        lock=repository.store.lock)
+    yield repository
+    repository.journal.close()
+
+
+class TestWaitlist:
+    """
+    Test suite for the waitlist of sold-out competitions.
+    Validates queue order, allocation of freed places and refusals.
+    """
+
+    def make_waitlist(self, repository, order='fifo'):
+        return Waitlist(lambda: repository, lambda: NOW, order)
+
+    def join(self, waitlist, repository, club, places):
+        return waitlist.join(repository.club_by_name(club), repository.competition_by_name('Comp'), places, NOW)
+
+    def test_positions_follow_joining_order(self, repository):
+        """
+        Action: Alpha then Beta join the waitlist of a sold-out competition.
+        Expected: They are numbers 1 and 2.
+        """
+        waitlist = self.make_waitlist(repository)
+
+        assert self.join(waitlist, repository, 'Alpha', 2) == 1
+        assert self.join(waitlist, repository, 'Beta', 2) == 2
+
+    def test_join_is_refused_while_places_remain(self, repository):
+        """
+        Action: Join the waitlist of a competition that still has places.
+        Expected: ReservationError, nothing is queued.
+        """
+        waitlist = self.make_waitlist(repository)
+        repository.competition_by_name('Comp')['numberOfPlaces'] = 5
+
+        with pytest.raises(ReservationError, match="Places are still available"):
+            self.join(waitlist, repository, 'Alpha', 2)
+        assert waitlist.waiting(repository.competition_by_name('Comp')) == []
+
+    def test_freed_places_go_to_the_head_first(self, repository):
+        """
+        Action: Alpha and Beta wait for 2 places each; 3 places are freed.
+        Expected: Alpha is booked; Beta keeps waiting at the head of the queue.
+        """
+        waitlist = self.make_waitlist(repository)
+        self.join(waitlist, repository, 'Alpha', 2)
+        self.join(waitlist, repository, 'Beta', 2)
+        competition = repository.competition_by_name('Comp')
+        competition['numberOfPlaces'] = 3
+
+        waitlist.allocate('Comp')
+
+        assert competition['numberOfPlaces'] == 1
+        assert repository.club_by_name('Alpha')['points'] == 3
+        assert waitlist.waiting(competition) == [('Beta', 2)]
+        assert waitlist.pop_notices(repository.club_by_name('Alpha')) == [
+            "Waitlist: 2 place(s) booked for Comp."]
+
+    def test_points_order_serves_richest_club_first(self, repository):
+        """
+        Action: In points order, Alpha (5 points) then Beta (15 points) join.
+        Expected: Beta is first in line.
+        """
+        waitlist = self.make_waitlist(repository, order='points')
+        self.join(waitlist, repository, 'Alpha', 1)
+        self.join(waitlist, repository, 'Beta', 1)
+
+        assert waitlist.waiting(repository.competition_by_name('Comp')) == [('Beta', 1), ('Alpha', 1)]
+
+    def test_request_no_longer_affordable_is_dropped(self, repository):
+        """
+        Action: Gamma waits for 1 place, spends its points, then 1 place is freed.
+        Expected: Gamma's request is dropped with a notice; the place stays free.
+        """
+        waitlist = self.make_waitlist(repository)
+        self.join(waitlist, repository, 'Gamma', 1)
+        repository.club_by_name('Gamma')['points'] = 0
+        competition = repository.competition_by_name('Comp')
+        competition['numberOfPlaces'] = 1
+
+        waitlist.allocate('Comp')
+
+        assert competition['numberOfPlaces'] == 1
+        assert waitlist.waiting(competition) == []
+        assert waitlist.pop_notices(repository.club_by_name('Gamma')) == [
+            "Waitlist for Comp cancelled: Not enough points"]
+
+    def test_given_back_places_wake_the_allocator(self, repository):
+        """
+        Action: Alpha waits for 1 place; a listener reports 1 place given back.
+        Expected: The background allocator books it for Alpha.
+        """
+        waitlist = self.make_waitlist(repository)
+        self.join(waitlist, repository, 'Alpha', 1)
+        competition = repository.competition_by_name('Comp')
+        competition['numberOfPlaces'] = 1
+
+        waitlist.on_booking(repository.club_by_name('Beta'), competition, -1)
+
+        deadline = time.monotonic() + 5
+        while competition['numberOfPlaces'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert competition['numberOfPlaces'] == 0
+        assert repository.club_by_name('Alpha')['points'] == 4
+
+
+class TestSharedWaitlist:
+    """
+    Test suite for waitlists outliving their process and following the
+    places given back by other processes.
+    """
+
+    def test_cancellation_of_another_process_wakes_the_allocator(self, tmp_path):
+        """
+        Action: Alpha waits for a place of a SQLite competition; a second connection (another process) cancels one.
+        Expected: The change feed wakes the allocator, which books it for Alpha.
+        """
+        path = str(tmp_path / 'gudlft.db')
+        repository, other = SQLiteRepository(path), SQLiteRepository(path)
+        repository.import_data(
+            [{'name': 'Alpha', 'email': 'a@a.co', 'points': '5'},
+             {'name': 'Beta', 'email': 'b@b.co', 'points': '15'}],
+            [{'name': 'Comp', 'date': '2026-10-10 10:00:00', 'numberOfPlaces': '2'}])
+        other.reserve(other.club_by_name('Beta'), other.competition_by_name('Comp'), 2)
+        repository.changes_interval = 0.01
+        waitlist = Waitlist(lambda: repository, lambda: NOW)
+        repository.subscribe_changes(waitlist.on_changes)
+        waitlist.join(repository.club_by_name('Alpha'), repository.competition_by_name('Comp'), 1, NOW)
+
+        other.cancel(other.club_by_name('Beta'), other.competition_by_name('Comp'), 1)
+
+        deadline = time.monotonic() + 5
+        while repository.club_by_name('Alpha')['points'] == 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        repository.close()
+        assert repository.club_by_name('Alpha')['points'] == 4
+        assert repository.competition_by_name('Comp')['numberOfPlaces'] == 0
+
+    def test_queues_and_notices_survive_a_restart(self, repository, tmp_path):
+        """
+        Action: Queue Gamma, Alpha then Beta; serve Gamma, who can no longer pay; open a new waitlist on the same file.
+        Expected: The new waitlist has Alpha and Beta in the same order and
+        still delivers Gamma's notice.
+        """
+        path = str(tmp_path / 'waitlist.json')
+        waitlist = Waitlist(lambda: repository, lambda: NOW, path=path)
+        competition = repository.competition_by_name('Comp')
+        for club, places in (('Gamma', 1), ('Alpha', 2), ('Beta', 3)):
+            waitlist.join(repository.club_by_name(club), competition, places, NOW)
+        repository.club_by_name('Gamma')['points'] = 0
+        competition['numberOfPlaces'] = 1
+        waitlist.allocate('Comp')
+        competition['numberOfPlaces'] = 0
+
+        restarted = Waitlist(lambda: repository, lambda: NOW, path=path)
+
+        assert restarted.waiting(competition) == [('Alpha', 2), ('Beta', 3)]
+        assert restarted.position(repository.club_by_name('Beta'), competition) == 2
+        assert restarted.pop_notices(repository.club_by_name('Gamma')) == [
+            "Waitlist for Comp cancelled: Not enough points"]
@@ -0,0 +1,204 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from booking import MAX_PLACES_PER_CLUB, checkQuantity, placeBooking
+from journal import writeAtomic
+from reservations import ReservationError
+
+logger = logging.getLogger(__name__)
+
+ORDERS = ('fifo', 'points')
+# Messages kept per club until its next dashboard view
+MAX_NOTICES = 20
+
+
+class Waitlist:
+    """
+    Per-competition queues of clubs waiting for places on a sold-out
+    competition. Entries are served first come, first served ('fifo') or
+    highest points first ('points', as of joining); a background allocator
+    books them with the regular rules as soon as places are freed. The head
+    of a queue is never skipped for a smaller request behind it.
+    The queues and undelivered notices are saved to path, if given, after
+    every change and restored from it on start. They live in one process:
+    several workers would each keep (and save) their own.
+    """
+
+    def __init__(self, getRepository, currentTime, order='fifo', path=None):
+        self.getRepository = getRepository
+        self.currentTime = currentTime
+        self.order = order if order in ORDERS else 'fifo'
+        self.lock = threading.RLock()
+        # competition name -> heap of [priority, seq, club name, places, active]
+        self._queues = {}
+        # (club name, competition name) -> its heap entry
+        self._entries = {}
+        self._seq = itertools.count()
+        self._notices = defaultdict(lambda: deque(maxlen=MAX_NOTICES))
+        self._freed = set()
+        self._wakeup = threading.Condition(self.lock)
+        self._allocator = None
+        self.path = path
+        if path and os.path.exists(path):
+            self._restore()
+
+    # Queue a club for places on a competition; returns its position (1-based).
+    # Joining again replaces the club's previous request.
+    def join(self, club, competition, places, now):
+        data = self.getRepository()
+        if data.is_past(competition, now):
+            raise ReservationError("This competition is over.")
+        placesRequired = checkQuantity(places)
+        if placesRequired + data.booked_places(club, competition) > MAX_PLACES_PER_CLUB:
+            raise ReservationError(f"You cannot book more than {MAX_PLACES_PER_CLUB} places")
+        if placesRequired > club['points']:
+            raise ReservationError("Not enough points")
+        if placesRequired <= competition['numberOfPlaces']:
+            raise ReservationError("Places are still available, book them directly.")
+        with self.lock:
+            self._drop(club['name'], competition['name'])
+            priority = -club['points'] if self.order == 'points' else 0
+            entry = [priority, next(self._seq), club['name'], placesRequired, True]
+            heapq.heappush(self._queues.setdefault(competition['name'], []), entry)
+            self._entries[(club['name'], competition['name'])] = entry
+            self._save()
+            # Places may have been freed since the club saw the competition sold out
+            self.freed(competition)
+            return self.position(club, competition)
+
+    # Remove a club from a competition's queue (entries are dropped lazily)
+    def leave(self, club, competition):
+        with self.lock:
+            if self._drop(club['name'], competition['name']):
+                self._save()
+
+    def _drop(self, club_name, competition_name):
+        entry = self._entries.pop((club_name, competition_name), None)
+        if entry is not None:
+            entry[-1] = False
+        return entry is not None
+
+    def position(self, club, competition):
+        with self.lock:
+            entry = self._entries.get((club['name'], competition['name']))
+            if entry is None:
+                return None
+            return 1 + sum(1 for other in self._queues.get(competition['name'], ())
+                           if other[-1] and other[:2] < entry[:2])
+
+    # Waiting (club name, places) pairs of a competition, in serving order
+    def waiting(self, competition):
+        with self.lock:
+            return [(entry[2], entry[3]) for entry in sorted(self._queues.get(competition['name'], ())) if entry[-1]]
+
+    # Messages about allocations made for a club since its last call
+    def pop_notices(self, club):
+        with self.lock:
+            notices = self._notices.pop(club['name'], None)
+            if not notices:
+                return []
+            self._save()
+            return list(notices)
+
+    # Repository listener: negative places are places given back
+    def on_booking(self, club, competition, places):
+        if places < 0:
+            self.freed(competition)
+
+    # Repository change listener: places may have been given back by any
+    # process sharing the data (by any competition when None)
+    def on_changes(self, clubs, competitions):
+        if competitions is None:
+            with self.lock:
+                competitions = [{'name': name} for name in self._queues]
+        for competition in competitions:
+            self.freed(competition)
+
+    # Ask the background allocator to serve a competition's queue
+    def freed(self, competition):
+        with self.lock:
+            if not any(entry[-1] for entry in self._queues.get(competition['name'], ())):
+                return
+            self._freed.add(competition['name'])
+            if self._allocator is None:
+                self._allocator = threading.Thread(target=self._run, daemon=True)
+                self._allocator.start()
+            self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                self._wakeup.wait_for(lambda: self._freed)
+                name = self._freed.pop()
+            self.allocate(name)
+
+    # Book queued requests in order while the head of the queue fits; requests
+    # that can no longer be honoured (points, date) are dropped with a notice
+    def allocate(self, competition_name):
+        booked = []
+        data = self.getRepository()
+        with self.lock:
+            queue = self._queues.get(competition_name)
+            competition = data.competition_by_name(competition_name)
+            while queue and competition is not None:
+                entry = queue[0]
+                if not entry[-1]:
+                    heapq.heappop(queue)
+                    continue
+                _, _, club_name, places, _ = entry
+                if places > competition['numberOfPlaces']:
+                    break
+                heapq.heappop(queue)
+                del self._entries[(club_name, competition_name)]
+                club = data.club_by_name(club_name)
+                if club is None:
+                    continue
+                try:
+                    placeBooking(data, club, competition, places, self.currentTime())
+                except ReservationError as error:
+                    self._notices[club_name].append(
+                        f"Waitlist for {competition_name} cancelled: {error}")
+                    continue
+                self._notices[club_name].append(
+                    f"Waitlist: {places} place(s) booked for {competition_name}.")
+                booked.append((club_name, places))
+            if queue is not None and not any(entry[-1] for entry in queue):
+                del self._queues[competition_name]
+            if queue is not None:
+                self._save()
+        return booked
+
+    # Write the waiting requests, in serving order, and the notices not shown yet
+    def _save(self):
+        if not self.path:
+            return
+        queues = {name: [[entry[2], entry[3], entry[0]] for entry in sorted(queue) if entry[-1]]
+                  for name, queue in self._queues.items()}
+        notices = {club_name: list(lines) for club_name, lines in self._notices.items() if lines}
+        try:
+            writeAtomic(self.path, {'queues': queues, 'notices': notices})
+        except OSError:
+            logger.exception("Saving the waitlists to %s failed", self.path)
+
+    # Queue the saved requests again, then serve them: places may have been
+    # freed while the process was down
+    def _restore(self):
+        try:
+            with open(self.path) as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            logger.exception("Reading the waitlists from %s failed; starting with empty queues", self.path)
+            return
+        for competition_name, entries in document.get('queues', {}).items():
+            for club_name, places, priority in entries:
+                entry = [priority, next(self._seq), club_name, places, True]
+                heapq.heappush(self._queues.setdefault(competition_name, []), entry)
+                self._entries[(club_name, competition_name)] = entry
+        for club_name, lines in document.get('notices', {}).items():
+            self._notices[club_name].extend(lines)
+        for competition_name in list(self._queues):
+            self.freed({'name': competition_name})
@@ -0,0 +1,41 @@
+# Gevent entry point: python wsgi.py
+# Every connection is a greenlet, so an open live-update stream (/events)
+# costs a few kilobytes instead of a pool thread. The standard library is
+# patched before the app is imported, so its locks, conditions and background
+# threads cooperate with the greenlets. Those threads become greenlets too:
+# the blocking file work they do (journal fsyncs, snapshot writes, parsing
+# reloaded data files) is handed to gevent's pool of native threads instead.
+from gevent import monkey
+monkey.patch_all()
+
+import os  # noqa: E402
+import signal  # noqa: E402
+import gevent  # noqa: E402
+from gevent.pywsgi import WSGIServer  # noqa: E402
+from server import app, events, repository  # noqa: E402
+
+HOST = os.environ.get('GUDLFT_HOST', '127.0.0.1')
+PORT = int(os.environ.get('GUDLFT_PORT', '5000'))
+# Seconds given to the requests in progress at shutdown
+STOP_TIMEOUT = 10
+
+# Fsyncs and data file parsing run in native threads (see above)
+repository.offload(gevent.get_hub().threadpool.apply)
+
+
+def main():
+    server = WSGIServer((HOST, PORT), app)
+
+    # End the event streams first, then let the other requests finish
+    def stop():
+        events.close()
+        server.stop(timeout=STOP_TIMEOUT)
+        repository.close()
+
+    gevent.signal_handler(signal.SIGTERM, stop)
+    gevent.signal_handler(signal.SIGINT, stop)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()